@@ -0,0 +1,161 @@
+"""How many hours to book each day and how to split the unbooked ones.
+
+The targets and the filler tasks are read from a local JSON file, so part
+time schedules and the split across projects can change without code
+changes, for example:
+
+    {
+        "hours_per_day": 7.5,
+        "weekday_hours": {"friday": 4},
+        "increment": 0.25,
+        "min_hours": 0.5,
+        "filler": [
+            {"project_id": 123, "task_id": 456, "weight": 2, "notes": "joke"},
+            {"project_id": 123, "task_id": 789}
+        ]
+    }
+
+Without a file every weekday is 8 hours, split equally at random across the
+default filler tasks. The unbooked hours of all the days of a plan are split
+at once with `split_totals`.
+"""
+
+import math
+from collections.abc import Iterable, Sequence
+from datetime import date
+from enum import StrEnum
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from harvest_auto_timesheet.notes import NoteKind
+
+if TYPE_CHECKING:
+    import numpy as np
+    import numpy.typing as npt
+
+DEFAULT_HOURS_PER_DAY = 8
+DAYS_PER_WEEK = 5  # Monday to Friday are worked by default
+
+
+class Weekday(StrEnum):
+    MONDAY = "monday"
+    TUESDAY = "tuesday"
+    WEDNESDAY = "wednesday"
+    THURSDAY = "thursday"
+    FRIDAY = "friday"
+    SATURDAY = "saturday"
+    SUNDAY = "sunday"
+
+
+_WEEKDAYS = list(Weekday)
+
+
+class FillerTask(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    project_id: int
+    task_id: int
+    weight: float = Field(default=1.0, gt=0)  # relative to the other filler tasks
+    notes: NoteKind = NoteKind.ADVICE
+
+
+class Allocation(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    hours_per_day: float = Field(default=DEFAULT_HOURS_PER_DAY, ge=0, le=24)
+    # part time schedules, the days missing use hours_per_day on weekdays
+    weekday_hours: dict[Weekday, float] = {}
+    # scales the days so a full week adds up to this
+    weekly_hours: float | None = Field(default=None, ge=0)
+    # the filler hours are booked in multiples of this, except for the remainder
+    increment: float | None = Field(default=None, gt=0)
+    # smaller filler entries are merged into the largest one of the day
+    min_hours: float = Field(default=0, ge=0)
+    # None uses the planner's default filler tasks
+    filler: list[FillerTask] | None = Field(default=None, min_length=1)
+
+    @classmethod
+    def from_file(cls, path: str | Path | None) -> "Allocation":
+        """Load an allocation from a JSON file, or the default one without a path."""
+        if path is None:
+            return cls()
+        return cls.model_validate_json(Path(path).read_bytes())
+
+    def get_targets(self, days: Iterable[date]) -> dict[date, float]:
+        """Get the hours to book on each day.
+
+        Args:
+            days (Iterable[date]): The days to get the targets of.
+
+        Returns:
+            dict[date, float]: The hours to book on each day, 0 for the days
+                that aren't worked.
+
+        """
+        daily = [self._get_day_hours(weekday) for weekday in _WEEKDAYS]
+        total = math.fsum(daily)
+        scale = 1.0
+        if self.weekly_hours is not None and total:
+            scale = self.weekly_hours / total
+        return {day: round(daily[day.weekday()] * scale, 6) for day in days}
+
+    def split(
+        self,
+        remaining: Sequence[float],
+        weights: Sequence[float],
+        rng: "np.random.Generator | None" = None,
+    ) -> "npt.NDArray[np.float64]":
+        """Split the unbooked hours of many days across the filler tasks.
+
+        numpy is only imported here, as loading it slows down every command.
+
+        Args:
+            remaining (Sequence[float]): The unbooked hours of each day.
+            weights (Sequence[float]): The weight of each filler task.
+            rng (np.random.Generator | None): The generator for the random
+                split, a new one by default.
+
+        Returns:
+            NDArray: The hours of each filler task on each day, one row per
+                day summing up to its unbooked hours.
+
+        """
+        import numpy as np
+
+        from harvest_auto_timesheet.split import split_totals
+
+        if rng is None:
+            rng = np.random.default_rng()
+        totals = np.asarray(remaining, dtype=np.float64)
+        if self.increment is None:
+            parts = split_totals(totals, len(weights), rng, weights=weights)
+        else:
+            whole = np.floor(np.round(totals / self.increment, 6)) * self.increment
+            parts = split_totals(
+                whole, len(weights), rng, weights=weights, unit=self.increment
+            )
+            # the hours that don't fill an increment go to the largest part
+            rows = np.arange(parts.shape[0])
+            parts[rows, parts.argmax(axis=1)] += totals - whole
+
+        if self.min_hours and parts.size:
+            rows = np.arange(parts.shape[0])
+            largest = parts.argmax(axis=1)
+            small = (parts > 0) & (parts < self.min_hours)
+            small[rows, largest] = False
+            parts[rows, largest] += np.where(small, parts, 0).sum(axis=1)
+            parts[small] = 0
+
+        result: npt.NDArray[np.float64] = np.round(parts, 6)
+        return result
+
+    def _get_day_hours(self, weekday: Weekday) -> float:
+        if weekday in self.weekday_hours:
+            return self.weekday_hours[weekday]
+        is_weekend = _WEEKDAYS.index(weekday) >= DAYS_PER_WEEK
+        return 0.0 if is_weekend else self.hours_per_day
+
+
+DEFAULT_ALLOCATION = Allocation()
@@ -0,0 +1,225 @@
+"""Fill the timesheets of many past weeks at once.
+
+The calendar events, incidents and time entries of the whole range are read
+with a single range query per source, then split by week. Each week is
+planned on its own thread and its writes are sent as soon as it is planned.
+All the writes go through the same Harvest client, so they share its
+concurrency limit and rate limiter and the backfill takes about as long as
+the API quota allows.
+"""
+
+import asyncio
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import TYPE_CHECKING
+from zoneinfo import ZoneInfo
+
+from pydantic import BaseModel
+from rich.console import Console
+
+from harvest_auto_timesheet.allocation import DEFAULT_ALLOCATION, Allocation
+from harvest_auto_timesheet.cache import ResponseCache
+from harvest_auto_timesheet.classify import DEFAULT_CLASSIFIER, Classifier
+from harvest_auto_timesheet.dedup import WriteIndex
+from harvest_auto_timesheet.entries import TimeEntryIndex
+from harvest_auto_timesheet.gcal import CalendarEvent, get_calendar_events
+from harvest_auto_timesheet.harvest import AsyncHarvest, TimeEntry
+from harvest_auto_timesheet.holiday import HolidayIndex
+from harvest_auto_timesheet.pagerd import MAX_WORKERS as PAGERDUTY_MAX_WORKERS
+from harvest_auto_timesheet.pagerd import Incident, get_incidents
+from harvest_auto_timesheet.planner import Plan, execute_plan_async, plan_week
+from harvest_auto_timesheet.ratelimit import TokenBucket
+from harvest_auto_timesheet.schedule import get_time_range
+from harvest_auto_timesheet.util import get_start_of_week
+
+if TYPE_CHECKING:
+    import pagerduty
+    from google.oauth2.service_account import Credentials
+
+console = Console()
+
+DAYS_PER_WEEK = 5  # Monday to Friday
+
+
+class WeekResult(BaseModel):
+    week_start: date
+    plan: Plan | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _WeekData(BaseModel):
+    calendar_events: list[CalendarEvent] = []
+    incidents: list[Incident] = []
+    time_entries: list[TimeEntry] = []
+
+
+def get_weeks(from_date: date, to_date: date) -> list[list[date]]:
+    """Split a date range into the working days of each week.
+
+    Args:
+        from_date (date): The first day of the range.
+        to_date (date): The last day of the range, inclusive.
+
+    Returns:
+        list[list[date]]: The Monday to Friday days of each week in the
+            range, without the days outside of it.
+
+    """
+    weeks = []
+    week_start = get_start_of_week(from_date)
+    while week_start <= to_date:
+        weekdays = [
+            day
+            for i in range(DAYS_PER_WEEK)
+            if from_date <= (day := week_start + timedelta(days=i)) <= to_date
+        ]
+        if weekdays:
+            weeks.append(weekdays)
+        week_start += timedelta(weeks=1)
+    return weeks
+
+
+def _get_event_date(event: CalendarEvent) -> date:
+    if event.start.datetime is not None:
+        return event.start.datetime.date()
+    assert event.start.date_ is not None
+    return event.start.date_
+
+
+def _split_by_week(
+    calendar_events: list[CalendarEvent],
+    incidents: list[Incident],
+    time_entries: list[TimeEntry],
+) -> dict[date, _WeekData]:
+    """Split the data read for the whole range by the week it belongs to."""
+    weeks: dict[date, _WeekData] = defaultdict(_WeekData)
+    for event in calendar_events:
+        weeks[get_start_of_week(_get_event_date(event))].calendar_events.append(event)
+    for incident in incidents:
+        # incidents are booked on the day they are resolved
+        weeks[get_start_of_week(incident.resolved_at.date())].incidents.append(incident)
+    for entry in time_entries:
+        weeks[get_start_of_week(entry.spent_date)].time_entries.append(entry)
+    return weeks
+
+
+async def run_backfill(  # noqa: PLR0913
+    harvest: AsyncHarvest,
+    credentials: "Credentials",
+    calendar_id: str,
+    pagerduty_client: "pagerduty.RestApiV2Client",
+    pagerduty_user_id: str,
+    *,
+    from_date: date,
+    to_date: date,
+    cache: ResponseCache | None = None,
+    pagerduty_rate_limiter: TokenBucket | None = None,
+    pagerduty_max_workers: int = PAGERDUTY_MAX_WORKERS,
+    holidays: HolidayIndex | None = None,
+    allocation: Allocation = DEFAULT_ALLOCATION,
+    classifier: Classifier = DEFAULT_CLASSIFIER,
+    prune: bool = False,
+    write_index: WriteIndex | None = None,
+    dry_run: bool = False,
+) -> list[WeekResult]:
+    """Fill the timesheet of every week in a date range.
+
+    Args:
+        harvest (AsyncHarvest): The client all the weeks write through.
+        credentials (Credentials): The Google service account credentials.
+        calendar_id (str): The calendar to book the events of.
+        pagerduty_client (pagerduty.RestApiV2Client): The PagerDuty client.
+        pagerduty_user_id (str): The PagerDuty user to book the incidents of.
+        from_date (date): The first day to fill.
+        to_date (date): The last day to fill, inclusive.
+        cache (ResponseCache | None): The cache for the calendar and incidents.
+        pagerduty_rate_limiter (TokenBucket | None): The PagerDuty rate limiter.
+        pagerduty_max_workers (int): The incident logs fetched at the same time.
+        holidays (HolidayIndex | None): The days off.
+        allocation (Allocation): The hours to book each day and the filler split.
+        classifier (Classifier): The rules booking the events and incidents.
+        prune (bool): Delete the generated entries that are no longer wanted.
+        write_index (WriteIndex | None): The generated entries already written.
+        dry_run (bool): Only plan the weeks, without writing to Harvest.
+
+    Returns:
+        list[WeekResult]: The plan of each week, or the error that stopped it.
+            A failed week doesn't stop the others.
+
+    """
+    weeks = get_weeks(from_date, to_date)
+    if not weeks:
+        return []
+
+    tz = ZoneInfo("Pacific/Auckland")
+    time_min, time_max = get_time_range([weeks[0][0], weeks[-1][-1]], tz)
+    console.print(f"Reading {len(weeks)} weeks from {weeks[0][0]} to {weeks[-1][-1]}")
+
+    # a single range query per source for all the weeks
+    calendar_events, incidents, time_entries, user = await asyncio.gather(
+        asyncio.to_thread(
+            get_calendar_events,
+            creds=credentials,
+            calendar_id=calendar_id,
+            time_min=time_min,
+            time_max=time_max,
+            timezone=tz,
+            cache=cache,
+        ),
+        asyncio.to_thread(
+            get_incidents,
+            pd_client=pagerduty_client,
+            user_id=pagerduty_user_id,
+            since=weeks[0][0],
+            until=weeks[-1][-1],
+            cache=cache,
+            rate_limiter=pagerduty_rate_limiter,
+            max_workers=pagerduty_max_workers,
+        ),
+        harvest.get_time_entries(from_date=weeks[0][0], to_date=weeks[-1][-1]),
+        # an admin token reads the entries of every user
+        harvest.get_user(),
+    )
+    data_by_week = _split_by_week(calendar_events, incidents, time_entries)
+    if holidays is None:
+        holidays = HolidayIndex()
+    user_id = user["id"]
+
+    async def run_week(weekdays: list[date]) -> WeekResult:
+        week_start = get_start_of_week(weekdays[0])
+        data = data_by_week[week_start]
+        existing_entries = TimeEntryIndex(data.time_entries)
+        try:
+            # planning is blocking so the weeks are planned on threads
+            plan = await asyncio.to_thread(
+                plan_week,
+                weekdays=weekdays,
+                calendar_events=data.calendar_events,
+                incidents=data.incidents,
+                existing_entries=existing_entries,
+                holidays=holidays,
+                allocation=allocation,
+                classifier=classifier,
+                prune=prune,
+                user_id=user_id,
+            )
+            if not dry_run:
+                await execute_plan_async(
+                    harvest=harvest,
+                    plan=plan,
+                    index=write_index,
+                    entries=existing_entries,
+                    user_id=user_id,
+                )
+        except Exception as e:  # noqa: BLE001
+            console.print(f"[red]Failed to fill the week of {week_start}: {e}")
+            return WeekResult(week_start=week_start, error=f"{type(e).__name__}: {e}")
+
+        console.print(f"Week of {week_start}: {plan.summary()}")
+        return WeekResult(week_start=week_start, plan=plan)
+
+    return await asyncio.gather(*(run_week(weekdays) for weekdays in weeks))
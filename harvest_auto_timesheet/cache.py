@@ -0,0 +1,197 @@
+"""Persistent on-disk cache for API responses.
+
+Responses are stored in a single SQLite file, keyed by a namespace (the API
+they came from) and a hash of the endpoint and its parameters. Each entry has
+its own expiry and an optional ETag so that expired entries can be revalidated
+instead of downloaded again. The least recently used entries are evicted once
+the cache grows past `max_bytes`.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    etag TEXT,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    value: Any
+    etag: str | None
+    expires_at: float
+
+    def is_expired(self, now: float | None = None) -> bool:
+        """Check if the entry needs to be revalidated or fetched again."""
+        return (now if now is not None else time.time()) >= self.expires_at
+
+
+def make_key(*parts: Any) -> str:
+    """Make a cache key from an endpoint and its parameters."""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Size bounded LRU cache of JSON responses backed by SQLite."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_bytes: int = 64 * 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.clock = clock
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # the connection is shared between threads and guarded by the lock
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def get(self, namespace: str, key: str) -> CacheEntry | None:
+        """Get an entry, including expired ones so they can be revalidated.
+
+        Args:
+            namespace (str): The API the response came from.
+            key (str): The key made from the endpoint and its parameters.
+
+        Returns:
+            CacheEntry | None: The cached entry or None if there isn't one.
+
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, etag, expires_at FROM responses "
+                "WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (self.clock(), namespace, key),
+            )
+
+        value, etag, expires_at = row
+        return CacheEntry(value=json.loads(value), etag=etag, expires_at=expires_at)
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl: float,
+        etag: str | None = None,
+    ) -> None:
+        """Store an entry, evicting the least recently used ones if needed.
+
+        Args:
+            namespace (str): The API the response came from.
+            key (str): The key made from the endpoint and its parameters.
+            value (Any): The JSON serialisable response.
+            ttl (float): The number of seconds the entry is fresh for.
+            etag (str | None): The ETag used to revalidate the entry.
+
+        """
+        raw = json.dumps(value)
+        now = self.clock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(namespace, key, value, etag, expires_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (namespace, key, raw, etag, now + ttl, now, len(raw)),
+            )
+            self._evict()
+
+    def touch(self, namespace: str, key: str, ttl: float) -> None:
+        """Mark an entry as fresh again after it was revalidated."""
+        now = self.clock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE responses SET expires_at = ?, accessed_at = ? "
+                "WHERE namespace = ? AND key = ?",
+                (now + ttl, now, namespace, key),
+            )
+
+    def invalidate(self, namespace: str) -> None:
+        """Remove all the entries for a namespace."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM responses WHERE namespace = ?", (namespace,)
+            )
+
+    def get_or_set(
+        self,
+        namespace: str,
+        key: str,
+        ttl: float,
+        func: Callable[[], Any],
+    ) -> Any:
+        """Get a fresh entry, or call `func` and store its result.
+
+        Args:
+            namespace (str): The API the response came from.
+            key (str): The key made from the endpoint and its parameters.
+            ttl (float): The number of seconds the entry is fresh for.
+            func (Callable): Fetches the JSON serialisable response.
+
+        Returns:
+            Any: The cached or fetched response.
+
+        """
+        entry = self.get(namespace, key)
+        if entry is not None and not entry.is_expired(self.clock()):
+            return entry.value
+
+        value = func()
+        self.set(namespace, key, value, ttl=ttl)
+        return value
+
+    def _evict(self) -> None:
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT namespace, key, size FROM responses ORDER BY accessed_at"
+        )
+        evict = []
+        for namespace, key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evict.append((namespace, key))
+            total -= size
+
+        self._conn.executemany(
+            "DELETE FROM responses WHERE namespace = ? AND key = ?", evict
+        )
@@ -0,0 +1,60 @@
+"""High-water marks persisted between runs for the incremental sync mode.
+
+After a successful run a Calendar sync token and the time of the other
+sources are saved. The next run first asks every source whether anything
+changed since then, which costs a single small request each, and only plans
+the week again when something did.
+"""
+
+from datetime import date, datetime
+from pathlib import Path
+
+from pydantic import AwareDatetime, BaseModel, ValidationError
+
+from harvest_auto_timesheet.util import write_atomic
+
+
+class Checkpoint(BaseModel):
+    week_start: date  # the week the marks apply to
+    calendar_sync_token: str  # lists the calendar events changed since
+    incidents_updated: AwareDatetime  # PagerDuty logs after this are new
+    harvest_updated: AwareDatetime  # Harvest entries updated after this changed
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Checkpoint | None":
+        """Load the checkpoint, or None if there isn't a valid one."""
+        try:
+            return cls.model_validate_json(Path(path).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValidationError):
+            return None
+
+    def save(self, path: str | Path) -> None:
+        """Save the checkpoint, replacing the previous one atomically."""
+        write_atomic(path, self.model_dump_json(indent=2))
+
+    def is_for_week(self, week_start: date) -> bool:
+        """Check if the checkpoint was saved for the given week."""
+        return self.week_start == week_start
+
+    @classmethod
+    def create(
+        cls,
+        week_start: date,
+        calendar_sync_token: str,
+        started_at: datetime,
+        finished_at: datetime,
+    ) -> "Checkpoint":
+        """Create the checkpoint for a run.
+
+        The sync token must be requested before the events are read, and the
+        PagerDuty mark uses the start of the run, as anything changed while the
+        run was reading may have been missed. Harvest uses the end of the run
+        so the entries written by the run itself are not seen as changes next
+        time.
+        """
+        return cls(
+            week_start=week_start,
+            calendar_sync_token=calendar_sync_token,
+            incidents_updated=started_at,
+            harvest_updated=finished_at,
+        )
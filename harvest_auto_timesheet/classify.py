@@ -0,0 +1,207 @@
+r"""Rules mapping calendar events and incidents to a project and task.
+
+The rules are read from a local JSON file, checked in order, and the first
+rule whose conditions all match books the event or incident, for example:
+
+    [
+        {"keywords": ["standup", "retro"], "project_id": 1, "task_id": 2},
+        {"pattern": "^interview\\b", "organizer": "hr@example.com",
+         "project_id": 1, "task_id": 3},
+        {"color_id": "11", "project_id": 4, "task_id": 5},
+        {"source": "incident", "keywords": ["database"],
+         "project_id": 6, "task_id": 7}
+    ]
+
+Without a rule matching, events are internal meetings and incidents are on
+call time. The keywords and patterns of all the rules are compiled into a
+single alternation regex, so a summary is scanned once however many rules
+there are, and the rules matching a summary are cached.
+"""
+
+import functools
+import re
+from collections.abc import Iterable
+from enum import StrEnum
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter, field_validator
+
+if TYPE_CHECKING:
+    # the classifier is loaded by the context, before the API clients
+    from harvest_auto_timesheet.gcal import CalendarEvent
+    from harvest_auto_timesheet.pagerd import Incident
+
+SUMMARY_CACHE_SIZE = 4096
+
+Task = tuple[int, int]  # project ID, task ID
+
+
+class Source(StrEnum):
+    EVENT = "event"
+    INCIDENT = "incident"
+
+
+class Rule(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    project_id: int
+    task_id: int
+    source: Source = Source.EVENT
+    # the summary contains any of the keywords or matches the pattern, both
+    # ignoring case, patterns can't have groups as they are combined
+    keywords: list[str] = []
+    pattern: str | None = None
+    # the other conditions that are set must all match too, the emails
+    # ignoring case and any of the attendees being enough
+    attendees: list[str] = []
+    organizer: str | None = None
+    color_id: str | None = None
+
+    @field_validator("pattern")
+    @classmethod
+    def _check_pattern(cls, pattern: str | None) -> str | None:
+        if pattern is None:
+            return None
+        try:
+            # wrapped as when combined, where global flags are not allowed
+            compiled = re.compile(f"(?:{pattern})")
+        except re.error as e:
+            msg = f"invalid pattern {pattern!r}: {e}"
+            raise ValueError(msg) from e
+        # the group names and numbers change once the patterns of all the
+        # rules are combined, and backreferences need a group to refer to
+        if compiled.groups:
+            msg = (
+                f"invalid pattern {pattern!r}: groups and backreferences are not "
+                "supported, use non-capturing groups (?:...) instead"
+            )
+            raise ValueError(msg)
+        return pattern
+
+    @property
+    def task(self) -> Task:
+        return self.project_id, self.task_id
+
+    def has_text(self) -> bool:
+        """Check if the rule has conditions on the summary."""
+        return bool(self.keywords) or self.pattern is not None
+
+    def get_regex(self) -> str:
+        """Get the regex matching the keywords or the pattern of the rule."""
+        alternatives = [re.escape(keyword) for keyword in self.keywords]
+        if self.pattern is not None:
+            alternatives.append(f"(?:{self.pattern})")
+        return "|".join(alternatives)
+
+
+_RULES_ADAPTER = TypeAdapter(list[Rule])
+
+
+class Classifier:
+    """Thread-safe matcher of events and incidents against a list of rules."""
+
+    def __init__(self, rules: Iterable[Rule] = ()) -> None:
+        self.rules = list(rules)
+        self._regexes = {source: _compile(self.rules, source) for source in Source}
+        self._rule_regexes = {
+            index: re.compile(rule.get_regex(), re.IGNORECASE)
+            for index, rule in enumerate(self.rules)
+            if rule.has_text()
+        }
+        self._attendees = [
+            {email.lower() for email in rule.attendees} for rule in self.rules
+        ]
+        # lru_cache is thread-safe, and a cache per classifier is dropped with it
+        self._find_text_rules = functools.lru_cache(maxsize=SUMMARY_CACHE_SIZE)(
+            self._scan
+        )
+
+    @classmethod
+    def from_file(cls, path: str | Path | None) -> "Classifier":
+        """Load the rules from a JSON file, or none without a path."""
+        if path is None:
+            return cls()
+        return cls(_RULES_ADAPTER.validate_json(Path(path).read_bytes()))
+
+    def classify_event(self, event: "CalendarEvent") -> Task | None:
+        """Get the project and task of the first rule matching an event."""
+        attendees = {
+            attendee.email.lower() for attendee in event.attendees if attendee.email
+        }
+        organizer = event.organizer.email if event.organizer else None
+        for index in self._get_text_matches(Source.EVENT, event.summary):
+            rule = self.rules[index]
+            if (
+                (not rule.attendees or attendees & self._attendees[index])
+                and (
+                    rule.organizer is None or _is_same_email(rule.organizer, organizer)
+                )
+                and (rule.color_id is None or rule.color_id == event.color_id)
+            ):
+                return rule.task
+        return None
+
+    def classify_incident(self, incident: "Incident") -> Task | None:
+        """Get the project and task of the first rule matching an incident."""
+        for index in self._get_text_matches(Source.INCIDENT, incident.summary):
+            rule = self.rules[index]
+            # incidents have no attendees, organizer or colour
+            if not rule.attendees and rule.organizer is None and rule.color_id is None:
+                return rule.task
+        return None
+
+    def _get_text_matches(self, source: Source, text: str) -> Iterable[int]:
+        """Get the rules of a source matching a summary, in order.
+
+        At each position of the summary the combined regex only reports the
+        first rule matching there, so a rule not reported is known not to
+        match only when it comes before the first rule reported. The rules
+        after it are only searched on their own when an earlier rule is
+        rejected by its other conditions.
+        """
+        found = self._find_text_rules(source, text)
+        first = min(found, default=len(self.rules))
+        for index, rule in enumerate(self.rules):
+            if rule.source != source:
+                continue
+            is_match = (
+                not rule.has_text()
+                or index in found
+                or (index > first and self._rule_regexes[index].search(text))
+            )
+            if is_match:
+                yield index
+
+    def _scan(self, source: Source, text: str) -> frozenset[int]:
+        regex = self._regexes[source]
+        if regex is None:
+            return frozenset()
+        return frozenset(
+            int(match.lastgroup[1:])
+            for match in regex.finditer(text)
+            if match.lastgroup is not None
+        )
+
+
+def _compile(rules: list[Rule], source: Source) -> re.Pattern[str] | None:
+    """Compile the text conditions of the rules of a source into one regex.
+
+    Each rule is a named group in a lookahead, so every position of the text
+    is tried and the group matched tells which rule it is.
+    """
+    groups = [
+        f"(?P<r{index}>{rule.get_regex()})"
+        for index, rule in enumerate(rules)
+        if rule.source == source and rule.has_text()
+    ]
+    if not groups:
+        return None
+    return re.compile(f"(?=(?:{'|'.join(groups)}))", re.IGNORECASE)
+
+
+def _is_same_email(email: str, other: str | None) -> bool:
+    return other is not None and email.lower() == other.lower()
+
+
+DEFAULT_CLASSIFIER = Classifier()
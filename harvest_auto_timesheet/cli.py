@@ -0,0 +1,324 @@
+import argparse
+import asyncio
+import os
+from collections.abc import Callable, Sequence
+from datetime import date
+from enum import IntEnum
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from harvest_auto_timesheet.context import Context
+from harvest_auto_timesheet.harvest import AsyncHarvest
+from harvest_auto_timesheet.notes import SAVE_TIMEOUT
+from harvest_auto_timesheet.tasks import ProjectEnum, TaskEnum
+from harvest_auto_timesheet.util import get_end_of_week, get_start_of_week
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="harvest_auto_timesheet")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--dry-run",
+        type=Path,
+        metavar="PLAN",
+        help="save the plan to a JSON or NDJSON file instead of writing to Harvest",
+    )
+    mode.add_argument(
+        "--apply",
+        type=Path,
+        metavar="PLAN",
+        help="apply a plan saved by a dry run",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="delete the generated entries no longer wanted, like cancelled meetings",
+    )
+    parser.add_argument(
+        "--pagerduty-workers",
+        type=_parse_positive_int,
+        metavar="N",
+        help="the incident logs fetched from PagerDuty at the same time",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    fleet_parser = subparsers.add_parser(
+        "fleet", help="run the schedule for every user of a roster"
+    )
+    fleet_parser.add_argument("roster", type=Path, help="the JSON roster file")
+    fleet_parser.add_argument(
+        "--workers",
+        type=_parse_positive_int,
+        help="the number of users processed at the same time",
+    )
+
+    delete_parser = subparsers.add_parser(
+        "delete", help="delete the time entries matching the filters"
+    )
+    delete_parser.add_argument(
+        "--from",
+        dest="from_date",
+        type=date.fromisoformat,
+        default=get_start_of_week(),
+        help="the first day to delete, the start of this week by default",
+    )
+    delete_parser.add_argument(
+        "--to",
+        dest="to_date",
+        type=date.fromisoformat,
+        default=get_end_of_week(),
+        help="the last day to delete, the end of this week by default",
+    )
+    delete_parser.add_argument(
+        "--project",
+        dest="projects",
+        type=_parse_enum(ProjectEnum),
+        action="append",
+        default=[],
+        help="a project name from ProjectEnum or an ID, can be repeated",
+    )
+    delete_parser.add_argument(
+        "--task",
+        dest="tasks",
+        type=_parse_enum(TaskEnum),
+        action="append",
+        default=[],
+        help="a task name from TaskEnum or an ID, can be repeated",
+    )
+    delete_parser.add_argument(
+        "--user",
+        dest="users",
+        type=int,
+        action="append",
+        default=[],
+        help="a Harvest user ID, can be repeated",
+    )
+    delete_parser.add_argument(
+        "--generated",
+        action="store_true",
+        help="only delete the entries created by this tool",
+    )
+    delete_parser.add_argument(
+        "--notes-contains", help="only delete the entries with this in their notes"
+    )
+    delete_parser.add_argument(
+        "--dry-run",
+        dest="delete_dry_run",
+        action="store_true",
+        help="only list the entries that would be deleted",
+    )
+
+    backfill_parser = subparsers.add_parser(
+        "backfill", help="fill the timesheets of the weeks in a date range"
+    )
+    backfill_parser.add_argument(
+        "--from",
+        dest="from_date",
+        type=date.fromisoformat,
+        required=True,
+        help="the first day to fill",
+    )
+    backfill_parser.add_argument(
+        "--to",
+        dest="to_date",
+        type=date.fromisoformat,
+        default=get_end_of_week(),
+        help="the last day to fill, the end of this week by default",
+    )
+    backfill_parser.add_argument(
+        "--dry-run",
+        dest="backfill_dry_run",
+        action="store_true",
+        help="only plan the weeks, without writing to Harvest",
+    )
+
+    return parser
+
+
+def _parse_enum(enum: type[IntEnum]) -> Callable[[str], int]:
+    """Parse an enum member by its name, case-insensitively, or a raw ID."""
+
+    def parse(value: str) -> int:
+        if value.isdigit():
+            return int(value)
+        try:
+            return enum[value.upper()].value
+        except KeyError:
+            names = ", ".join(member.name for member in enum)
+            msg = f"unknown {enum.__name__} {value!r}, expected one of: {names}"
+            raise argparse.ArgumentTypeError(msg) from None
+
+    return parse
+
+
+def _parse_positive_int(value: str) -> int:
+    """Parse a number of workers, which a thread pool needs at least one of."""
+    if not value.isdigit() or int(value) < 1:
+        msg = f"expected a positive integer, got {value!r}"
+        raise argparse.ArgumentTypeError(msg)
+    return int(value)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    # the subcommands have their own dry runs, and would ignore these flags
+    if args.command is not None and (args.dry_run or args.apply):
+        parser.error(f"--dry-run and --apply can't be used with {args.command}")
+    if args.command == "delete" and (args.prune or args.pagerduty_workers is not None):
+        parser.error("--prune and --pagerduty-workers can't be used with delete")
+    load_dotenv(override=True)
+
+    # the integrations are only imported by the command using them
+    if args.command == "fleet":
+        from harvest_auto_timesheet.fleet import Roster, print_summary, run_fleet
+
+        roster = Roster.load(args.roster)
+        if args.pagerduty_workers is not None:
+            # the users setting their own still use theirs
+            roster.defaults.pagerduty_max_workers = args.pagerduty_workers
+        report = (
+            run_fleet(roster, max_workers=args.workers, prune=args.prune)
+            if args.workers is not None
+            else run_fleet(roster, prune=args.prune)
+        )
+        print_summary(report)
+        return 0 if all(result.ok for result in report.results) else 1
+
+    if args.command == "delete":
+        return _delete(args)
+    if args.command == "backfill":
+        return _backfill(args)
+
+    from harvest_auto_timesheet.schedule import apply_plan, run_schedule_async
+
+    context = _get_context(args)
+    if args.apply is not None:
+
+        async def apply() -> None:
+            async with context.async_harvest as harvest:
+                await apply_plan(
+                    harvest=harvest, path=args.apply, write_index=context.write_index
+                )
+
+        asyncio.run(apply())
+        return 0
+
+    # the connections are closed once the schedule is done
+    async def run() -> None:
+        async with context.async_harvest as harvest:
+            await run_schedule_async(
+                harvest=harvest,
+                credentials=context.credentials,
+                calendar_id=context.calendar_id,
+                pagerduty_client=context.pagerduty_client,
+                pagerduty_user_id=context.pagerduty_user_id,
+                cache=context.cache,
+                checkpoint_path=Path(context.checkpoint_path)
+                if context.checkpoint_path
+                else None,
+                pagerduty_rate_limiter=context.pagerduty_rate_limiter,
+                pagerduty_max_workers=context.pagerduty_max_workers,
+                holidays=context.holidays,
+                allocation=context.allocation,
+                classifier=context.classifier,
+                prune=args.prune,
+                write_index=context.write_index,
+                instrumentation=context.instrumentation,
+                dry_run_path=args.dry_run,
+            )
+
+    # fetch the notes while the sources are read so filling never waits
+    context.note_pool.refill_in_background()
+    try:
+        asyncio.run(run())
+    finally:
+        context.note_pool.wait(timeout=SAVE_TIMEOUT)
+        context.save_metrics()
+    return 0
+
+
+def _get_context(args: argparse.Namespace) -> Context:
+    if args.pagerduty_workers is None:
+        return Context()
+    return Context(pagerduty_max_workers=args.pagerduty_workers)
+
+
+def _delete(args: argparse.Namespace) -> int:
+    from harvest_auto_timesheet.delete import (
+        DeleteFilter,
+        DeleteResult,
+        console,
+        delete_time_entries,
+    )
+
+    entry_filter = DeleteFilter(
+        from_date=args.from_date,
+        to_date=args.to_date,
+        project_ids=frozenset(args.projects),
+        task_ids=frozenset(args.tasks),
+        user_ids=frozenset(args.users),
+        only_generated=args.generated,
+        notes_contains=args.notes_contains,
+    )
+
+    # only Harvest is needed, not the calendar and PagerDuty of the context
+    async def delete() -> DeleteResult:
+        async with AsyncHarvest(
+            harvest_account_id=os.environ["HARVEST_ACCOUNT_ID"],
+            harvest_access_token=os.environ["HARVEST_ACCESS_TOKEN"],
+        ) as harvest:
+            return await delete_time_entries(
+                harvest, entry_filter, dry_run=args.delete_dry_run
+            )
+
+    result = asyncio.run(delete())
+
+    verb = "would be deleted" if args.delete_dry_run else "deleted"
+    count = result.matched if args.delete_dry_run else result.deleted
+    console.print(
+        f"{count} of {result.matched} time entries {verb} "
+        f"from {entry_filter.from_date} to {entry_filter.to_date}"
+    )
+    return 1 if result.failed else 0
+
+
+def _backfill(args: argparse.Namespace) -> int:
+    from harvest_auto_timesheet.backfill import WeekResult, console, run_backfill
+
+    context = _get_context(args)
+    context.note_pool.refill_in_background()
+
+    async def run() -> list[WeekResult]:
+        async with context.async_harvest as harvest:
+            return await run_backfill(
+                harvest=harvest,
+                credentials=context.credentials,
+                calendar_id=context.calendar_id,
+                pagerduty_client=context.pagerduty_client,
+                pagerduty_user_id=context.pagerduty_user_id,
+                from_date=args.from_date,
+                to_date=args.to_date,
+                cache=context.cache,
+                pagerduty_rate_limiter=context.pagerduty_rate_limiter,
+                pagerduty_max_workers=context.pagerduty_max_workers,
+                holidays=context.holidays,
+                allocation=context.allocation,
+                classifier=context.classifier,
+                prune=args.prune,
+                write_index=context.write_index,
+                dry_run=args.backfill_dry_run,
+            )
+
+    results = asyncio.run(run())
+    context.note_pool.wait(timeout=SAVE_TIMEOUT)
+    context.save_metrics()
+
+    failed = [result.week_start for result in results if not result.ok]
+    console.print(
+        f"{len(results) - len(failed)} of {len(results)} weeks filled"
+        + (f", failed: {', '.join(map(str, failed))}" if failed else "")
+    )
+    console.print(f"Harvest requests: {context.async_harvest.stats}")
+    return 1 if failed else 0
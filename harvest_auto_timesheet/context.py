@@ -1,12 +1,35 @@
 import base64
+import functools
 import json
 import os
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
-import pagerduty
-from google.oauth2.service_account import Credentials
+from harvest_auto_timesheet.cache import ResponseCache
+from harvest_auto_timesheet.classify import Classifier
+from harvest_auto_timesheet.dedup import WriteIndex
+from harvest_auto_timesheet.harvest import AsyncHarvest, Harvest
+from harvest_auto_timesheet.harvest import (
+    get_rate_limiter as get_harvest_rate_limiter,
+)
+from harvest_auto_timesheet.holiday import (
+    DEFAULT_COUNTRY,
+    DEFAULT_SUBDIV,
+    HolidayIndex,
+)
+from harvest_auto_timesheet.instrumentation import Instrumentation
+from harvest_auto_timesheet.notes import NotePool, set_default_pool
+from harvest_auto_timesheet.pagerd import MAX_WORKERS as PAGERDUTY_MAX_WORKERS
+from harvest_auto_timesheet.pagerd import (
+    get_rate_limiter as get_pagerduty_rate_limiter,
+)
+from harvest_auto_timesheet.ratelimit import TokenBucket
 
-from harvest_auto_timesheet.harvest import Harvest
+if TYPE_CHECKING:
+    import pagerduty
+    from google.oauth2.service_account import Credentials
+
+    from harvest_auto_timesheet.allocation import Allocation
 
 
 @dataclass
@@ -35,32 +58,159 @@ class Context:
         default_factory=lambda: os.environ["PAGERDUTY_API_TOKEN"]
     )
 
-    credentials: Credentials = field(init=False)
-    harvest: Harvest = field(init=False)
-    pagerduty_client: pagerduty.RestApiV2Client = field(init=False)
+    harvest_max_concurrency: int = field(
+        default_factory=lambda: int(os.getenv("HARVEST_MAX_CONCURRENCY", "10"))
+    )
+    # the incident logs fetched from PagerDuty at the same time
+    pagerduty_max_workers: int = field(
+        default_factory=lambda: int(
+            os.getenv("PAGERDUTY_MAX_WORKERS", str(PAGERDUTY_MAX_WORKERS))
+        )
+    )
+
+    # responses are only cached when a path is set
+    cache_path: str | None = field(default_factory=lambda: os.getenv("CACHE_PATH"))
+
+    # runs are incremental when a checkpoint path is set
+    checkpoint_path: str | None = field(
+        default_factory=lambda: os.getenv("CHECKPOINT_PATH")
+    )
+
+    # generated entries already written are skipped when a path is set
+    write_index_path: str | None = field(
+        default_factory=lambda: os.getenv("WRITE_INDEX_PATH")
+    )
+
+    # notes for the filler entries are kept between runs when a path is set
+    notes_path: str | None = field(default_factory=lambda: os.getenv("NOTES_PATH"))
+
+    # public holidays of the region, plus company days off and leave from a file
+    holiday_country: str = field(
+        default_factory=lambda: os.getenv("HOLIDAY_COUNTRY", DEFAULT_COUNTRY)
+    )
+    holiday_subdiv: str | None = field(
+        default_factory=lambda: os.getenv("HOLIDAY_SUBDIV", DEFAULT_SUBDIV)
+    )
+    days_off_path: str | None = field(
+        default_factory=lambda: os.getenv("DAYS_OFF_PATH")
+    )
+
+    # the hours to book each day and the filler split, 8 hours a weekday without it
+    allocation_path: str | None = field(
+        default_factory=lambda: os.getenv("ALLOCATION_PATH")
+    )
+
+    # rules booking events and incidents to other projects and tasks
+    classification_path: str | None = field(
+        default_factory=lambda: os.getenv("CLASSIFICATION_PATH")
+    )
+
+    # the phase and request timings of a run are saved when the paths are set
+    metrics_path: str | None = field(default_factory=lambda: os.getenv("METRICS_PATH"))
+    prometheus_textfile_path: str | None = field(
+        default_factory=lambda: os.getenv("PROMETHEUS_TEXTFILE_PATH")
+    )
+
+    # contexts using the same tokens can share limiters to share the quotas
+    harvest_rate_limiter: TokenBucket = field(default_factory=get_harvest_rate_limiter)
+    pagerduty_rate_limiter: TokenBucket = field(
+        default_factory=get_pagerduty_rate_limiter
+    )
+
+    # the clients are only built, and their libraries only imported, when used
+    @functools.cached_property
+    def credentials(self) -> "Credentials":
+        from google.oauth2.service_account import Credentials
 
-    def __post_init__(self) -> None:
         scopes = ["https://www.googleapis.com/auth/calendar.readonly"]
         # if the service_account_json_b64 is set use that instead of the file
         if self.service_account_json_b64:
             service_account_json = json.loads(
                 base64.b64decode(self.service_account_json_b64)
             )
-            self.credentials = Credentials.from_service_account_info(  # type: ignore[no-untyped-call]
+            return Credentials.from_service_account_info(  # type: ignore[no-untyped-call,no-any-return]
                 service_account_json,
                 scopes=scopes,
             )
-        else:
-            self.credentials = Credentials.from_service_account_file(  # type: ignore[no-untyped-call]
-                self.service_account_file,
-                scopes=scopes,
-            )
 
-        self.harvest = Harvest(
+        return Credentials.from_service_account_file(  # type: ignore[no-untyped-call,no-any-return]
+            self.service_account_file,
+            scopes=scopes,
+        )
+
+    @functools.cached_property
+    def instrumentation(self) -> Instrumentation:
+        return Instrumentation()
+
+    @functools.cached_property
+    def cache(self) -> ResponseCache | None:
+        return ResponseCache(self.cache_path) if self.cache_path else None
+
+    @functools.cached_property
+    def write_index(self) -> WriteIndex | None:
+        return WriteIndex(self.write_index_path) if self.write_index_path else None
+
+    @functools.cached_property
+    def note_pool(self) -> NotePool:
+        note_pool = NotePool(self.notes_path, instrumentation=self.instrumentation)
+        set_default_pool(note_pool)
+        return note_pool
+
+    @functools.cached_property
+    def holidays(self) -> HolidayIndex:
+        return HolidayIndex.from_file(
+            self.days_off_path,
+            country=self.holiday_country,
+            subdiv=self.holiday_subdiv,
+        )
+
+    @functools.cached_property
+    def allocation(self) -> "Allocation":
+        from harvest_auto_timesheet.allocation import Allocation
+
+        return Allocation.from_file(self.allocation_path)
+
+    @functools.cached_property
+    def classifier(self) -> Classifier:
+        return Classifier.from_file(self.classification_path)
+
+    # both clients use the same access token so they share the same quota
+    @functools.cached_property
+    def harvest(self) -> Harvest:
+        harvest = Harvest(
             harvest_account_id=self.harvest_account_id,
             harvest_access_token=self.harvest_access_token,
+            rate_limiter=self.harvest_rate_limiter,
+            cache=self.cache,
         )
+        self.instrumentation.instrument_httpx(harvest.client, "harvest")
+        return harvest
 
-        self.pagerduty_client = pagerduty.RestApiV2Client(
-            api_key=self.pagerduty_api_key,
+    @functools.cached_property
+    def async_harvest(self) -> AsyncHarvest:
+        async_harvest = AsyncHarvest(
+            harvest_account_id=self.harvest_account_id,
+            harvest_access_token=self.harvest_access_token,
+            max_concurrency=self.harvest_max_concurrency,
+            max_connections=self.harvest_max_concurrency,
+            max_keepalive_connections=self.harvest_max_concurrency,
+            rate_limiter=self.harvest_rate_limiter,
+            cache=self.cache,
         )
+        self.instrumentation.instrument_httpx(async_harvest.client, "harvest")
+        return async_harvest
+
+    @functools.cached_property
+    def pagerduty_client(self) -> "pagerduty.RestApiV2Client":
+        import pagerduty
+
+        client = pagerduty.RestApiV2Client(api_key=self.pagerduty_api_key)
+        self.instrumentation.instrument_requests(client, "pagerduty")
+        return client
+
+    def save_metrics(self) -> None:
+        """Save the timings of the run to the paths that are set, if any."""
+        if self.metrics_path:
+            self.instrumentation.save_json(self.metrics_path)
+        if self.prometheus_textfile_path:
+            self.instrumentation.save_textfile(self.prometheus_textfile_path)
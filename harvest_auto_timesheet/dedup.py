@@ -0,0 +1,89 @@
+"""Local index of the generated time entries already written to Harvest.
+
+Every generated entry has a stable key in its external reference, scoped by
+the Harvest user as the keys repeat across users. After each successful
+write the key is saved with the ID of the Harvest entry and a digest of what
+was written. Executing the same plan again, for example after a run that
+failed halfway or when applying a saved plan twice, then skips the entries
+already written and turns the creates of changed entries into updates
+instead of posting duplicates.
+
+The index only recovers from crashes: the entries fetched from Harvest are
+the source of truth, and a record whose entry is no longer there, deleted by
+hand or by the `delete` subcommand, is dropped and the entry created again.
+"""
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from harvest_auto_timesheet.harvest import NewTimeEntry
+from harvest_auto_timesheet.util import write_atomic
+
+
+class IndexedEntry(BaseModel):
+    time_entry_id: int
+    digest: str
+
+
+_INDEX_ADAPTER = TypeAdapter(dict[str, IndexedEntry])
+
+
+def get_digest(entry: NewTimeEntry) -> str:
+    """Get a short digest of the values written for a time entry."""
+    raw = json.dumps(entry.to_payload(), sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class WriteIndex:
+    """Thread-safe map of external reference IDs to the entries written."""
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path) if path is not None else None
+        self._entries: dict[str, IndexedEntry] = {}
+        self._lock = threading.Lock()
+
+        if self.path is not None:
+            try:
+                self._entries = _INDEX_ADAPTER.validate_json(self.path.read_bytes())
+            except (FileNotFoundError, ValidationError):
+                self._entries = {}
+
+    def get(self, user_id: int, key: str) -> IndexedEntry | None:
+        """Get the entry written for a user's key, or None if it wasn't written."""
+        with self._lock:
+            return self._entries.get(_get_key(user_id, key))
+
+    def record(
+        self, user_id: int, key: str, time_entry_id: int, entry: NewTimeEntry
+    ) -> None:
+        """Record that an entry was written for a user."""
+        with self._lock:
+            self._entries[_get_key(user_id, key)] = IndexedEntry(
+                time_entry_id=time_entry_id, digest=get_digest(entry)
+            )
+
+    def forget(self, time_entry_id: int) -> None:
+        """Forget a deleted entry."""
+        with self._lock:
+            self._entries = {
+                key: indexed
+                for key, indexed in self._entries.items()
+                if indexed.time_entry_id != time_entry_id
+            }
+
+    def save(self) -> None:
+        """Save the index, replacing the previous file atomically."""
+        if self.path is None:
+            return
+
+        # the lock is held while writing as the users of a fleet share an index
+        with self._lock:
+            write_atomic(self.path, _INDEX_ADAPTER.dump_json(self._entries))
+
+
+def _get_key(user_id: int, key: str) -> str:
+    return f"{user_id}:{key}"
@@ -0,0 +1,120 @@
+"""Delete the time entries matching a filter, concurrently.
+
+The dates, and a single project, task or user, are filtered by the Harvest
+API, the rest of the filter as the entries are streamed page by page. Only
+the IDs of the matching entries are kept, as deleting while paginating would
+shift the remaining pages and skip entries. The deletes are then all sent at
+once, bounded by the client's concurrency and rate limiter.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from datetime import date
+
+from rich.console import Console
+from rich.progress import Progress
+
+from harvest_auto_timesheet.harvest import AsyncHarvest, TimeEntry
+
+console = Console()
+
+
+@dataclass(frozen=True)
+class DeleteFilter:
+    """Which time entries to delete, every set condition must match."""
+
+    from_date: date
+    to_date: date
+    project_ids: frozenset[int] = frozenset()
+    task_ids: frozenset[int] = frozenset()
+    user_ids: frozenset[int] = frozenset()
+    only_generated: bool = False  # only the entries created by this tool
+    notes_contains: str | None = None
+
+    def matches(self, entry: TimeEntry) -> bool:
+        """Check if a time entry from the Harvest API matches the filter."""
+        if self.project_ids and entry.project_id not in self.project_ids:
+            return False
+        if self.task_ids and entry.task_id not in self.task_ids:
+            return False
+        if self.user_ids and entry.user_id not in self.user_ids:
+            return False
+        if self.only_generated and not entry.is_generated:
+            return False
+        return self.notes_contains is None or self.notes_contains in (entry.notes or "")
+
+
+@dataclass
+class DeleteResult:
+    matched: int = 0
+    deleted: int = 0
+    failed: list[int] = field(default_factory=list)  # the IDs that failed
+
+
+async def find_time_entries(
+    harvest: AsyncHarvest, entry_filter: DeleteFilter
+) -> AsyncIterator[TimeEntry]:
+    """Stream every time entry matching the filter."""
+    async for entry in harvest.iter_time_entries(
+        from_date=entry_filter.from_date,
+        to_date=entry_filter.to_date,
+        project_id=_get_single(entry_filter.project_ids),
+        task_id=_get_single(entry_filter.task_ids),
+        user_id=_get_single(entry_filter.user_ids),
+    ):
+        if entry_filter.matches(entry):
+            yield entry
+
+
+async def delete_time_entries(
+    harvest: AsyncHarvest,
+    entry_filter: DeleteFilter,
+    *,
+    dry_run: bool = False,
+) -> DeleteResult:
+    """Delete the time entries matching a filter, showing the progress.
+
+    Args:
+        harvest (AsyncHarvest): The client to use for the Harvest API.
+        entry_filter (DeleteFilter): Which entries to delete.
+        dry_run (bool): Only list the entries that would be deleted.
+
+    Returns:
+        DeleteResult: The number of entries matched and deleted, and the IDs
+            of the entries that could not be deleted.
+
+    """
+    time_entry_ids: list[int] = []
+    async for entry in find_time_entries(harvest, entry_filter):
+        time_entry_ids.append(entry.id)
+        if dry_run:
+            console.print(f"Would delete time entry {entry.id} ({entry.spent_date})")
+
+    result = DeleteResult(matched=len(time_entry_ids))
+    if dry_run:
+        return result
+
+    with Progress(console=console) as progress:
+        task = progress.add_task("Deleting time entries", total=len(time_entry_ids))
+
+        async def delete(time_entry_id: int) -> None:
+            try:
+                await harvest.delete_time_entry(time_entry_id=time_entry_id)
+            except Exception as e:  # noqa: BLE001
+                console.print(f"[red]Failed to delete time entry {time_entry_id}: {e}")
+                result.failed.append(time_entry_id)
+            else:
+                result.deleted += 1
+            progress.advance(task)
+
+        await asyncio.gather(
+            *(delete(time_entry_id) for time_entry_id in time_entry_ids)
+        )
+
+    return result
+
+
+def _get_single(ids: frozenset[int]) -> int | None:
+    # the API can only filter by a single project, task or user
+    return next(iter(ids)) if len(ids) == 1 else None
@@ -0,0 +1,128 @@
+"""Index of the time entries already in Harvest, by day and by task.
+
+The entries are indexed by user and day, with running totals of their hours,
+and by project, task and day. Planning reads the entries of a day and the
+hours already booked without scanning every entry of the range, and the
+index is updated in place as entries are created, updated and deleted, so
+the totals stay current while a plan is executed. An admin token reads the
+entries of every user, so the lookups can be limited to a single user.
+"""
+
+import threading
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from datetime import date
+
+from harvest_auto_timesheet.harvest import TimeEntry
+
+_DayKey = tuple[int, date]  # user ID, spent date
+_TaskKey = tuple[int, int, date]  # project ID, task ID, spent date
+
+
+class TimeEntryIndex:
+    """Thread-safe index of time entries with running totals of their hours."""
+
+    def __init__(self, entries: Iterable[TimeEntry] = ()) -> None:
+        self._entries: dict[int, TimeEntry] = {}
+        self._by_day: dict[_DayKey, dict[int, TimeEntry]] = defaultdict(dict)
+        self._by_task: dict[_TaskKey, dict[int, TimeEntry]] = defaultdict(dict)
+        # the attendees of a meeting share its reference, so it is per user
+        self._by_reference: dict[str, dict[int, TimeEntry]] = defaultdict(dict)
+        self._users_by_day: dict[date, set[int]] = defaultdict(set)
+        self._day_hours: dict[_DayKey, float] = defaultdict(float)
+        self._lock = threading.Lock()
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[TimeEntry]:
+        with self._lock:
+            return iter(list(self._entries.values()))
+
+    def add(self, entry: TimeEntry) -> None:
+        """Add a time entry, replacing the previous version of an updated one."""
+        with self._lock:
+            self._remove(entry.id)
+            self._entries[entry.id] = entry
+            self._by_day[_get_day_key(entry)][entry.id] = entry
+            self._by_task[_get_task_key(entry)][entry.id] = entry
+            self._users_by_day[entry.spent_date].add(entry.user_id)
+            self._day_hours[_get_day_key(entry)] += entry.hours
+            if entry.external_reference is not None:
+                self._by_reference[entry.external_reference.id][entry.user_id] = entry
+
+    def remove(self, time_entry_id: int) -> None:
+        """Remove a deleted time entry, if it is in the index."""
+        with self._lock:
+            self._remove(time_entry_id)
+
+    def get(self, time_entry_id: int) -> TimeEntry | None:
+        """Get a time entry by its ID."""
+        with self._lock:
+            return self._entries.get(time_entry_id)
+
+    def find(
+        self, external_reference_id: str, user_id: int | None = None
+    ) -> TimeEntry | None:
+        """Find a time entry by the ID of its external reference and its user."""
+        with self._lock:
+            entries = self._by_reference.get(external_reference_id, {})
+            if user_id is not None:
+                return entries.get(user_id)
+            return next(iter(entries.values()), None)
+
+    def get_day(self, day: date, user_id: int | None = None) -> list[TimeEntry]:
+        """Get the time entries of a day, of a single user or of everyone."""
+        with self._lock:
+            return [
+                entry
+                for key in self._get_day_keys(day, user_id)
+                for entry in self._by_day.get(key, {}).values()
+            ]
+
+    def get_hours(self, day: date, user_id: int | None = None) -> float:
+        """Get the hours booked on a day, by a single user or by everyone."""
+        with self._lock:
+            return sum(
+                self._day_hours.get(key, 0.0)
+                for key in self._get_day_keys(day, user_id)
+            )
+
+    def get_task(
+        self, project_id: int, task_id: int, day: date, user_id: int | None = None
+    ) -> list[TimeEntry]:
+        """Get the time entries of a project and task on a day."""
+        with self._lock:
+            return [
+                entry
+                for entry in self._by_task.get((project_id, task_id, day), {}).values()
+                if user_id is None or entry.user_id == user_id
+            ]
+
+    def _get_day_keys(self, day: date, user_id: int | None) -> list[_DayKey]:
+        if user_id is not None:
+            return [(user_id, day)]
+        return [(user_id, day) for user_id in self._users_by_day.get(day, ())]
+
+    def _remove(self, time_entry_id: int) -> None:
+        if (entry := self._entries.pop(time_entry_id, None)) is None:
+            return
+
+        day_key, task_key = _get_day_key(entry), _get_task_key(entry)
+        del self._by_day[day_key][entry.id]
+        del self._by_task[task_key][entry.id]
+        self._day_hours[day_key] -= entry.hours
+        if entry.external_reference is not None:
+            entries = self._by_reference[entry.external_reference.id]
+            if entries.get(entry.user_id) is entry:
+                del entries[entry.user_id]
+
+
+def _get_day_key(entry: TimeEntry) -> _DayKey:
+    return entry.user_id, entry.spent_date
+
+
+def _get_task_key(entry: TimeEntry) -> _TaskKey:
+    return entry.project_id, entry.task_id, entry.spent_date
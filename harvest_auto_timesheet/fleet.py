@@ -0,0 +1,286 @@
+"""Run the schedule for many users at once.
+
+The users are read from a JSON roster file with optional defaults shared by
+all the users, for example:
+
+    {
+        "notes_path": "notes.json",
+        "defaults": {"harvest_account_id": "123", "service_account_file": "sa.json"},
+        "users": [
+            {
+                "name": "someone",
+                "harvest_access_token": "...",
+                "calendar_id": "someone@example.com",
+                "pagerduty_user_id": "P123",
+                "pagerduty_api_key": "..."
+            }
+        ]
+    }
+
+Anything missing from both falls back to the environment variables used by
+`Context`. Users run on a thread pool, and users sharing a Harvest access
+token or a PagerDuty API key share that token's rate limiter. The notes of
+the filler entries come from a single pool shared by all the users, kept
+between runs when `notes_path` or `NOTES_PATH` is set. A failure only
+affects its own user.
+"""
+
+import os
+import statistics
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, PositiveInt
+from rich.console import Console
+from rich.table import Table
+
+from harvest_auto_timesheet.context import Context
+from harvest_auto_timesheet.dedup import WriteIndex
+from harvest_auto_timesheet.harvest import (
+    get_rate_limiter as get_harvest_rate_limiter,
+)
+from harvest_auto_timesheet.notes import SAVE_TIMEOUT, NotePool, set_default_pool
+from harvest_auto_timesheet.pagerd import (
+    get_rate_limiter as get_pagerduty_rate_limiter,
+)
+from harvest_auto_timesheet.ratelimit import RateLimitStats, TokenBucket
+from harvest_auto_timesheet.schedule import run_schedule
+
+console = Console()
+
+MAX_WORKERS = 8
+
+
+class UserConfig(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    harvest_account_id: str | None = None
+    harvest_access_token: str | None = None
+    calendar_id: str | None = None
+    service_account_file: str | None = None
+    service_account_json_b64: str | None = None
+    pagerduty_user_id: str | None = None
+    pagerduty_api_key: str | None = None
+    pagerduty_max_workers: PositiveInt | None = None
+    checkpoint_path: str | None = None
+    write_index_path: str | None = None
+    holiday_country: str | None = None
+    holiday_subdiv: str | None = None
+    days_off_path: str | None = None
+    allocation_path: str | None = None
+    classification_path: str | None = None
+
+
+class RosterUser(UserConfig):
+    name: str
+
+
+class Roster(BaseModel):
+    # the note pool is shared by the users, so it has one path for all of them
+    notes_path: str | None = None
+    defaults: UserConfig = UserConfig()
+    users: list[RosterUser]
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Roster":
+        """Load a roster from a JSON file."""
+        return cls.model_validate_json(Path(path).read_text(encoding="utf-8"))
+
+    def get_context_kwargs(self, user: RosterUser) -> dict[str, Any]:
+        """Get the `Context` arguments for a user, merged with the defaults."""
+        return {
+            **self.defaults.model_dump(exclude_none=True),
+            **user.model_dump(exclude_none=True, exclude={"name"}),
+        }
+
+
+@dataclass
+class UserResult:
+    name: str
+    duration: float
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class FleetReport:
+    results: list[UserResult]
+    duration: float
+    harvest_requests: int  # across all the Harvest tokens, including retries
+    harvest_rate_limited: int
+
+
+class _RateLimiters:
+    """Rate limiters shared by the users of the same API token."""
+
+    def __init__(self) -> None:
+        self._limiters: dict[tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, api: str, token: str, factory: Callable[[], TokenBucket]
+    ) -> TokenBucket:
+        with self._lock:
+            if (api, token) not in self._limiters:
+                self._limiters[api, token] = factory()
+            return self._limiters[api, token]
+
+    def get_stats(self, api: str) -> list[RateLimitStats]:
+        return [
+            limiter.stats
+            for (limiter_api, _), limiter in self._limiters.items()
+            if limiter_api == api
+        ]
+
+
+def _get_write_indexes(roster: Roster) -> dict[str, WriteIndex]:
+    """Get a write index per path, shared by the users of the same path.
+
+    Separate indexes on the same file would overwrite each other's records
+    when saved.
+    """
+    paths = {
+        roster.get_context_kwargs(user).get("write_index_path") for user in roster.users
+    }
+    return {path: WriteIndex(path) for path in paths if path}
+
+
+def _run_user(
+    roster: Roster,
+    user: RosterUser,
+    rate_limiters: _RateLimiters,
+    write_indexes: dict[str, WriteIndex],
+    *,
+    prune: bool = False,
+) -> UserResult:
+    """Run the schedule for a single user, catching any failure."""
+    started = time.perf_counter()
+    try:
+        kwargs = roster.get_context_kwargs(user)
+        if token := kwargs.get("harvest_access_token"):
+            kwargs["harvest_rate_limiter"] = rate_limiters.get(
+                "harvest", token, get_harvest_rate_limiter
+            )
+        if api_key := kwargs.get("pagerduty_api_key"):
+            kwargs["pagerduty_rate_limiter"] = rate_limiters.get(
+                "pagerduty", api_key, get_pagerduty_rate_limiter
+            )
+
+        context = Context(**kwargs)
+        run_schedule(
+            harvest=context.harvest,
+            credentials=context.credentials,
+            calendar_id=context.calendar_id,
+            pagerduty_client=context.pagerduty_client,
+            pagerduty_user_id=context.pagerduty_user_id,
+            cache=context.cache,
+            checkpoint_path=Path(context.checkpoint_path)
+            if context.checkpoint_path
+            else None,
+            pagerduty_rate_limiter=context.pagerduty_rate_limiter,
+            pagerduty_max_workers=context.pagerduty_max_workers,
+            holidays=context.holidays,
+            allocation=context.allocation,
+            classifier=context.classifier,
+            prune=prune,
+            write_index=write_indexes.get(context.write_index_path or ""),
+        )
+    except Exception as e:  # noqa: BLE001
+        return UserResult(
+            name=user.name,
+            duration=time.perf_counter() - started,
+            error=f"{type(e).__name__}: {e}",
+        )
+
+    return UserResult(name=user.name, duration=time.perf_counter() - started)
+
+
+def run_fleet(
+    roster: Roster, max_workers: int = MAX_WORKERS, *, prune: bool = False
+) -> FleetReport:
+    """Run the schedule for every user of the roster.
+
+    Args:
+        roster (Roster): The users to run the schedule for.
+        max_workers (int): The number of users processed at the same time.
+        prune (bool): Delete the generated entries that are no longer wanted.
+
+    Returns:
+        FleetReport: The result for each user, in the roster's order, and the
+            totals of the run.
+
+    """
+    started = time.perf_counter()
+    rate_limiters = _RateLimiters()
+    write_indexes = _get_write_indexes(roster)
+    note_pool = NotePool(roster.notes_path or os.getenv("NOTES_PATH"))
+    set_default_pool(note_pool)
+    # fetch the notes while the first users are read so filling never waits
+    note_pool.refill_in_background()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(
+                pool.map(
+                    lambda user: _run_user(
+                        roster, user, rate_limiters, write_indexes, prune=prune
+                    ),
+                    roster.users,
+                )
+            )
+    finally:
+        note_pool.wait(timeout=SAVE_TIMEOUT)
+
+    harvest_stats = rate_limiters.get_stats("harvest")
+    return FleetReport(
+        results=results,
+        duration=time.perf_counter() - started,
+        harvest_requests=sum(stats.requests for stats in harvest_stats),
+        harvest_rate_limited=sum(stats.rate_limited for stats in harvest_stats),
+    )
+
+
+def print_summary(report: FleetReport) -> None:
+    """Print a table of the results with throughput and latency stats."""
+    table = Table(title="Fleet summary")
+    table.add_column("User")
+    table.add_column("Status")
+    table.add_column("Duration (s)", justify="right")
+    table.add_column("Error")
+
+    for result in report.results:
+        table.add_row(
+            result.name,
+            "[green]ok[/green]" if result.ok else "[red]failed[/red]",
+            f"{result.duration:.2f}",
+            result.error or "",
+        )
+    console.print(table)
+
+    durations = sorted(result.duration for result in report.results)
+    succeeded = sum(result.ok for result in report.results)
+    wall_time = max(report.duration, 1e-9)
+    console.print(
+        f"{succeeded}/{len(report.results)} users succeeded in {wall_time:.2f}s "
+        f"({len(report.results) / wall_time:.2f} users/s, "
+        f"{report.harvest_requests / wall_time:.2f} Harvest requests/s, "
+        f"{report.harvest_rate_limited} rate limited)"
+    )
+    if durations:
+        console.print(
+            f"Latency per user: p50 {statistics.median(durations):.2f}s, "
+            f"p95 {_percentile(durations, 95):.2f}s, max {durations[-1]:.2f}s"
+        )
+
+
+def _percentile(sorted_values: list[float], percent: float) -> float:
+    """Get a percentile of sorted values using the nearest rank."""
+    index = max(0, round(percent / 100 * len(sorted_values)) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
@@ -1,33 +1,161 @@
+import functools
+from collections.abc import Callable, Iterator
 from datetime import date, datetime
+from http import HTTPStatus
+from typing import Any
 from zoneinfo import ZoneInfo
 
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
-from pydantic import AwareDatetime, BaseModel, Field, TypeAdapter
+from googleapiclient.errors import HttpError
+from pydantic import AwareDatetime, BaseModel, ConfigDict, Field, TypeAdapter
+from pydantic.dataclasses import dataclass
 
+from harvest_auto_timesheet.cache import ResponseCache, make_key
+from harvest_auto_timesheet.instrumentation import Instrumentation
 
-class DateTime(BaseModel):
+CACHE_NAMESPACE = "gcal"
+# the name the requests are recorded under by the instrumentation
+SERVICE = "calendar"
+# responses are revalidated with their ETag once they expire
+CACHE_TTL = 5 * 60
+
+MAX_RESULTS = 250
+MAX_SYNC_RESULTS = 2500
+# only request the fields of the events that are used to shrink the responses
+EVENT_FIELDS = (
+    "etag,nextPageToken,"
+    "items(id,status,summary,start,end,colorId,organizer(email),attendees(email))"
+)
+
+
+@dataclass(frozen=True, slots=True, config=ConfigDict(populate_by_name=True))
+class DateTime:
     date_: date | None = Field(None, alias="date")
     datetime: AwareDatetime | None = Field(None, alias="dateTime")
 
 
-class CalendarEvent(BaseModel):
+@dataclass(frozen=True, slots=True)
+class Person:
+    # rooms and other resources may not have an email
+    email: str | None = None
+
+
+@dataclass(
+    frozen=True, slots=True, kw_only=True, config=ConfigDict(populate_by_name=True)
+)
+class CalendarEvent:
+    """An event with only the fields requested in `EVENT_FIELDS`."""
+
+    id: str | None = None
     status: str
     summary: str
     start: DateTime
     end: DateTime
+    # used to classify the event, see `classify`
+    color_id: str | None = Field(None, alias="colorId")
+    organizer: Person | None = None
+    attendees: tuple[Person, ...] = ()
 
     def is_all_day(self) -> bool:
         """Check if the event is an all-day event."""
         return self.start.date_ is not None and self.start.datetime is None
 
 
-def get_calendar_events(
+_EVENTS_ADAPTER = TypeAdapter(list[CalendarEvent])
+
+
+class SyncTokenExpiredError(Exception):
+    """The sync token is no longer valid and a full sync is needed."""
+
+
+class CalendarSync(BaseModel):
+    """The events changed since a sync token was issued."""
+
+    changed_event_ids: list[str]
+    next_sync_token: str
+
+
+@functools.lru_cache(maxsize=32)
+def _get_service(creds: Credentials) -> Any:
+    """Build the Calendar service once per credentials.
+
+    Building the service loads and parses the discovery document, which is
+    much slower than the requests made with it.
+    """
+    return build("calendar", "v3", credentials=creds)
+
+
+def iter_calendar_events(  # noqa: PLR0913
     creds: Credentials,
     calendar_id: str,
     time_min: datetime,
     time_max: datetime,
     timezone: ZoneInfo | None = None,
+    *,
+    max_results: int = MAX_RESULTS,
+    cache: ResponseCache | None = None,
+    instrumentation: Instrumentation | None = None,
+) -> Iterator[CalendarEvent]:
+    """Stream events from Google Calendar, following the page tokens.
+
+    Only the fields of the events that are used are requested.
+
+    Args:
+        creds (Credentials): The credentials to use for the Google Calendar API.
+        calendar_id (str): The ID of the calendar to get events from.
+        time_min (datetime): The minimum time for the events to be returned.
+        time_max (datetime): The maximum time for the events to be returned.
+        timezone (ZoneInfo | None): The timezone used in the response. Defaults to UTC.
+        max_results (int): The maximum number of events per page (up to 2500).
+        cache (ResponseCache | None): Cache for the pages, revalidated with
+            their ETag once expired.
+        instrumentation (Instrumentation | None): Records the requests sent.
+
+    Yields:
+        CalendarEvent: A single event.
+
+    """
+    tz = timezone or ZoneInfo("UTC")
+    service = _get_service(creds)
+
+    page_token: str | None = None
+    while True:
+        request = service.events().list(
+            calendarId=calendar_id,
+            eventTypes=["default"],
+            singleEvents=True,
+            orderBy="startTime",
+            timeMin=time_min.isoformat(),
+            timeMax=time_max.isoformat(),
+            timeZone=str(tz),
+            maxResults=max_results,
+            fields=EVENT_FIELDS,
+            pageToken=page_token,
+        )
+
+        if cache is None:
+            events_result = _execute(request, instrumentation)
+        else:
+            key = make_key(calendar_id, time_min, time_max, str(tz), page_token)
+            events_result = _execute_cached(request, cache, key, instrumentation)
+
+        yield from _EVENTS_ADAPTER.validate_python(events_result.get("items", []))
+
+        if not (page_token := events_result.get("nextPageToken")):
+            return
+
+
+def get_calendar_events(  # noqa: PLR0913
+    creds: Credentials,
+    calendar_id: str,
+    time_min: datetime,
+    time_max: datetime,
+    timezone: ZoneInfo | None = None,
+    *,
+    max_results: int = MAX_RESULTS,
+    cache: ResponseCache | None = None,
+    instrumentation: Instrumentation | None = None,
 ) -> list[CalendarEvent]:
     """Get events from Google Calendar.
 
@@ -37,30 +165,155 @@ def get_calendar_events(
         time_min (datetime): The minimum time for the events to be returned.
         time_max (datetime): The maximum time for the events to be returned.
         timezone (ZoneInfo | None): The timezone used in the response. Defaults to UTC.
+        max_results (int): The maximum number of events per page (up to 2500).
+        cache (ResponseCache | None): Cache for the pages, revalidated with
+            their ETag once expired.
+        instrumentation (Instrumentation | None): Records the requests sent.
 
     Returns:
-        list[dict]: A list of events.
+        list[CalendarEvent]: A list of events.
 
     """
-    tz = timezone or ZoneInfo("UTC")
+    return list(
+        iter_calendar_events(
+            creds=creds,
+            calendar_id=calendar_id,
+            time_min=time_min,
+            time_max=time_max,
+            timezone=timezone,
+            max_results=max_results,
+            cache=cache,
+            instrumentation=instrumentation,
+        )
+    )
 
-    service = build("calendar", "v3", credentials=creds)
 
-    events_result = (
-        service.events()
-        .list(
+def get_sync_token(
+    creds: Credentials,
+    calendar_id: str,
+    time_min: datetime,
+    time_max: datetime,
+    instrumentation: Instrumentation | None = None,
+) -> str:
+    """Get a sync token for the events in a time range.
+
+    Only the page and sync tokens are requested, not the events themselves.
+    """
+    service = _get_service(creds)
+    return _sync(
+        lambda page_token: service.events().list(
             calendarId=calendar_id,
             eventTypes=["default"],
             singleEvents=True,
-            orderBy="startTime",
             timeMin=time_min.isoformat(),
             timeMax=time_max.isoformat(),
-            timeZone=str(tz),
+            maxResults=MAX_SYNC_RESULTS,
+            fields="nextPageToken,nextSyncToken",
+            pageToken=page_token,
+        ),
+        instrumentation,
+    ).next_sync_token
+
+
+def sync_calendar_events(
+    creds: Credentials,
+    calendar_id: str,
+    sync_token: str,
+    instrumentation: Instrumentation | None = None,
+) -> CalendarSync:
+    """Get the IDs of the events changed since the sync token was issued.
+
+    Args:
+        creds (Credentials): The credentials to use for the Google Calendar API.
+        calendar_id (str): The ID of the calendar to sync.
+        sync_token (str): The sync token from `get_sync_token` or a previous sync.
+        instrumentation (Instrumentation | None): Records the requests sent.
+
+    Returns:
+        CalendarSync: The changed event IDs and the token for the next sync.
+
+    Raises:
+        SyncTokenExpiredError: If the token expired and a full sync is needed.
+
+    """
+    service = _get_service(creds)
+    try:
+        return _sync(
+            lambda page_token: service.events().list(
+                calendarId=calendar_id,
+                eventTypes=["default"],
+                singleEvents=True,
+                syncToken=sync_token,
+                maxResults=MAX_SYNC_RESULTS,
+                fields="nextPageToken,nextSyncToken,items(id)",
+                pageToken=page_token,
+            ),
+            instrumentation,
         )
-        .execute()
+    except HttpError as e:
+        if e.resp.status == HTTPStatus.GONE:
+            raise SyncTokenExpiredError(calendar_id) from e
+        raise
+
+
+def _sync(
+    get_request: Callable[[str | None], Any],
+    instrumentation: Instrumentation | None = None,
+) -> CalendarSync:
+    """Page through a sync request until the next sync token is returned."""
+    changed_event_ids: list[str] = []
+    page_token: str | None = None
+    while True:
+        events_result = _execute(get_request(page_token), instrumentation)
+        changed_event_ids.extend(item["id"] for item in events_result.get("items", []))
+
+        if not (page_token := events_result.get("nextPageToken")):
+            return CalendarSync(
+                changed_event_ids=changed_event_ids,
+                next_sync_token=events_result["nextSyncToken"],
+            )
+
+
+def _execute(request: Any, instrumentation: Instrumentation | None) -> Any:
+    """Execute a Google API request, recording it like the httpx clients do."""
+    if instrumentation is None:
+        return request.execute()
+
+    started = instrumentation.clock()
+    try:
+        result = request.execute()
+    except HttpError as e:
+        instrumentation.observe_request(
+            SERVICE, request.method, e.resp.status, instrumentation.clock() - started
+        )
+        raise
+    instrumentation.observe_request(
+        SERVICE, request.method, HTTPStatus.OK, instrumentation.clock() - started
     )
+    return result
+
+
+def _execute_cached(
+    request: Any,
+    cache: ResponseCache,
+    key: str,
+    instrumentation: Instrumentation | None = None,
+) -> dict[str, Any]:
+    """Execute a Google API request, revalidating the cached response if expired."""
+    entry = cache.get(CACHE_NAMESPACE, key)
+    if entry is not None and not entry.is_expired(cache.clock()):
+        return entry.value  # type: ignore[no-any-return]
+
+    if entry is not None and entry.etag is not None:
+        request.headers["If-None-Match"] = entry.etag
 
-    events = events_result.get("items", [])
-    adapter = TypeAdapter(list[CalendarEvent])
+    try:
+        result: dict[str, Any] = _execute(request, instrumentation)
+    except HttpError as e:
+        if entry is None or e.resp.status != HTTPStatus.NOT_MODIFIED:
+            raise
+        cache.touch(CACHE_NAMESPACE, key, ttl=CACHE_TTL)
+        return entry.value  # type: ignore[no-any-return]
 
-    return adapter.validate_python(events)
+    cache.set(CACHE_NAMESPACE, key, result, ttl=CACHE_TTL, etag=result.get("etag"))
+    return result
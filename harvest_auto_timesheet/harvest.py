@@ -1,19 +1,262 @@
-from datetime import date
-from typing import Any
+import asyncio
+import time
+from collections.abc import AsyncIterator, Iterable, Iterator
+from datetime import date, datetime
+from types import TracebackType
+from typing import Any, Self
 
 import httpx
+from pydantic import AliasPath, BaseModel, ConfigDict, Field, TypeAdapter
+from pydantic.dataclasses import dataclass
+
+from harvest_auto_timesheet.cache import CacheEntry, ResponseCache, make_key
+from harvest_auto_timesheet.ratelimit import RateLimitStats, RetryPolicy, TokenBucket
+
+MAX_PER_PAGE = 2000
+
+CACHE_NAMESPACE = "harvest"
+# responses are revalidated with their ETag once they expire
+CACHE_TTL = 60
+
+# the external reference group of the entries created by this tool
+EXTERNAL_REFERENCE_GROUP_ID = "harvest-auto-timesheet"
+
+
+class ExternalReference(BaseModel):
+    """A stable key for a generated time entry, so it can be found again."""
+
+    id: str
+    group_id: str = EXTERNAL_REFERENCE_GROUP_ID
+    permalink: str | None = None
+
+
+class NewTimeEntry(BaseModel):
+    """A time entry to be created in Harvest."""
+
+    project_id: int
+    task_id: int
+    spent_date: date
+    hours: float
+    notes: str | None = None
+    external_reference: ExternalReference | None = None
+
+    def to_payload(self) -> dict[str, Any]:
+        """Get the JSON body used to create the time entry."""
+        return self.model_dump(mode="json", exclude_none=True)
+
+
+@dataclass(frozen=True, slots=True, config=ConfigDict(populate_by_name=True))
+class TimeEntry:
+    """A time entry read from Harvest, with only the fields that are used.
+
+    Whole weeks and ranges of entries are held in memory, so they are slotted
+    and keep the IDs of their project, task and user instead of the nested
+    objects of the API.
+    """
+
+    id: int
+    spent_date: date
+    hours: float
+    project_id: int = Field(validation_alias=AliasPath("project", "id"))
+    task_id: int = Field(validation_alias=AliasPath("task", "id"))
+    user_id: int = Field(validation_alias=AliasPath("user", "id"))
+    notes: str | None = None
+    external_reference: ExternalReference | None = None
+
+    @property
+    def is_generated(self) -> bool:
+        """Check if the time entry was created by this tool."""
+        return (
+            self.external_reference is not None
+            and self.external_reference.group_id == EXTERNAL_REFERENCE_GROUP_ID
+        )
+
+
+# the validation schema is built once, not on every response
+_TIME_ENTRY_ADAPTER = TypeAdapter(TimeEntry)
+_TIME_ENTRIES_ADAPTER = TypeAdapter(list[TimeEntry])
+
+
+def _get_headers(harvest_account_id: str, harvest_access_token: str) -> dict[str, str]:
+    return {
+        "Authorization": f"Bearer {harvest_access_token}",
+        "Harvest-Account-ID": harvest_account_id,
+    }
+
+
+def _get_time_entries_params(  # noqa: PLR0913
+    from_date: date,
+    to_date: date,
+    per_page: int,
+    updated_since: datetime | None,
+    *,
+    project_id: int | None = None,
+    task_id: int | None = None,
+    user_id: int | None = None,
+) -> dict[str, Any]:
+    if not 1 <= per_page <= MAX_PER_PAGE:
+        raise ValueError(f"per_page must be between 1 and {MAX_PER_PAGE}")
+
+    params: dict[str, Any] = {
+        "from": from_date.isoformat(),
+        "to": to_date.isoformat(),
+        "per_page": per_page,
+    }
+    if updated_since is not None:
+        params["updated_since"] = updated_since.isoformat()
+    filters = {"project_id": project_id, "task_id": task_id, "user_id": user_id}
+    params.update({name: id_ for name, id_ in filters.items() if id_ is not None})
+    return params
+
+
+def _get_cache_headers(entry: CacheEntry | None) -> dict[str, str] | None:
+    if entry is None or entry.etag is None:
+        return None
+    return {"If-None-Match": entry.etag}
+
+
+def _get_cache_namespace(harvest_access_token: str) -> str:
+    # scoped to the token, so a write only drops the responses of its user
+    return f"{CACHE_NAMESPACE}:{make_key(harvest_access_token)[:16]}"
+
+
+def _update_cache(
+    cache: ResponseCache,
+    namespace: str,
+    key: str,
+    entry: CacheEntry | None,
+    response: httpx.Response,
+) -> Any:
+    """Store a response in the cache, or refresh the entry if it was not modified."""
+    if entry is not None and response.status_code == httpx.codes.NOT_MODIFIED:
+        cache.touch(namespace, key, ttl=CACHE_TTL)
+        return entry.value
+
+    value = response.json()
+    cache.set(
+        namespace,
+        key,
+        value,
+        ttl=CACHE_TTL,
+        etag=response.headers.get("ETag"),
+    )
+    return value
+
+
+def _raise_for_status(response: httpx.Response) -> None:
+    # not modified responses are expected when revalidating cached responses
+    if response.status_code != httpx.codes.NOT_MODIFIED:
+        response.raise_for_status()
+
+
+def _get_reference_params(
+    external_reference_id: str, spent_date: date, user_id: int
+) -> dict[str, Any]:
+    return {
+        "external_reference_id": external_reference_id,
+        "user_id": user_id,
+        "from": spent_date.isoformat(),
+        "to": spent_date.isoformat(),
+    }
+
+
+def _can_recover_create(entry: NewTimeEntry, error: httpx.HTTPError) -> bool:
+    """Check if a failed create may have succeeded and can be looked up.
+
+    A create that timed out or failed with a server error may still have been
+    saved. With an external reference it can be found and, if missing, sent
+    again without creating a duplicate.
+    """
+    if entry.external_reference is None:
+        return False
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.is_server_error
+    return isinstance(error, httpx.TransportError)
+
+
+def get_rate_limiter() -> TokenBucket:
+    """Get a rate limiter for the Harvest API (100 requests per 15 seconds)."""
+    return TokenBucket(capacity=100, period=15)
 
 
 class Harvest:
-    def __init__(self, harvest_account_id: str, harvest_access_token: str) -> None:
+    def __init__(
+        self,
+        harvest_account_id: str,
+        harvest_access_token: str,
+        rate_limiter: TokenBucket | None = None,
+        retry_policy: RetryPolicy | None = None,
+        cache: ResponseCache | None = None,
+    ) -> None:
         self.harvest_account_id = harvest_account_id
         self.harvest_access_token = harvest_access_token
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.cache = cache
         self.client = httpx.Client(
-            headers={
-                "Authorization": f"Bearer {self.harvest_access_token}",
-                "Harvest-Account-ID": self.harvest_account_id,
-            }
+            headers=_get_headers(self.harvest_account_id, self.harvest_access_token)
+        )
+        # set once a write dropped the cached responses, until one is cached again
+        self._is_cache_invalidated = False
+
+    @property
+    def stats(self) -> RateLimitStats:
+        """Get the request counters shared with the rate limiter."""
+        return self.rate_limiter.stats
+
+    @property
+    def cache_namespace(self) -> str:
+        """Get the namespace of the cached responses of the token."""
+        return _get_cache_namespace(self.harvest_access_token)
+
+    def _get_json(self, url: str, params: dict[str, Any] | None = None) -> Any:
+        """Send a GET request, using the cache when there is one."""
+        if self.cache is None:
+            return self._request("GET", url, params=params).json()
+
+        key = make_key(self.harvest_access_token, url, params)
+        entry = self.cache.get(self.cache_namespace, key)
+        if entry is not None and not entry.is_expired(self.cache.clock()):
+            return entry.value
+
+        response = self._request(
+            "GET", url, params=params, headers=_get_cache_headers(entry)
         )
+        self._is_cache_invalidated = False
+        return _update_cache(self.cache, self.cache_namespace, key, entry, response)
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a rate limited request, retrying transient failures."""
+        if (
+            self.cache is not None
+            and method != "GET"
+            and not self._is_cache_invalidated
+        ):
+            self._is_cache_invalidated = True
+            self.cache.invalidate(self.cache_namespace)
+
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            self.stats.increment("requests")
+            response: httpx.Response | None
+            try:
+                response = self.client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if not self.retry_policy.should_retry(method, attempt):
+                    raise
+                response = None
+
+            if response is not None:
+                if response.status_code == httpx.codes.TOO_MANY_REQUESTS:
+                    self.stats.increment("rate_limited")
+                if not self.retry_policy.should_retry(method, attempt, response):
+                    _raise_for_status(response)
+                    return response
+
+            time.sleep(self.retry_policy.get_delay(attempt, response))
+            self.stats.increment("retried")
+            attempt += 1
 
     def get_user(self) -> dict[str, Any]:
         """Get the user information from Harvest API.
@@ -23,68 +266,445 @@ class Harvest:
 
         """
         url = "https://api.harvestapp.com/v2/users/me"
-        response = self.client.get(url)
-        response.raise_for_status()
-        return response.json()  # type: ignore[no-any-return]
+        return self._get_json(url)  # type: ignore[no-any-return]
+
+    def iter_time_entries(  # noqa: PLR0913
+        self,
+        from_date: date,
+        to_date: date,
+        per_page: int = MAX_PER_PAGE,
+        updated_since: datetime | None = None,
+        *,
+        project_id: int | None = None,
+        task_id: int | None = None,
+        user_id: int | None = None,
+    ) -> Iterator[TimeEntry]:
+        """Stream time entries from Harvest API, following pagination links.
+
+        Entries are yielded as each page arrives so callers never need to hold
+        more than a single page in memory.
+
+        Args:
+            from_date (date): The start date for the time entries.
+            to_date (date): The end date for the time entries.
+            per_page (int): The number of entries to request per page (1-2000).
+            updated_since (datetime | None): Only get the entries updated after this.
+            project_id (int | None): Only get the entries of this project.
+            task_id (int | None): Only get the entries of this task.
+            user_id (int | None): Only get the entries of this user.
+
+        Yields:
+            TimeEntry: A single time entry.
+
+        """
+        url: str | None = "https://api.harvestapp.com/v2/time_entries"
+        params: dict[str, Any] | None = _get_time_entries_params(
+            from_date,
+            to_date,
+            per_page,
+            updated_since,
+            project_id=project_id,
+            task_id=task_id,
+            user_id=user_id,
+        )
+        while url is not None:
+            data = self._get_json(url, params=params)
+            yield from _TIME_ENTRIES_ADAPTER.validate_python(data["time_entries"])
+
+            # the next link already carries the query string of the first request
+            url = (data.get("links") or {}).get("next")
+            params = None
 
     def get_time_entries(
         self,
         from_date: date,
         to_date: date,
-    ) -> list[dict[str, Any]]:
-        """Get time entries from Harvest API.
+        per_page: int = MAX_PER_PAGE,
+        updated_since: datetime | None = None,
+    ) -> list[TimeEntry]:
+        """Get all time entries from Harvest API.
 
         Args:
             from_date (date): The start date for the time entries.
             to_date (date): The end date for the time entries.
+            per_page (int): The number of entries to request per page (1-2000).
+            updated_since (datetime | None): Only get the entries updated after this.
 
         Returns:
-            list[dict]: List of time entries.
+            list[TimeEntry]: List of time entries.
+
+        """
+        return list(
+            self.iter_time_entries(
+                from_date=from_date,
+                to_date=to_date,
+                per_page=per_page,
+                updated_since=updated_since,
+            )
+        )
+
+    def add_time_entry(self, entry: NewTimeEntry) -> TimeEntry:
+        """Add a time entry to Harvest.
+
+        Entries with an external reference are looked up when the request
+        fails in a way that may have created them, before being sent again.
+
+        Args:
+            entry (NewTimeEntry): The time entry to create.
+
+        Returns:
+            TimeEntry: The created time entry.
 
         """
         url = "https://api.harvestapp.com/v2/time_entries"
-        params = {
-            "from": from_date.isoformat(),
-            "to": to_date.isoformat(),
-        }
-        response = self.client.get(url, params=params)
-        response.raise_for_status()
-        return response.json()["time_entries"]  # type: ignore[no-any-return]
+        try:
+            response = self._request("POST", url, json=entry.to_payload())
+        except httpx.HTTPError as e:
+            if not _can_recover_create(entry, e):
+                raise
+            assert entry.external_reference is not None
+            existing = self.find_time_entry(
+                entry.external_reference.id, entry.spent_date
+            )
+            if existing is not None:
+                return existing
+            response = self._request("POST", url, json=entry.to_payload())
 
-    def add_time_entry(
+        return _TIME_ENTRY_ADAPTER.validate_python(response.json())
+
+    def find_time_entry(
+        self, external_reference_id: str, spent_date: date
+    ) -> TimeEntry | None:
+        """Find a time entry by its external reference, bypassing the cache.
+
+        Args:
+            external_reference_id (str): The ID of the external reference.
+            spent_date (date): The date the time entry was spent.
+
+        Returns:
+            TimeEntry | None: The time entry, or None if there isn't one.
+
+        """
+        url = "https://api.harvestapp.com/v2/time_entries"
+        # the same event can be on the timesheets of all its attendees
+        user_id = self.get_user()["id"]
+        response = self._request(
+            "GET",
+            url,
+            params=_get_reference_params(external_reference_id, spent_date, user_id),
+        )
+        entries = _TIME_ENTRIES_ADAPTER.validate_python(response.json()["time_entries"])
+        return entries[0] if entries else None
+
+    def update_time_entry(self, time_entry_id: int, entry: NewTimeEntry) -> TimeEntry:
+        """Update a time entry in Harvest.
+
+        Args:
+            time_entry_id (int): The ID of the time entry to update.
+            entry (NewTimeEntry): The new values for the time entry.
+
+        Returns:
+            TimeEntry: The updated time entry.
+
+        """
+        url = f"https://api.harvestapp.com/v2/time_entries/{time_entry_id}"
+        response = self._request("PATCH", url, json=entry.to_payload())
+        return _TIME_ENTRY_ADAPTER.validate_python(response.json())
+
+    def delete_time_entry(self, time_entry_id: int) -> None:
+        """Delete a time entry from Harvest.
+
+        Args:
+            time_entry_id (int): The ID of the time entry to delete.
+
+        """
+        url = f"https://api.harvestapp.com/v2/time_entries/{time_entry_id}"
+        self._request("DELETE", url)
+
+
+class AsyncHarvest:
+    """Asynchronous Harvest client for issuing many requests concurrently.
+
+    Requests share a pooled (HTTP/2 by default) connection and the number of
+    requests in flight is bounded by a semaphore.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        harvest_account_id: str,
+        harvest_access_token: str,
+        *,
+        max_concurrency: int = 10,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 10,
+        http2: bool = True,
+        rate_limiter: TokenBucket | None = None,
+        retry_policy: RetryPolicy | None = None,
+        cache: ResponseCache | None = None,
+    ) -> None:
+        self.harvest_account_id = harvest_account_id
+        self.harvest_access_token = harvest_access_token
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.client = httpx.AsyncClient(
+            headers=_get_headers(self.harvest_account_id, self.harvest_access_token),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            http2=http2,
+        )
+        # set once a write dropped the cached responses, until one is cached again
+        self._is_cache_invalidated = False
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the underlying connection pool."""
+        await self.client.aclose()
+
+    @property
+    def stats(self) -> RateLimitStats:
+        """Get the request counters shared with the rate limiter."""
+        return self.rate_limiter.stats
+
+    @property
+    def cache_namespace(self) -> str:
+        """Get the namespace of the cached responses of the token."""
+        return _get_cache_namespace(self.harvest_access_token)
+
+    async def _get_json(self, url: str, params: dict[str, Any] | None = None) -> Any:
+        """Send a GET request, using the cache when there is one."""
+        if self.cache is None:
+            return (await self._request("GET", url, params=params)).json()
+
+        key = make_key(self.harvest_access_token, url, params)
+        entry = self.cache.get(self.cache_namespace, key)
+        if entry is not None and not entry.is_expired(self.cache.clock()):
+            return entry.value
+
+        response = await self._request(
+            "GET", url, params=params, headers=_get_cache_headers(entry)
+        )
+        self._is_cache_invalidated = False
+        return _update_cache(self.cache, self.cache_namespace, key, entry, response)
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a rate limited request, retrying transient failures."""
+        if (
+            self.cache is not None
+            and method != "GET"
+            and not self._is_cache_invalidated
+        ):
+            # once for a batch of concurrent writes, off the event loop
+            self._is_cache_invalidated = True
+            await asyncio.to_thread(self.cache.invalidate, self.cache_namespace)
+
+        attempt = 0
+        while True:
+            response: httpx.Response | None
+            async with self.semaphore:
+                await self.rate_limiter.acquire_async()
+                self.stats.increment("requests")
+                try:
+                    response = await self.client.request(method, url, **kwargs)
+                except httpx.TransportError:
+                    if not self.retry_policy.should_retry(method, attempt):
+                        raise
+                    response = None
+
+            if response is not None:
+                if response.status_code == httpx.codes.TOO_MANY_REQUESTS:
+                    self.stats.increment("rate_limited")
+                if not self.retry_policy.should_retry(method, attempt, response):
+                    _raise_for_status(response)
+                    return response
+
+            # back off outside of the semaphore so other requests can proceed
+            await asyncio.sleep(self.retry_policy.get_delay(attempt, response))
+            self.stats.increment("retried")
+            attempt += 1
+
+    async def get_user(self) -> dict[str, Any]:
+        """Get the user information from Harvest API.
+
+        Returns:
+            dict: User information.
+
+        """
+        url = "https://api.harvestapp.com/v2/users/me"
+        return await self._get_json(url)  # type: ignore[no-any-return]
+
+    async def iter_time_entries(  # noqa: PLR0913
+        self,
+        from_date: date,
+        to_date: date,
+        per_page: int = MAX_PER_PAGE,
+        updated_since: datetime | None = None,
+        *,
+        project_id: int | None = None,
+        task_id: int | None = None,
+        user_id: int | None = None,
+    ) -> AsyncIterator[TimeEntry]:
+        """Stream time entries from Harvest API, following pagination links.
+
+        Args:
+            from_date (date): The start date for the time entries.
+            to_date (date): The end date for the time entries.
+            per_page (int): The number of entries to request per page (1-2000).
+            updated_since (datetime | None): Only get the entries updated after this.
+            project_id (int | None): Only get the entries of this project.
+            task_id (int | None): Only get the entries of this task.
+            user_id (int | None): Only get the entries of this user.
+
+        Yields:
+            TimeEntry: A single time entry.
+
+        """
+        url: str | None = "https://api.harvestapp.com/v2/time_entries"
+        params: dict[str, Any] | None = _get_time_entries_params(
+            from_date,
+            to_date,
+            per_page,
+            updated_since,
+            project_id=project_id,
+            task_id=task_id,
+            user_id=user_id,
+        )
+        while url is not None:
+            data = await self._get_json(url, params=params)
+            for entry in _TIME_ENTRIES_ADAPTER.validate_python(data["time_entries"]):
+                yield entry
+
+            url = (data.get("links") or {}).get("next")
+            params = None
+
+    async def get_time_entries(
         self,
-        project_id: int,
-        task_id: int,
-        spent_date: date,
-        hours: float,
-        notes: str | None = None,
-    ) -> dict[str, Any]:
+        from_date: date,
+        to_date: date,
+        per_page: int = MAX_PER_PAGE,
+        updated_since: datetime | None = None,
+    ) -> list[TimeEntry]:
+        """Get all time entries from Harvest API.
+
+        Args:
+            from_date (date): The start date for the time entries.
+            to_date (date): The end date for the time entries.
+            per_page (int): The number of entries to request per page (1-2000).
+            updated_since (datetime | None): Only get the entries updated after this.
+
+        Returns:
+            list[TimeEntry]: List of time entries.
+
+        """
+        return [
+            entry
+            async for entry in self.iter_time_entries(
+                from_date=from_date,
+                to_date=to_date,
+                per_page=per_page,
+                updated_since=updated_since,
+            )
+        ]
+
+    async def add_time_entry(self, entry: NewTimeEntry) -> TimeEntry:
         """Add a time entry to Harvest.
 
+        Entries with an external reference are looked up when the request
+        fails in a way that may have created them, before being sent again.
+
         Args:
-            project_id (int): The ID of the project to associate with the time entry.
-            task_id (int): The ID of the task to associate with the time entry.
+            entry (NewTimeEntry): The time entry to create.
+
+        Returns:
+            TimeEntry: The created time entry.
+
+        """
+        url = "https://api.harvestapp.com/v2/time_entries"
+        try:
+            response = await self._request("POST", url, json=entry.to_payload())
+        except httpx.HTTPError as e:
+            if not _can_recover_create(entry, e):
+                raise
+            assert entry.external_reference is not None
+            existing = await self.find_time_entry(
+                entry.external_reference.id, entry.spent_date
+            )
+            if existing is not None:
+                return existing
+            response = await self._request("POST", url, json=entry.to_payload())
+
+        return _TIME_ENTRY_ADAPTER.validate_python(response.json())
+
+    async def find_time_entry(
+        self, external_reference_id: str, spent_date: date
+    ) -> TimeEntry | None:
+        """Find a time entry by its external reference, bypassing the cache.
+
+        Args:
+            external_reference_id (str): The ID of the external reference.
             spent_date (date): The date the time entry was spent.
-            hours (float): The number of hours spent.
-            notes (str): Any notes to be associated with the time entry.
+
+        Returns:
+            TimeEntry | None: The time entry, or None if there isn't one.
 
         """
         url = "https://api.harvestapp.com/v2/time_entries"
-        data = {
-            "project_id": project_id,
-            "task_id": task_id,
-            "spent_date": spent_date.isoformat(),
-            "hours": hours,
-        }
+        # the same event can be on the timesheets of all its attendees
+        user_id = (await self.get_user())["id"]
+        response = await self._request(
+            "GET",
+            url,
+            params=_get_reference_params(external_reference_id, spent_date, user_id),
+        )
+        entries = _TIME_ENTRIES_ADAPTER.validate_python(response.json()["time_entries"])
+        return entries[0] if entries else None
 
-        if notes is not None:  # pragma: nobranch
-            data["notes"] = notes
+    async def add_time_entries(
+        self, entries: Iterable[NewTimeEntry]
+    ) -> list[TimeEntry]:
+        """Add many time entries to Harvest concurrently.
 
-        response = self.client.post(url, json=data)
-        response.raise_for_status()
-        return response.json()  # type: ignore[no-any-return]
+        Args:
+            entries (Iterable[NewTimeEntry]): The time entries to create.
 
-    def delete_time_entry(self, time_entry_id: int) -> None:
+        Returns:
+            list[TimeEntry]: The created time entries, in the same order as `entries`.
+
+        """
+        return await asyncio.gather(*(self.add_time_entry(entry) for entry in entries))
+
+    async def update_time_entry(
+        self, time_entry_id: int, entry: NewTimeEntry
+    ) -> TimeEntry:
+        """Update a time entry in Harvest.
+
+        Args:
+            time_entry_id (int): The ID of the time entry to update.
+            entry (NewTimeEntry): The new values for the time entry.
+
+        Returns:
+            TimeEntry: The updated time entry.
+
+        """
+        url = f"https://api.harvestapp.com/v2/time_entries/{time_entry_id}"
+        response = await self._request("PATCH", url, json=entry.to_payload())
+        return _TIME_ENTRY_ADAPTER.validate_python(response.json())
+
+    async def delete_time_entry(self, time_entry_id: int) -> None:
         """Delete a time entry from Harvest.
 
         Args:
@@ -92,5 +712,4 @@ class Harvest:
 
         """
         url = f"https://api.harvestapp.com/v2/time_entries/{time_entry_id}"
-        response = self.client.delete(url)
-        response.raise_for_status()
+        await self._request("DELETE", url)
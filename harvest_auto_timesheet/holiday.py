@@ -0,0 +1,127 @@
+"""Public holidays, company days off and personal leave for a region.
+
+The public holidays of a year are only computed the first time a day of that
+year is looked up, and are then kept in a dict so each lookup is a single
+hash. Company days off and personal leave are read from a local JSON file
+listing single days or ranges, for example:
+
+    [
+        {"date": "2025-12-24", "name": "Company day off", "kind": "company"},
+        {"date": "2025-07-07", "end": "2025-07-11", "kind": "leave"}
+    ]
+"""
+
+import threading
+from datetime import date, timedelta
+from enum import StrEnum
+from pathlib import Path
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+
+DEFAULT_COUNTRY = "NZ"
+DEFAULT_SUBDIV = "AUK"
+
+
+class DayOffKind(StrEnum):
+    PUBLIC = "public"
+    COMPANY = "company"
+    LEAVE = "leave"
+
+
+class DayOff(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    kind: DayOffKind
+
+
+class DayOffRange(BaseModel):
+    date_: date = Field(alias="date")
+    end: date | None = None  # inclusive, a single day when missing
+    name: str | None = None
+    kind: DayOffKind = DayOffKind.LEAVE
+
+    def iter_days(self) -> list[date]:
+        end = self.end or self.date_
+        return [
+            self.date_ + timedelta(days=i) for i in range((end - self.date_).days + 1)
+        ]
+
+
+_RANGES_ADAPTER = TypeAdapter(list[DayOffRange])
+
+_DEFAULT_NAMES = {
+    DayOffKind.PUBLIC: "Public holiday",
+    DayOffKind.COMPANY: "Company day off",
+    DayOffKind.LEAVE: "Leave",
+}
+
+
+class HolidayIndex:
+    """Days off for a region, loaded lazily a year at a time.
+
+    Supports `in` so it can be used wherever a container of dates is expected.
+    Days from the local file take precedence over public holidays.
+    """
+
+    def __init__(
+        self,
+        country: str = DEFAULT_COUNTRY,
+        subdiv: str | None = DEFAULT_SUBDIV,
+        days_off: list[DayOffRange] | None = None,
+    ) -> None:
+        self.country = country
+        self.subdiv = subdiv
+
+        self._custom: dict[date, DayOff] = {}
+        for day_off in days_off or []:
+            for day in day_off.iter_days():
+                self._custom[day] = DayOff(
+                    name=day_off.name or _DEFAULT_NAMES[day_off.kind],
+                    kind=day_off.kind,
+                )
+
+        self._years: dict[int, dict[date, DayOff]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(
+        cls,
+        path: str | Path | None,
+        country: str = DEFAULT_COUNTRY,
+        subdiv: str | None = DEFAULT_SUBDIV,
+    ) -> "HolidayIndex":
+        """Create the index with the days off listed in a JSON file, if any."""
+        days_off = (
+            _RANGES_ADAPTER.validate_json(Path(path).read_bytes())
+            if path is not None
+            else None
+        )
+        return cls(country=country, subdiv=subdiv, days_off=days_off)
+
+    def __contains__(self, day: object) -> bool:
+        return isinstance(day, date) and self.get(day) is not None
+
+    def get(self, day: date) -> DayOff | None:
+        """Get the day off on a date, or None if it's a working day."""
+        if (day_off := self._custom.get(day)) is not None:
+            return day_off
+        return self._get_year(day.year).get(day)
+
+    def _get_year(self, year: int) -> dict[date, DayOff]:
+        if (days := self._years.get(year)) is not None:
+            return days
+
+        with self._lock:
+            if year not in self._years:
+                # computing the holidays of a year is slow so importing is too
+                import holidays
+
+                public = holidays.country_holidays(
+                    self.country, subdiv=self.subdiv, years=year
+                )
+                self._years[year] = {
+                    day: DayOff(name=name, kind=DayOffKind.PUBLIC)
+                    for day, name in public.items()
+                }
+            return self._years[year]
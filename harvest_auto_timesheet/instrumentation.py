@@ -0,0 +1,202 @@
+"""Time the phases of a run and the HTTP requests it sends.
+
+Spans time a phase such as reading the calendar or writing to Harvest, and
+the HTTP clients report the latency and status of every request through
+their hooks. Recording is a clock read and a dict update under a lock, so it
+is always on. At the end of a run the measurements can be saved as a JSON
+summary and as a Prometheus textfile, for the node exporter's textfile
+collector.
+"""
+
+import bisect
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import httpx
+from pydantic import BaseModel
+
+from harvest_auto_timesheet.util import write_atomic
+
+# the upper bounds of the request latency histogram buckets, in seconds
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_PREFIX = "harvest_auto_timesheet"
+
+_START_EXTENSION = "instrumentation_start"
+
+
+class SpanStats(BaseModel):
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+class RequestStats(BaseModel):
+    service: str
+    method: str
+    status: int
+    count: int = 0
+    total_seconds: float = 0.0
+    # the number of requests in each bucket, the last one has no upper bound
+    buckets: list[int] = [0] * (len(BUCKETS) + 1)
+
+
+class Summary(BaseModel):
+    spans: dict[str, SpanStats]
+    requests: list[RequestStats]
+
+
+class Instrumentation:
+    """Thread-safe recorder of span durations and request latencies."""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.clock = clock
+        self._spans: dict[str, SpanStats] = {}
+        self._requests: dict[tuple[str, str, int], RequestStats] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time a phase of the run, the time is recorded even if it fails."""
+        started = self.clock()
+        try:
+            yield
+        finally:
+            seconds = self.clock() - started
+            with self._lock:
+                stats = self._spans.setdefault(name, SpanStats())
+                stats.count += 1
+                stats.total_seconds += seconds
+                stats.max_seconds = max(stats.max_seconds, seconds)
+
+    def observe_request(
+        self, service: str, method: str, status: int, seconds: float
+    ) -> None:
+        """Record the latency of an HTTP request."""
+        key = (service, method, status)
+        with self._lock:
+            if (stats := self._requests.get(key)) is None:
+                stats = self._requests[key] = RequestStats(
+                    service=service, method=method, status=status
+                )
+            stats.count += 1
+            stats.total_seconds += seconds
+            stats.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def count_requests(self, service: str) -> int:
+        """Count the requests recorded so far for a service."""
+        with self._lock:
+            return sum(
+                stats.count
+                for stats in self._requests.values()
+                if stats.service == service
+            )
+
+    def instrument_httpx(
+        self, client: httpx.Client | httpx.AsyncClient, service: str
+    ) -> None:
+        """Record every request sent by an httpx client through its event hooks."""
+
+        def on_request(request: httpx.Request) -> None:
+            request.extensions[_START_EXTENSION] = self.clock()
+
+        def on_response(response: httpx.Response) -> None:
+            request = response.request
+            if (started := request.extensions.get(_START_EXTENSION)) is not None:
+                self.observe_request(
+                    service,
+                    request.method,
+                    response.status_code,
+                    self.clock() - started,
+                )
+
+        hooks = client.event_hooks
+        if isinstance(client, httpx.AsyncClient):
+
+            async def on_request_async(request: httpx.Request) -> None:
+                on_request(request)
+
+            async def on_response_async(response: httpx.Response) -> None:
+                on_response(response)
+
+            hooks["request"].append(on_request_async)
+            hooks["response"].append(on_response_async)
+        else:
+            hooks["request"].append(on_request)
+            hooks["response"].append(on_response)
+        client.event_hooks = hooks
+
+    def instrument_requests(self, session: Any, service: str) -> None:
+        """Record every request sent by a requests session, like PagerDuty's."""
+
+        def on_response(response: Any, *_args: Any, **_kwargs: Any) -> None:
+            self.observe_request(
+                service,
+                response.request.method,
+                response.status_code,
+                response.elapsed.total_seconds(),
+            )
+
+        session.hooks["response"].append(on_response)
+
+    def get_summary(self) -> Summary:
+        """Get a copy of everything recorded so far."""
+        with self._lock:
+            return Summary(
+                spans={name: stats.model_copy() for name, stats in self._spans.items()},
+                requests=[
+                    stats.model_copy(deep=True) for stats in self._requests.values()
+                ],
+            )
+
+    def save_json(self, path: str | Path) -> None:
+        """Save the summary as JSON."""
+        write_atomic(path, self.get_summary().model_dump_json(indent=2))
+
+    def save_textfile(self, path: str | Path) -> None:
+        """Save the summary in the Prometheus text format.
+
+        The file is replaced atomically, as the textfile collector may read it
+        at any time.
+        """
+        write_atomic(path, format_prometheus(self.get_summary()))
+
+
+def format_prometheus(summary: Summary) -> str:
+    """Format a summary in the Prometheus text exposition format.
+
+    Args:
+        summary (Summary): The recorded spans and requests.
+
+    Returns:
+        str: The spans as gauges and the requests as a latency histogram.
+
+    """
+    span_metric = f"{METRIC_PREFIX}_span_seconds"
+    request_metric = f"{METRIC_PREFIX}_http_request_duration_seconds"
+    lines = [
+        f"# HELP {span_metric} The total time spent in each phase of the run.",
+        f"# TYPE {span_metric} gauge",
+        *(
+            f'{span_metric}{{span="{name}"}} {stats.total_seconds}'
+            for name, stats in sorted(summary.spans.items())
+        ),
+        f"# HELP {request_metric} The latency of the HTTP requests sent.",
+        f"# TYPE {request_metric} histogram",
+    ]
+    for stats in summary.requests:
+        labels = (
+            f'service="{stats.service}",method="{stats.method}",status="{stats.status}"'
+        )
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, "+Inf"), stats.buckets, strict=True):
+            cumulative += count
+            lines.append(
+                f'{request_metric}_bucket{{{labels},le="{bound}"}} {cumulative}'
+            )
+        lines.append(f"{request_metric}_sum{{{labels}}} {stats.total_seconds}")
+        lines.append(f"{request_metric}_count{{{labels}}} {stats.count}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,115 @@
+"""Merge the time booked by overlapping intervals from different sources.
+
+Calendar events and incidents are booked independently, so a double booked
+meeting or an incident during a meeting would count the same time twice. The
+intervals are swept in start order, keeping the active ones in a heap by
+priority, so each moment is booked to a single interval: the one with the
+highest priority, or the one that started first. This is O(n log n) in the
+number of intervals.
+"""
+
+import heapq
+import itertools
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, time, tzinfo
+
+
+@dataclass(frozen=True)
+class Interval:
+    start: datetime
+    end: datetime
+    priority: int = 0  # the higher priority interval wins an overlap
+
+
+@dataclass(frozen=True)
+class Segment:
+    """A stretch of time booked to a single interval."""
+
+    start: datetime
+    end: datetime
+    index: int  # the index of the interval the time is booked to
+
+    @property
+    def hours(self) -> float:
+        return (self.end - self.start).total_seconds() / 3600
+
+
+@dataclass(frozen=True)
+class WorkingHours:
+    start: time = time(hour=9)
+    end: time = time(hour=17)
+
+    def get_window(self, day: date, tz: tzinfo | None) -> tuple[datetime, datetime]:
+        """Get the start and end of the working hours on a day."""
+        return (
+            datetime.combine(day, self.start, tzinfo=tz),
+            datetime.combine(day, self.end, tzinfo=tz),
+        )
+
+
+def resolve_overlaps(intervals: Sequence[Interval]) -> list[Segment]:
+    """Split intervals into non-overlapping segments.
+
+    Args:
+        intervals (Sequence[Interval]): The intervals, in any order.
+
+    Returns:
+        list[Segment]: The segments in time order, each booked to the highest
+            priority interval active at the time. Ties go to the interval
+            that started first. Adjacent segments of the same interval are
+            merged and intervals without any time are ignored.
+
+    """
+    order = sorted(
+        (
+            index
+            for index, interval in enumerate(intervals)
+            if interval.start < interval.end
+        ),
+        key=lambda index: intervals[index].start,
+    )
+    points = sorted(
+        {t for index in order for t in (intervals[index].start, intervals[index].end)}
+    )
+
+    active: list[tuple[int, datetime, int]] = []
+    segments: list[Segment] = []
+    pending = iter(order)
+    next_index = next(pending, None)
+    for start, end in itertools.pairwise(points):
+        while next_index is not None and intervals[next_index].start <= start:
+            interval = intervals[next_index]
+            heapq.heappush(active, (-interval.priority, interval.start, next_index))
+            next_index = next(pending, None)
+        # the intervals that ended are only dropped once they are on top
+        while active and intervals[active[0][2]].end <= start:
+            heapq.heappop(active)
+        if not active:
+            continue
+
+        index = active[0][2]
+        if segments and segments[-1].index == index and segments[-1].end == start:
+            segments[-1] = Segment(start=segments[-1].start, end=end, index=index)
+        else:
+            segments.append(Segment(start=start, end=end, index=index))
+
+    return segments
+
+
+def clip(segments: Iterable[Segment], start: datetime, end: datetime) -> list[Segment]:
+    """Get the parts of the segments between two times."""
+    return [
+        Segment(
+            start=max(segment.start, start),
+            end=min(segment.end, end),
+            index=segment.index,
+        )
+        for segment in segments
+        if segment.start < end and segment.end > start
+    ]
+
+
+def get_hours(segments: Iterable[Segment]) -> float:
+    """Get the total hours of non-overlapping segments."""
+    return sum(segment.hours for segment in segments)
@@ -0,0 +1,349 @@
+"""Pools of notes for the filler time entries.
+
+Notes are fetched in bulk and kept in a pool, so filling a timesheet never
+waits on the network. The pool is refilled in the background once it runs
+low, and can be saved to disk so the next run starts with a full pool. When
+the pool is empty, for example on the very first run or while the APIs are
+down, notes are picked from a small bundled corpus instead.
+"""
+
+import asyncio
+import json
+import random
+import threading
+from collections import deque
+from collections.abc import Awaitable, Callable
+from contextlib import nullcontext
+from enum import StrEnum
+from pathlib import Path
+
+import httpx
+
+from harvest_auto_timesheet.instrumentation import Instrumentation
+from harvest_auto_timesheet.util import format_joke, write_atomic
+
+JOKE_URL = "https://v2.jokeapi.dev/joke/Programming"
+JOKE_PARAMS = {"blacklistFlags": "nsfw,racist,sexist,explicit"}
+MAX_JOKES_PER_REQUEST = 10  # the JokeAPI limit for the amount parameter
+ADVICE_URL = "https://api.adviceslip.com/advice"
+# the random slip is cached for about two seconds, so concurrent requests for
+# it mostly get the same advice, the slips are requested by ID instead
+MAX_ADVICE_ID = 224
+
+LOW_WATER = 20  # refill once a pool has fewer notes than this
+REFILL_AMOUNT = 30  # notes requested per refill
+MAX_USED = 1000  # used notes remembered per kind to avoid repeats
+REQUEST_TIMEOUT = 10.0
+SAVE_TIMEOUT = 5.0  # seconds to wait for a refill to be saved for next time
+
+
+class NoteKind(StrEnum):
+    JOKE = "joke"
+    ADVICE = "advice"
+
+
+OFFLINE_NOTES: dict[NoteKind, tuple[str, ...]] = {
+    NoteKind.JOKE: (
+        (
+            "There are 10 kinds of people: those who understand binary and those who "
+            "don't."
+        ),
+        "Why do programmers prefer dark mode? Because light attracts bugs.",
+        (
+            "A SQL query walks into a bar, walks up to two tables and asks: Can I join "
+            "you?"
+        ),
+        "Why do Java developers wear glasses? Because they don't C#.",
+        (
+            "How many programmers does it take to change a light bulb? None, that's a "
+            "hardware problem."
+        ),
+        "I would tell you a UDP joke, but you might not get it.",
+        (
+            "Debugging: being the detective in a crime movie where you are also the "
+            "murderer."
+        ),
+        "Why did the developer go broke? Because they used up all their cache.",
+        "It works on my machine. Then we'll ship your machine.",
+        (
+            "There are only two hard things in computer science: cache invalidation, "
+            "naming things and off-by-one errors."
+        ),
+        "Why was the function sad after the party? It didn't get called back.",
+        (
+            "A programmer's partner asks them to buy a loaf of bread and, if they have "
+            "eggs, a dozen. They come back with 12 loaves."
+        ),
+    ),
+    NoteKind.ADVICE: (
+        "Write the test before you fix the bug.",
+        "Read the error message, all of it.",
+        "Leave the code a little better than you found it.",
+        "If you have to explain it twice, write it down.",
+        "Small pull requests get reviewed faster.",
+        "Measure before you optimise.",
+        "Take a break when you're stuck, the answer often comes on the walk.",
+        "Don't be afraid to ask for help.",
+        "Delete code you don't need, version control remembers it.",
+        "Automate the thing you do for the third time.",
+        "Name things for what they do, not how they do it.",
+        "Sleep on big decisions.",
+    ),
+}
+
+
+async def fetch_jokes(client: httpx.AsyncClient, amount: int) -> list[str]:
+    """Fetch jokes from the JokeAPI, up to ten per request, concurrently.
+
+    Args:
+        client (httpx.AsyncClient): The client to send the requests with.
+        amount (int): The number of jokes to fetch.
+
+    Returns:
+        list[str]: The jokes, which may contain duplicates.
+
+    """
+    amounts = [
+        min(MAX_JOKES_PER_REQUEST, amount - start)
+        for start in range(0, amount, MAX_JOKES_PER_REQUEST)
+    ]
+    responses = await asyncio.gather(
+        *(client.get(JOKE_URL, params={**JOKE_PARAMS, "amount": n}) for n in amounts)
+    )
+
+    jokes: list[str] = []
+    for response in responses:
+        response.raise_for_status()
+        data = response.json()
+        # a single joke is returned as is, several are wrapped in a list
+        jokes.extend(format_joke(joke) for joke in data.get("jokes", [data]))
+    return jokes
+
+
+async def fetch_advice(client: httpx.AsyncClient, amount: int) -> list[str]:
+    """Fetch advice from the Advice Slip API, one slip per request, concurrently.
+
+    Distinct slips are requested by ID, as the random slip only changes every
+    couple of seconds.
+
+    Args:
+        client (httpx.AsyncClient): The client to send the requests with.
+        amount (int): The number of pieces of advice to fetch.
+
+    Returns:
+        list[str]: The advice, without the IDs that have no slip.
+
+    """
+    slip_ids = random.sample(range(1, MAX_ADVICE_ID + 1), min(amount, MAX_ADVICE_ID))
+    responses = await asyncio.gather(
+        *(client.get(f"{ADVICE_URL}/{slip_id}") for slip_id in slip_ids)
+    )
+
+    advice: list[str] = []
+    for response in responses:
+        response.raise_for_status()
+        # a missing slip is a message instead of an error status
+        if slip := response.json().get("slip"):
+            advice.append(slip["advice"])
+    return advice
+
+
+Fetcher = Callable[[httpx.AsyncClient, int], Awaitable[list[str]]]
+
+FETCHERS: dict[NoteKind, Fetcher] = {
+    NoteKind.JOKE: fetch_jokes,
+    NoteKind.ADVICE: fetch_advice,
+}
+
+
+class NotePool:
+    """Thread-safe pools of unused notes, refilled in the background."""
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        *,
+        low_water: int = LOW_WATER,
+        refill_amount: int = REFILL_AMOUNT,
+        fetchers: dict[NoteKind, Fetcher] | None = None,
+        instrumentation: Instrumentation | None = None,
+    ) -> None:
+        self.path = Path(path) if path is not None else None
+        self.low_water = low_water
+        self.refill_amount = refill_amount
+        self.fetchers = fetchers if fetchers is not None else FETCHERS
+        self.instrumentation = instrumentation
+
+        self._notes: dict[NoteKind, deque[str]] = {kind: deque() for kind in NoteKind}
+        self._used: dict[NoteKind, deque[str]] = {
+            kind: deque(maxlen=MAX_USED) for kind in NoteKind
+        }
+        # the kinds a refill added nothing to aren't refilled again
+        self._exhausted: set[NoteKind] = set()
+        self._lock = threading.Lock()
+        self._refill_thread: threading.Thread | None = None
+
+        if self.path is not None:
+            self._load(self.path)
+
+    def get(self, kind: NoteKind) -> str:
+        """Get an unused note, falling back to the offline corpus.
+
+        Never blocks on the network. A background refill is started when the
+        pool runs low.
+        """
+        with self._lock:
+            notes = self._notes[kind]
+            note = notes.popleft() if notes else None
+            if note is not None:
+                self._used[kind].append(note)
+            is_low = len(notes) < self.low_water and kind not in self._exhausted
+
+        if is_low:
+            self.refill_in_background()
+
+        return note if note is not None else random.choice(OFFLINE_NOTES[kind])
+
+    def get_joke(self) -> str:
+        return self.get(NoteKind.JOKE)
+
+    def get_advice(self) -> str:
+        return self.get(NoteKind.ADVICE)
+
+    def size(self, kind: NoteKind) -> int:
+        with self._lock:
+            return len(self._notes[kind])
+
+    def add(self, kind: NoteKind, notes: list[str]) -> int:
+        """Add notes that are neither in the pool nor used recently.
+
+        Returns:
+            int: The number of notes added.
+
+        """
+        with self._lock:
+            seen = {*self._notes[kind], *self._used[kind]}
+            added = 0
+            for note in notes:
+                if note and note not in seen:
+                    self._notes[kind].append(note)
+                    seen.add(note)
+                    added += 1
+        return added
+
+    def refill(self) -> None:
+        """Fetch notes for every pool below the low water mark and save them.
+
+        Failures are reported and otherwise ignored, as the offline corpus
+        covers for an empty pool. A kind that fails or gets nothing new isn't
+        refilled again by this pool, so running low doesn't start a refill on
+        every note taken.
+        """
+        with self._lock:
+            kinds = [
+                kind
+                for kind in NoteKind
+                if len(self._notes[kind]) < self.low_water
+                and kind not in self._exhausted
+            ]
+        if not kinds:
+            return
+
+        span = (
+            self.instrumentation.span("notes")
+            if self.instrumentation is not None
+            else nullcontext()
+        )
+        with span:
+            results = asyncio.run(self._fetch(kinds))
+        for kind, result in zip(kinds, results, strict=True):
+            if isinstance(result, BaseException):
+                # rich is only imported once the notes are refilled, off the
+                # startup path
+                from rich.console import Console
+
+                Console().print(f"[yellow]Failed to fetch notes ({kind}): {result}")
+                added = 0
+            else:
+                added = self.add(kind, result)
+            if not added:
+                with self._lock:
+                    self._exhausted.add(kind)
+
+        if self.path is not None:
+            self.save(self.path)
+
+    def refill_in_background(self) -> None:
+        """Start a refill in a daemon thread unless one is already running."""
+        with self._lock:
+            if self._refill_thread is not None and self._refill_thread.is_alive():
+                return
+            self._refill_thread = threading.Thread(target=self.refill, daemon=True)
+            self._refill_thread.start()
+
+    def wait(self, timeout: float | None = None) -> None:
+        """Wait for the background refill to finish, if there is one."""
+        thread = self._refill_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def save(self, path: str | Path) -> None:
+        """Save the pools, replacing the previous file atomically."""
+        with self._lock:
+            data = {
+                "notes": {kind: list(self._notes[kind]) for kind in NoteKind},
+                "used": {kind: list(self._used[kind]) for kind in NoteKind},
+            }
+
+        write_atomic(path, json.dumps(data, indent=2))
+
+    def _load(self, path: Path) -> None:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        for kind in NoteKind:
+            self._used[kind].extend(data.get("used", {}).get(kind, []))
+            self.add(kind, data.get("notes", {}).get(kind, []))
+
+    async def _fetch(self, kinds: list[NoteKind]) -> list[list[str] | BaseException]:
+        async with httpx.AsyncClient(
+            headers={"Accept": "application/json"}, timeout=REQUEST_TIMEOUT
+        ) as client:
+            if self.instrumentation is not None:
+                self.instrumentation.instrument_httpx(client, "notes")
+            return await asyncio.gather(
+                *(self.fetchers[kind](client, self.refill_amount) for kind in kinds),
+                return_exceptions=True,
+            )
+
+
+_default_pool: NotePool | None = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> NotePool:
+    """Get the pool used by the filler tasks, in memory until one is set."""
+    global _default_pool  # noqa: PLW0603
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = NotePool()
+        return _default_pool
+
+
+def set_default_pool(pool: NotePool) -> None:
+    """Set the pool used by the filler tasks, for example one saved to disk."""
+    global _default_pool  # noqa: PLW0603
+    with _default_pool_lock:
+        _default_pool = pool
+
+
+def get_joke() -> str:
+    """Get a joke from the default pool."""
+    return get_default_pool().get_joke()
+
+
+def get_advice() -> str:
+    """Get a piece of advice from the default pool."""
+    return get_default_pool().get_advice()
@@ -1,22 +1,47 @@
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
+from typing import TYPE_CHECKING, Any
 
-import pagerduty
-from pydantic import AwareDatetime, BaseModel, TypeAdapter
+from pydantic import AliasPath, AwareDatetime, ConfigDict, Field, TypeAdapter
+from pydantic.dataclasses import dataclass
 
+from harvest_auto_timesheet.cache import ResponseCache, make_key
+from harvest_auto_timesheet.ratelimit import TokenBucket
 
-class _Agent(BaseModel):
-    id: str  # the user ID of the agent
+if TYPE_CHECKING:
+    import pagerduty
 
+CACHE_NAMESPACE = "pagerduty"
+# PagerDuty does not support conditional requests so entries are only expired.
+# The logs of resolved incidents don't change so they can be kept much longer.
+USER_CACHE_TTL = 24 * 60 * 60
+INCIDENTS_CACHE_TTL = 15 * 60
+INCIDENT_LOGS_CACHE_TTL = 7 * 24 * 60 * 60
 
-class IncidentLog(BaseModel):
+MAX_WORKERS = 8
+PAGE_SIZE = 100  # the most PagerDuty returns per page
+
+
+def get_rate_limiter() -> TokenBucket:
+    """Get a rate limiter for the PagerDuty REST API (960 requests per minute)."""
+    return TokenBucket(capacity=960, period=60)
+
+
+@dataclass(frozen=True, slots=True, config=ConfigDict(populate_by_name=True))
+class IncidentLog:
     id: str
     type: str
     summary: str
-    agent: _Agent
     created_at: AwareDatetime
+    # the user ID of the agent
+    agent_id: str = Field(validation_alias=AliasPath("agent", "id"))
 
 
-class Incident(BaseModel):
+@dataclass(slots=True)
+class Incident:
+    """A resolved incident, its logs are added once they are fetched."""
+
     id: str
     title: str
     summary: str
@@ -26,7 +51,7 @@ class Incident(BaseModel):
 
     def is_incident_for_user(self, user_id: str) -> bool:
         """Check if the incident is for a specific user."""
-        return any(log.agent.id == user_id for log in self.logs or [])
+        return any(log.agent_id == user_id for log in self.logs or [])
 
     @property
     def acknowledged_time(self) -> AwareDatetime | None:
@@ -54,14 +79,33 @@ class Incident(BaseModel):
             return None
 
 
-def get_incidents(
-    pd_client: pagerduty.RestApiV2Client,
+# the validation schemas are built once, not on every response
+_INCIDENTS_ADAPTER = TypeAdapter(list[Incident])
+_INCIDENT_LOGS_ADAPTER = TypeAdapter(list[IncidentLog])
+
+
+def get_incidents(  # noqa: PLR0913
+    pd_client: "pagerduty.RestApiV2Client",
     user_id: str,
     since: date,
     until: date,
+    *,
+    cache: ResponseCache | None = None,
+    rate_limiter: TokenBucket | None = None,
+    max_workers: int = MAX_WORKERS,
 ) -> list[Incident]:
-    """Get all resolved incidents."""
-    user = pd_client.rget(f"users/{user_id}")
+    """Get all resolved incidents for a user.
+
+    The logs of each incident are needed to know if the user worked on it, so
+    they are fetched concurrently on a thread pool bounded by `max_workers`
+    and throttled by `rate_limiter`.
+    """
+    user = _cached(
+        cache,
+        make_key("users", user_id),
+        USER_CACHE_TTL,
+        lambda: pd_client.rget(f"users/{user_id}"),
+    )
     assert isinstance(user, dict)
 
     timezone = user["time_zone"]
@@ -71,54 +115,169 @@ def get_incidents(
         since=since,
         until=until,
         timezone=timezone,
+        cache=cache,
+    )
+
+    # only fetch the logs of incidents the user did something on
+    user_incident_ids = get_user_incident_ids(
+        pd_client=pd_client,
+        user_id=user_id,
+        since=since,
+        until=until,
+        timezone=timezone,
+        cache=cache,
     )
+    incidents = [incident for incident in incidents if incident.id in user_incident_ids]
 
-    user_incidents = []
-    for incident in incidents:
-        logs = get_incident_logs(pd_client, incident.id, timezone)
-        incident.logs = logs
-        if incident.is_incident_for_user(user_id):
-            user_incidents.append(incident)
+    limiter = rate_limiter or get_rate_limiter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # map keeps the logs in the same order as the incidents
+        all_logs = pool.map(
+            lambda incident: get_incident_logs(
+                pd_client,
+                incident.id,
+                timezone,
+                cache=cache,
+                rate_limiter=limiter,
+            ),
+            incidents,
+        )
+        for incident, logs in zip(incidents, all_logs, strict=True):
+            incident.logs = logs
 
-    return user_incidents
+    return [
+        incident for incident in incidents if incident.is_incident_for_user(user_id)
+    ]
 
 
-def get_incidents_for_teams(
-    pd_client: pagerduty.RestApiV2Client,
+def get_incidents_for_teams(  # noqa: PLR0913
+    pd_client: "pagerduty.RestApiV2Client",
     team_ids: list[str],
     since: date,
     until: date,
     timezone: str = "UTC",
+    *,
+    cache: ResponseCache | None = None,
 ) -> list[Incident]:
     """Get all resolved incidents for a specific user."""
-    incidents = pd_client.list_all(
-        "incidents",
-        params={
-            "since": since.isoformat(),
-            "until": until.isoformat(),
-            "team_ids[]": team_ids,
-            "statuses[]": ["resolved"],
-            "time_zone": timezone,
-        },
+    params = {
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "team_ids[]": team_ids,
+        "statuses[]": ["resolved"],
+        "time_zone": timezone,
+    }
+    incidents = _cached(
+        cache,
+        make_key("incidents", params),
+        INCIDENTS_CACHE_TTL,
+        lambda: list(pd_client.list_all("incidents", params=params)),
     )
 
-    adapter = TypeAdapter(list[Incident])
-    return adapter.validate_python(incidents)
+    return _INCIDENTS_ADAPTER.validate_python(incidents)
+
+
+def get_user_incident_ids(  # noqa: PLR0913
+    pd_client: "pagerduty.RestApiV2Client",
+    user_id: str,
+    since: date,
+    until: date,
+    timezone: str = "UTC",
+    *,
+    cache: ResponseCache | None = None,
+) -> set[str]:
+    """Get the IDs of the incidents a user acknowledged, resolved or acted on.
+
+    This is a single paginated request for the user's log entries, which is far
+    cheaper than fetching the logs of every incident of the user's teams.
+    """
+    path = f"users/{user_id}/log_entries"
+    params = {
+        "since": since.isoformat(),
+        # actions on the last day's incidents can happen after midnight
+        "until": (until + timedelta(days=1)).isoformat(),
+        "is_overview": "true",
+        "time_zone": timezone,
+    }
+    log_entries = _cached(
+        cache,
+        make_key(path, params),
+        INCIDENTS_CACHE_TTL,
+        lambda: _list_log_entries(pd_client, path, params),
+    )
+
+    return {
+        log_entry["incident"]["id"]
+        for log_entry in log_entries
+        if log_entry.get("incident")
+    }
 
 
 def get_incident_logs(
-    pd_client: pagerduty.RestApiV2Client,
+    pd_client: "pagerduty.RestApiV2Client",
     incident_id: str,
     timezone: str,
+    *,
+    cache: ResponseCache | None = None,
+    rate_limiter: TokenBucket | None = None,
 ) -> list[IncidentLog]:
     """Get logs for a specific incident."""
-    incident_logs = pd_client.rget(
-        f"incidents/{incident_id}/log_entries",
-        params={
-            "is_overview": "true",
-            "time_zone": timezone,
-        },
+    path = f"incidents/{incident_id}/log_entries"
+    params = {
+        "is_overview": "true",
+        "time_zone": timezone,
+    }
+    incident_logs = _cached(
+        cache,
+        make_key(path, params),
+        INCIDENT_LOGS_CACHE_TTL,
+        lambda: _rget(pd_client, path, params, rate_limiter),
     )
 
-    adapter = TypeAdapter(list[IncidentLog])
-    return adapter.validate_python(incident_logs)
+    return _INCIDENT_LOGS_ADAPTER.validate_python(incident_logs)
+
+
+def _list_log_entries(
+    pd_client: "pagerduty.RestApiV2Client",
+    path: str,
+    params: dict[str, Any],
+) -> list[dict[str, Any]]:
+    """Get every page of a user's log entries.
+
+    The client only paginates the paths it knows, and the user's log entries
+    aren't one of them, so the pages are requested directly.
+    """
+    log_entries: list[dict[str, Any]] = []
+    while True:
+        response = pd_client.get(
+            path,
+            params={**params, "offset": len(log_entries), "limit": PAGE_SIZE},
+        )
+        response.raise_for_status()
+        page = response.json()
+        log_entries.extend(page["log_entries"])
+        if not page.get("more") or not page["log_entries"]:
+            return log_entries
+
+
+def _cached(
+    cache: ResponseCache | None,
+    key: str,
+    ttl: float,
+    func: Callable[[], Any],
+) -> Any:
+    if cache is None:
+        return func()
+    return cache.get_or_set(CACHE_NAMESPACE, key, ttl, func)
+
+
+def _rget(
+    pd_client: "pagerduty.RestApiV2Client",
+    path: str,
+    params: dict[str, Any],
+    rate_limiter: TokenBucket | None,
+) -> Any:
+    if rate_limiter is not None:
+        rate_limiter.acquire()
+        rate_limiter.stats.increment("requests")
+    return pd_client.rget(path, params=params)
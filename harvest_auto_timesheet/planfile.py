@@ -0,0 +1,120 @@
+"""Plans saved by a dry run, to be reviewed and applied later.
+
+A dry run makes all the reads and plans the week, but instead of writing to
+Harvest it saves the plan with the number of requests and the time each phase
+took or is expected to take. Plans are saved as JSON, or as NDJSON when the
+file name ends with `.ndjson`: a header line followed by one operation per
+line, which is easier to grep and diff.
+"""
+
+import json
+from datetime import date, datetime
+from pathlib import Path
+
+from pydantic import AwareDatetime, BaseModel
+
+from harvest_auto_timesheet.planner import Operation, Plan
+from harvest_auto_timesheet.ratelimit import TokenBucket
+from harvest_auto_timesheet.util import write_atomic
+
+# the assumed time taken by a single Harvest write, excluding rate limiting
+WRITE_LATENCY = 0.25
+
+
+class Phase(BaseModel):
+    name: str
+    requests: int
+    seconds: float
+    estimated: bool  # False when measured during the dry run
+
+
+class PlanFile(BaseModel):
+    created_at: AwareDatetime
+    week_start: date
+    phases: list[Phase]
+    plan: Plan
+
+    @classmethod
+    def load(cls, path: str | Path) -> "PlanFile":
+        """Load a plan saved as JSON or NDJSON."""
+        path = Path(path)
+        raw = path.read_text(encoding="utf-8")
+        if path.suffix != ".ndjson":
+            return cls.model_validate_json(raw)
+
+        header, *lines = raw.splitlines()
+        return cls.model_validate(
+            {
+                **json.loads(header),
+                "plan": Plan(
+                    operations=[
+                        Operation.model_validate_json(line) for line in lines if line
+                    ]
+                ),
+            }
+        )
+
+    def save(self, path: str | Path) -> None:
+        """Save the plan, as NDJSON if the file name ends with `.ndjson`.
+
+        The file is replaced atomically, so a dry run that crashes never
+        leaves a truncated plan to be applied.
+        """
+        if Path(path).suffix != ".ndjson":
+            write_atomic(path, self.model_dump_json(indent=2))
+            return
+
+        lines = [
+            self.model_dump_json(exclude={"plan"}),
+            *(operation.model_dump_json() for operation in self.plan.operations),
+        ]
+        write_atomic(path, "\n".join(lines) + "\n")
+
+    @classmethod
+    def create(  # noqa: PLR0913
+        cls,
+        *,
+        week_start: date,
+        plan: Plan,
+        created_at: datetime,
+        reads: list[Phase],
+        rate_limiter: TokenBucket,
+        max_concurrency: int,
+    ) -> "PlanFile":
+        """Create the plan file with the measured reads and estimated writes."""
+        writes = len(plan.operations)
+        return cls(
+            created_at=created_at,
+            week_start=week_start,
+            phases=[
+                *reads,
+                Phase(
+                    name="write",
+                    requests=writes,
+                    seconds=estimate_seconds(writes, rate_limiter, max_concurrency),
+                    estimated=True,
+                ),
+            ],
+            plan=plan,
+        )
+
+
+def estimate_seconds(
+    requests: int, rate_limiter: TokenBucket, max_concurrency: int
+) -> float:
+    """Estimate the time taken to send requests concurrently under a rate limit.
+
+    Args:
+        requests (int): The number of requests to send.
+        rate_limiter (TokenBucket): The rate limiter the requests go through.
+        max_concurrency (int): The number of requests sent at the same time.
+
+    Returns:
+        float: Whichever is slower of the rate limit and the concurrency.
+
+    """
+    if requests == 0:
+        return 0.0
+
+    batches = -(-requests // max_concurrency)
+    return max(rate_limiter.estimate_wait(requests), batches * WRITE_LATENCY)
@@ -0,0 +1,755 @@
+"""Plan the time entries for a week as the minimal set of changes to Harvest.
+
+Planning is split from execution so that all the reads happen up front, the
+desired entries are compared with what is already in Harvest and only the
+difference is written. Rerunning a week that is already complete is a no-op.
+"""
+
+import asyncio
+from collections import defaultdict
+from collections.abc import Callable, Container, Iterable
+from datetime import date, datetime
+from enum import StrEnum
+from typing import NamedTuple
+
+from pydantic import BaseModel
+from rich.console import Console
+
+from harvest_auto_timesheet.allocation import (
+    DEFAULT_ALLOCATION,
+    DEFAULT_HOURS_PER_DAY,
+    Allocation,
+)
+from harvest_auto_timesheet.classify import DEFAULT_CLASSIFIER, Classifier
+from harvest_auto_timesheet.dedup import WriteIndex, get_digest
+from harvest_auto_timesheet.entries import TimeEntryIndex
+from harvest_auto_timesheet.gcal import CalendarEvent
+from harvest_auto_timesheet.harvest import (
+    AsyncHarvest,
+    ExternalReference,
+    Harvest,
+    NewTimeEntry,
+    TimeEntry,
+)
+from harvest_auto_timesheet.holiday import DayOff, DayOffKind, HolidayIndex
+from harvest_auto_timesheet.intervals import (
+    Interval,
+    WorkingHours,
+    clip,
+    get_hours,
+    resolve_overlaps,
+)
+from harvest_auto_timesheet.notes import NoteKind, get_advice, get_joke
+from harvest_auto_timesheet.pagerd import Incident
+from harvest_auto_timesheet.tasks import ProjectEnum, TaskEnum
+
+console = Console()
+
+# hours are compared with a tolerance as Harvest may round them
+HOURS_TOLERANCE = 0.01
+WORKING_HOURS = WorkingHours()
+
+# an incident during a meeting takes the time over from the meeting
+MEETING_PRIORITY = 1
+INCIDENT_PRIORITY = 2
+
+# The project/task combinations the remaining hours of a day are split across.
+FILLER_TASKS: list[tuple[int, int, Callable[[], str]]] = [
+    (ProjectEnum.EYECUE_GENERAL.value, TaskEnum.ENGINEERING.value, get_joke),
+    (ProjectEnum.SOC2.value, TaskEnum.ENGINEERING.value, get_advice),
+    (ProjectEnum.VIDEO_STORAGE_PLAYBACK.value, TaskEnum.ENGINEERING.value, get_advice),
+    (ProjectEnum.CAMERA_CONFIG_API.value, TaskEnum.ENGINEERING.value, get_advice),
+]
+
+_NOTES_FUNCS: dict[NoteKind, Callable[[], str]] = {
+    NoteKind.JOKE: get_joke,
+    NoteKind.ADVICE: get_advice,
+}
+
+# the external references of the filler entries start with this
+FILLER_PREFIX = "filler:"
+
+_EntryKey = tuple[date, int, int, str | None]
+
+
+class OperationType(StrEnum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class Operation(BaseModel):
+    """A single write to Harvest."""
+
+    type: OperationType
+    entry: NewTimeEntry | None = None  # the values to create or update
+    time_entry_id: int | None = None  # the entry to update or delete
+
+
+class Plan(BaseModel):
+    """The operations needed to bring Harvest in line with the desired entries."""
+
+    operations: list[Operation] = []
+
+    def count(self, type_: OperationType) -> int:
+        """Count the operations of a given type."""
+        return sum(operation.type == type_ for operation in self.operations)
+
+    def summary(self) -> str:
+        """Get a short human readable summary of the plan."""
+        return ", ".join(
+            f"{self.count(type_)} {type_.value}" for type_ in OperationType
+        )
+
+
+class TimedEntry(NamedTuple):
+    """A time entry with the interval of time it was built from."""
+
+    entry: NewTimeEntry
+    interval: Interval
+
+
+def get_timed_calendar_entries(
+    calendar_events: list[CalendarEvent],
+    holidays: Container[date],
+    classifier: Classifier = DEFAULT_CLASSIFIER,
+) -> list[TimedEntry]:
+    """Get the calendar entries with the interval of each event."""
+    entries = []
+    for event in calendar_events:
+        if event.is_all_day():
+            # assuming all day events are not work related
+            console.print(f"Skipping calendar event on {event.start.date_} (all day)")
+            continue
+
+        if event.status != "confirmed":
+            # if the event is not confirmed, we don't want to add it to the timesheet
+            console.print(
+                f"Skipping calendar event on {event.start.datetime} (not confirmed)"
+            )
+            continue
+
+        if event.start.datetime.date() in holidays:  # type: ignore[union-attr]
+            # if the event is on a public holiday,
+            # we don't want to add it to the timesheet
+            console.print(
+                f"Skipping calendar event on {event.start.datetime} (holiday)"
+            )
+            continue
+
+        entries.append(
+            TimedEntry(
+                entry=get_calendar_event_entry(event=event, classifier=classifier),
+                interval=Interval(
+                    start=event.start.datetime,  # type: ignore[arg-type]
+                    end=event.end.datetime,  # type: ignore[arg-type]
+                    priority=MEETING_PRIORITY,
+                ),
+            )
+        )
+
+    return entries
+
+
+def get_calendar_event_entry(
+    event: CalendarEvent, classifier: Classifier = DEFAULT_CLASSIFIER
+) -> NewTimeEntry:
+    """Get the time entry for a calendar event, booked to the task of its rule."""
+    assert isinstance(event.start.datetime, datetime)
+    assert isinstance(event.end.datetime, datetime)
+
+    spent_date = event.start.datetime.date()
+    hours = (event.end.datetime - event.start.datetime).total_seconds() / 3600
+
+    project_id, task_id = classifier.classify_event(event) or (
+        ProjectEnum.FM_INTERNAL.value,
+        TaskEnum.INTERNAL_MEETING.value,
+    )
+
+    return NewTimeEntry(
+        project_id=project_id,
+        task_id=task_id,
+        spent_date=spent_date,
+        hours=hours,
+        notes=event.summary,
+        external_reference=ExternalReference(id=f"gcal:{event.id}")
+        if event.id
+        else None,
+    )
+
+
+def get_holiday_entry(
+    weekday: date,
+    day_off: DayOff | None = None,
+    hours: float = DEFAULT_HOURS_PER_DAY,
+) -> NewTimeEntry:
+    """Get the time entry for a holiday, or for leave if the day off is leave."""
+    if day_off is not None and day_off.kind == DayOffKind.LEAVE:
+        return NewTimeEntry(
+            project_id=ProjectEnum.FM_INTERNAL.value,
+            task_id=TaskEnum.LEAVE.value,
+            spent_date=weekday,
+            hours=hours,
+            notes=day_off.name,
+            external_reference=ExternalReference(id=f"day-off:{weekday}"),
+        )
+
+    return NewTimeEntry(
+        project_id=ProjectEnum.FM_INTERNAL.value,
+        task_id=TaskEnum.PUBLIC_HOLIDAY.value,
+        spent_date=weekday,
+        hours=hours,
+        notes="Public holiday",
+        external_reference=ExternalReference(id=f"day-off:{weekday}"),
+    )
+
+
+def get_timed_pager_duty_entries(
+    incidents: list[Incident], classifier: Classifier = DEFAULT_CLASSIFIER
+) -> list[TimedEntry]:
+    """Get the PagerDuty entries with the interval each incident was worked on."""
+    entries = []
+    for incident in incidents:
+        if (duration := incident.duration) is None:
+            console.print(
+                f"[bold yellow]Warning:[/bold yellow] Incident {incident.id} "
+                "has no duration. Skipping entry."
+            )
+            continue
+
+        project_id, task_id = classifier.classify_incident(incident) or (
+            ProjectEnum.EYECUE_GENERAL.value,
+            TaskEnum.L3_ON_CALL.value,
+        )
+        entry = NewTimeEntry(
+            project_id=project_id,
+            task_id=task_id,
+            spent_date=incident.resolved_at.date(),
+            hours=duration.total_seconds() / 3600,
+            notes=f"{incident.summary}\n{incident.html_url}",
+            external_reference=ExternalReference(
+                id=f"pagerduty:{incident.id}", permalink=incident.html_url
+            ),
+        )
+        entries.append(
+            TimedEntry(
+                entry=entry,
+                interval=Interval(
+                    start=incident.acknowledged_time,  # type: ignore[arg-type]
+                    end=incident.resolved_time,  # type: ignore[arg-type]
+                    priority=INCIDENT_PRIORITY,
+                ),
+            )
+        )
+
+    return entries
+
+
+def get_filler_tasks(
+    allocation: Allocation = DEFAULT_ALLOCATION,
+) -> tuple[list[tuple[int, int, Callable[[], str]]], list[float]]:
+    """Get the filler tasks of an allocation and their weights."""
+    if allocation.filler is None:
+        return FILLER_TASKS, [1.0] * len(FILLER_TASKS)
+
+    return (
+        [
+            (task.project_id, task.task_id, _NOTES_FUNCS[task.notes])
+            for task in allocation.filler
+        ],
+        [task.weight for task in allocation.filler],
+    )
+
+
+def get_fill_entries(
+    remaining: dict[date, float], allocation: Allocation = DEFAULT_ALLOCATION
+) -> list[NewTimeEntry]:
+    """Get the time entries filling the remaining hours of many days.
+
+    The hours of all the days are randomly split across the filler tasks at
+    once, see `Allocation.split`.
+
+    Args:
+        remaining (dict[date, float]): The hours left to fill on each day.
+        allocation (Allocation): The filler tasks, their weights and the
+            granularity of the split.
+
+    Returns:
+        list[NewTimeEntry]: The filler entries, without the empty ones.
+
+    """
+    days = [day for day, hours in remaining.items() if hours > 0]
+    if not days:
+        return []
+
+    filler_tasks, weights = get_filler_tasks(allocation)
+    hours_per_task = allocation.split([remaining[day] for day in days], weights=weights)
+
+    return [
+        NewTimeEntry(
+            project_id=project_id,
+            task_id=task_id,
+            spent_date=day,
+            hours=float(task_hours),
+            notes=notes_func(),
+            external_reference=ExternalReference(id=f"{FILLER_PREFIX}{day}:{slot}"),
+        )
+        for day, row in zip(days, hours_per_task, strict=True)
+        for slot, ((project_id, task_id, notes_func), task_hours) in enumerate(
+            zip(filler_tasks, row, strict=True)
+        )
+        if task_hours > 0
+    ]
+
+
+def _get_key(entry: NewTimeEntry) -> _EntryKey:
+    return (entry.spent_date, entry.project_id, entry.task_id, entry.notes)
+
+
+def _get_existing_key(entry: TimeEntry) -> _EntryKey:
+    return (entry.spent_date, entry.project_id, entry.task_id, entry.notes)
+
+
+def get_external_reference(entry: TimeEntry) -> ExternalReference | None:
+    """Get the external reference of an entry created by this tool, if any."""
+    return entry.external_reference if entry.is_generated else None
+
+
+def _get_task(entry: TimeEntry) -> tuple[int, int]:
+    return entry.project_id, entry.task_id
+
+
+def _get_day_off(holidays: Container[date], day: date) -> DayOff | None:
+    return holidays.get(day) if isinstance(holidays, HolidayIndex) else None
+
+
+def _is_same_hours(a: float, b: float) -> bool:
+    return abs(a - b) < HOURS_TOLERANCE
+
+
+def resolve_timed_entries(
+    timed_entries: list[TimedEntry], working_hours: WorkingHours = WORKING_HOURS
+) -> tuple[list[NewTimeEntry], dict[date, float]]:
+    """Book overlapping entries once and get the hours booked on each day.
+
+    Each entry is trimmed to the time it wins against overlapping entries of
+    higher priority, and dropped if it wins none. The hours booked on a day
+    only count the time within working hours, so that time out of hours, such
+    as an incident at night, is booked on top of a full day.
+
+    Args:
+        timed_entries (list[TimedEntry]): The calendar and incident entries.
+        working_hours (WorkingHours): The hours of a working day.
+
+    Returns:
+        tuple[list[NewTimeEntry], dict[date, float]]: The entries to book,
+            and the hours they book within working hours on each day.
+
+    """
+    segments = resolve_overlaps([timed.interval for timed in timed_entries])
+
+    hours_by_index: dict[int, float] = defaultdict(float)
+    booked_hours: dict[date, float] = defaultdict(float)
+    for segment in segments:
+        hours_by_index[segment.index] += segment.hours
+        spent_date = timed_entries[segment.index].entry.spent_date
+        window = working_hours.get_window(spent_date, segment.start.tzinfo)
+        booked_hours[spent_date] += get_hours(clip([segment], *window))
+
+    entries = []
+    for index, (entry, _) in enumerate(timed_entries):
+        hours = hours_by_index[index]
+        if _is_same_hours(hours, 0):
+            console.print(
+                f"Skipping {entry.notes!r} on {entry.spent_date} (overlapped)"
+            )
+        elif _is_same_hours(hours, entry.hours):
+            entries.append(entry)
+        else:
+            entries.append(entry.model_copy(update={"hours": round(hours, 6)}))
+
+    return entries, booked_hours
+
+
+def plan_week(  # noqa: PLR0913
+    weekdays: list[date],
+    calendar_events: list[CalendarEvent],
+    incidents: list[Incident],
+    existing_entries: Iterable[TimeEntry],
+    holidays: Container[date],
+    *,
+    prune: bool = False,
+    working_hours: WorkingHours = WORKING_HOURS,
+    allocation: Allocation = DEFAULT_ALLOCATION,
+    classifier: Classifier = DEFAULT_CLASSIFIER,
+    user_id: int | None = None,
+) -> Plan:
+    """Plan the writes needed to complete the timesheet for the given days.
+
+    Entries for calendar events, holidays and incidents are matched against the
+    existing entries by their external reference, or by date, project, task and
+    notes for the entries created before references were added. Missing entries
+    are created and entries that differ are updated. The rest of each day
+    is split across the filler tasks, resizing any filler that already exists
+    instead of adding more. Overlapping calendar events and incidents are
+    only booked once, see `resolve_timed_entries`.
+
+    Args:
+        weekdays (list[date]): The days to fill.
+        calendar_events (list[CalendarEvent]): The calendar events for the days.
+        incidents (list[Incident]): The user's PagerDuty incidents for the days.
+        existing_entries (Iterable[TimeEntry]): The time entries already in
+            Harvest, a `TimeEntryIndex` is used as is instead of indexing them.
+        holidays (Container[date]): The days off, a `HolidayIndex` also tells
+            leave apart from holidays.
+        prune (bool): Delete the generated calendar, holiday and incident
+            entries that no longer match a desired entry, for example for a
+            cancelled meeting. Entries added by hand are never deleted.
+        working_hours (WorkingHours): The hours of a working day, the filler
+            only fills the part of them that isn't booked.
+        allocation (Allocation): The hours to book on each day and how the
+            filler splits them.
+        classifier (Classifier): The rules booking the events and incidents
+            to other projects and tasks than the default ones.
+        user_id (int | None): The user whose timesheet is filled, the entries
+            of other users, read with an admin token, are then ignored.
+
+    Returns:
+        Plan: The operations to execute.
+
+    """
+    operations: list[Operation] = []
+    timed_entries, booked_hours = resolve_timed_entries(
+        [
+            *get_timed_calendar_entries(calendar_events, holidays, classifier),
+            *get_timed_pager_duty_entries(incidents, classifier),
+        ],
+        working_hours,
+    )
+
+    existing_index = (
+        existing_entries
+        if isinstance(existing_entries, TimeEntryIndex)
+        else TimeEntryIndex(existing_entries)
+    )
+    # the IDs of the existing entries matched to a desired entry
+    matched: set[int] = set()
+
+    targets = allocation.get_targets(weekdays)
+    holiday_entries = [
+        get_holiday_entry(weekday, _get_day_off(holidays, weekday), targets[weekday])
+        for weekday in weekdays
+        if weekday in holidays and targets[weekday] > 0
+    ]
+    for entry in holiday_entries:
+        booked_hours[entry.spent_date] += entry.hours
+    for entry in [*timed_entries, *holiday_entries]:
+        match = _find_existing(entry, existing_index, matched, user_id)
+        operations.extend(_plan_fixed_entry(entry, match))
+
+    # the days without any filler yet are filled all at once
+    to_fill: dict[date, float] = {}
+    for weekday in weekdays:
+        filler = []
+        # the hours of the entries matched, resized or deleted by the plan
+        planned_hours = 0.0
+        for existing in existing_index.get_day(weekday, user_id):
+            if existing.id in matched:
+                planned_hours += existing.hours
+            elif _is_filler(existing):
+                filler.append(existing)
+                planned_hours += existing.hours
+            elif prune and existing.is_generated:
+                operations.append(
+                    Operation(type=OperationType.DELETE, time_entry_id=existing.id)
+                )
+                planned_hours += existing.hours
+        # the rest of the day's total was added by hand and still counts
+        booked_hours[weekday] += max(
+            0.0, existing_index.get_hours(weekday, user_id) - planned_hours
+        )
+
+        if weekday in holidays:
+            continue
+        remaining_hours = max(0.0, targets[weekday] - booked_hours[weekday])
+        if _is_same_hours(sum(existing.hours for existing in filler), 0):
+            to_fill[weekday] = remaining_hours
+        else:
+            operations.extend(_plan_filler(weekday, remaining_hours, filler))
+
+    operations.extend(
+        Operation(type=OperationType.CREATE, entry=entry)
+        for entry in get_fill_entries(to_fill, allocation)
+    )
+    return Plan(operations=operations)
+
+
+def _is_filler(entry: TimeEntry) -> bool:
+    """Check if an entry is generated filler, the only ones resized or deleted."""
+    return (
+        entry.is_generated
+        and entry.external_reference is not None
+        and entry.external_reference.id.startswith(FILLER_PREFIX)
+    )
+
+
+def _find_existing(
+    entry: NewTimeEntry,
+    existing_index: TimeEntryIndex,
+    matched: set[int],
+    user_id: int | None,
+) -> TimeEntry | None:
+    """Find the existing entry for a desired entry and mark it as matched."""
+    candidates = [
+        candidate
+        for candidate in existing_index.get_task(
+            entry.project_id, entry.task_id, entry.spent_date, user_id
+        )
+        if candidate.notes == entry.notes
+    ]
+    if (
+        entry.external_reference is not None
+        and (found := existing_index.find(entry.external_reference.id, user_id))
+        is not None
+        and found.is_generated
+    ):
+        candidates = [found]
+
+    for candidate in candidates:
+        if candidate.id not in matched:
+            matched.add(candidate.id)
+            return candidate
+    return None
+
+
+def _plan_fixed_entry(
+    entry: NewTimeEntry, existing: TimeEntry | None
+) -> list[Operation]:
+    """Plan a calendar, holiday or incident entry given its existing match."""
+    if existing is None:
+        return [Operation(type=OperationType.CREATE, entry=entry)]
+
+    if (
+        _get_existing_key(existing) == _get_key(entry)
+        and _is_same_hours(existing.hours, entry.hours)
+        and get_external_reference(existing) == entry.external_reference
+    ):
+        return []
+
+    return [
+        Operation(
+            type=OperationType.UPDATE,
+            entry=entry,
+            time_entry_id=existing.id,
+        )
+    ]
+
+
+def _plan_filler(
+    weekday: date,
+    remaining_hours: float,
+    filler: list[TimeEntry],
+) -> list[Operation]:
+    """Resize the existing filler entries to the hours of a day not booked."""
+    filler_hours = sum(existing.hours for existing in filler)
+
+    if _is_same_hours(filler_hours, remaining_hours):
+        return []
+
+    if _is_same_hours(remaining_hours, 0):
+        return [
+            Operation(type=OperationType.DELETE, time_entry_id=existing.id)
+            for existing in filler
+        ]
+
+    # keep the existing split and notes, scaled to the remaining hours
+    scale = remaining_hours / filler_hours
+    operations = []
+    for existing in filler:
+        project_id, task_id = _get_task(existing)
+        operations.append(
+            Operation(
+                type=OperationType.UPDATE,
+                time_entry_id=existing.id,
+                entry=NewTimeEntry(
+                    project_id=project_id,
+                    task_id=task_id,
+                    spent_date=weekday,
+                    hours=round(existing.hours * scale, 6),
+                    notes=existing.notes,
+                    external_reference=get_external_reference(existing),
+                ),
+            )
+        )
+
+    return operations
+
+
+def execute_plan(
+    harvest: Harvest,
+    plan: Plan,
+    index: WriteIndex | None = None,
+    *,
+    entries: TimeEntryIndex | None = None,
+    user_id: int | None = None,
+) -> None:
+    """Execute the operations of a plan one after another.
+
+    With an index, creates of entries already written are skipped, or turned
+    into updates if the entry changed, and every write is recorded. The
+    entries, if given, are the ones fetched from Harvest: a record of the
+    index whose entry isn't in them was deleted since, so it is dropped and
+    the entry created again. They are updated in place with the result of
+    every write. The records are kept by user, the one of the token unless
+    `user_id` is given.
+    """
+    if index is not None and user_id is None:
+        user_id = harvest.get_user()["id"]
+    try:
+        for operation in plan.operations:
+            checked = _check_index(operation, index, user_id, entries)
+            if checked is not None:
+                result = _execute_operation(harvest, checked)
+                _record(index, user_id, checked, result)
+                _update_entries(entries, checked, result)
+    finally:
+        if index is not None:
+            index.save()
+
+
+async def execute_plan_async(
+    harvest: AsyncHarvest,
+    plan: Plan,
+    index: WriteIndex | None = None,
+    *,
+    entries: TimeEntryIndex | None = None,
+    user_id: int | None = None,
+) -> None:
+    """Execute the operations of a plan concurrently, see `execute_plan`.
+
+    A failed operation doesn't cancel the others, so every write that lands
+    on Harvest is recorded before the index is saved and the first error is
+    raised.
+    """
+    if index is not None and user_id is None:
+        user_id = (await harvest.get_user())["id"]
+
+    async def execute(operation: Operation) -> None:
+        checked = _check_index(operation, index, user_id, entries)
+        if checked is not None:
+            result = await _execute_operation_async(harvest, checked)
+            _record(index, user_id, checked, result)
+            _update_entries(entries, checked, result)
+
+    try:
+        results = await asyncio.gather(
+            *(execute(operation) for operation in plan.operations),
+            return_exceptions=True,
+        )
+    finally:
+        if index is not None:
+            index.save()
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+def _check_index(
+    operation: Operation,
+    index: WriteIndex | None,
+    user_id: int | None,
+    entries: TimeEntryIndex | None,
+) -> Operation | None:
+    """Get the operation to execute given what was already written, if any."""
+    if (
+        index is None
+        or user_id is None
+        or operation.type != OperationType.CREATE
+        or operation.entry is None
+        or operation.entry.external_reference is None
+    ):
+        return operation
+
+    written = index.get(user_id, operation.entry.external_reference.id)
+    if written is None:
+        return operation
+    if entries is not None and entries.get(written.time_entry_id) is None:
+        # deleted from Harvest since it was written
+        index.forget(written.time_entry_id)
+        return operation
+    if written.digest == get_digest(operation.entry):
+        return None
+    return Operation(
+        type=OperationType.UPDATE,
+        entry=operation.entry,
+        time_entry_id=written.time_entry_id,
+    )
+
+
+def _record(
+    index: WriteIndex | None,
+    user_id: int | None,
+    operation: Operation,
+    result: TimeEntry | None,
+) -> None:
+    if index is None or user_id is None:
+        return
+
+    if operation.type == OperationType.DELETE:
+        assert operation.time_entry_id is not None
+        index.forget(operation.time_entry_id)
+    elif (
+        result is not None
+        and operation.entry is not None
+        and operation.entry.external_reference is not None
+    ):
+        index.record(
+            user_id, operation.entry.external_reference.id, result.id, operation.entry
+        )
+
+
+def _update_entries(
+    entries: TimeEntryIndex | None, operation: Operation, result: TimeEntry | None
+) -> None:
+    if entries is None:
+        return
+
+    if operation.type == OperationType.DELETE:
+        assert operation.time_entry_id is not None
+        entries.remove(operation.time_entry_id)
+    elif result is not None:
+        entries.add(result)
+
+
+def _execute_operation(harvest: Harvest, operation: Operation) -> TimeEntry | None:
+    match operation.type:
+        case OperationType.CREATE:
+            assert operation.entry is not None
+            return harvest.add_time_entry(operation.entry)
+        case OperationType.UPDATE:
+            assert operation.entry is not None
+            assert operation.time_entry_id is not None
+            return harvest.update_time_entry(operation.time_entry_id, operation.entry)
+        case OperationType.DELETE:
+            assert operation.time_entry_id is not None
+            harvest.delete_time_entry(time_entry_id=operation.time_entry_id)
+    return None
+
+
+async def _execute_operation_async(
+    harvest: AsyncHarvest, operation: Operation
+) -> TimeEntry | None:
+    match operation.type:
+        case OperationType.CREATE:
+            assert operation.entry is not None
+            return await harvest.add_time_entry(operation.entry)
+        case OperationType.UPDATE:
+            assert operation.entry is not None
+            assert operation.time_entry_id is not None
+            return await harvest.update_time_entry(
+                operation.time_entry_id, operation.entry
+            )
+        case OperationType.DELETE:
+            assert operation.time_entry_id is not None
+            await harvest.delete_time_entry(time_entry_id=operation.time_entry_id)
+    return None
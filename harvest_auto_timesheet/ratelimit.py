@@ -0,0 +1,190 @@
+import asyncio
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+
+import httpx
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"})
+
+
+@dataclass
+class RateLimitStats:
+    """Counters describing how requests were throttled and retried."""
+
+    requests: int = 0  # requests sent, including retries
+    throttled: int = 0  # requests delayed by the token bucket
+    rate_limited: int = 0  # 429 responses received
+    retried: int = 0  # requests sent again after a transient failure
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def increment(self, name: str) -> None:
+        """Increment a counter in a thread-safe way."""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `capacity` requests every `period` seconds.
+
+    Tokens are reserved ahead of time, so the bucket can go into debt and each
+    caller is told how long to wait for its token. This keeps callers in FIFO
+    order and works the same for threads and coroutines.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 100,
+        period: float = 15.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period  # tokens per second
+        self.clock = clock
+        self.stats = RateLimitStats()
+
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserve a token.
+
+        Returns:
+            float: The number of seconds to wait before the token can be used.
+
+        """
+        with self._lock:
+            now = self.clock()
+            elapsed = now - self._updated
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+            self._tokens -= 1
+            delay = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+        if delay > 0:
+            self.stats.increment("throttled")
+        return delay
+
+    def estimate_wait(self, count: int) -> float:
+        """Estimate how long sending `count` requests waits, without reserving.
+
+        Args:
+            count (int): The number of requests to send.
+
+        Returns:
+            float: The number of seconds until the last token is available.
+
+        """
+        with self._lock:
+            elapsed = self.clock() - self._updated
+            tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+        return max(0.0, (count - tokens) / self.rate)
+
+    def acquire(self) -> None:
+        """Block until a token is available."""
+        if (delay := self.reserve()) > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Wait until a token is available without blocking the event loop."""
+        if (delay := self.reserve()) > 0:
+            await asyncio.sleep(delay)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """When and how long to wait before retrying a failed request.
+
+    Rate limited (429) responses are always retried as the request was not
+    processed. Server errors and transport errors are only retried for
+    idempotent methods, to avoid creating the same entry twice.
+    """
+
+    max_retries: int = 5
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    retry_statuses: frozenset[int] = frozenset(
+        {
+            HTTPStatus.TOO_MANY_REQUESTS,
+            HTTPStatus.INTERNAL_SERVER_ERROR,
+            HTTPStatus.BAD_GATEWAY,
+            HTTPStatus.SERVICE_UNAVAILABLE,
+            HTTPStatus.GATEWAY_TIMEOUT,
+        }
+    )
+    retry_methods: frozenset[str] = IDEMPOTENT_METHODS
+
+    def should_retry(
+        self,
+        method: str,
+        attempt: int,
+        response: httpx.Response | None = None,
+    ) -> bool:
+        """Check if a request should be retried.
+
+        Args:
+            method (str): The HTTP method of the request.
+            attempt (int): The number of retries already made.
+            response (httpx.Response | None): The response, or None if the
+                request failed with a transport error.
+
+        Returns:
+            bool: True if the request should be sent again.
+
+        """
+        if attempt >= self.max_retries:
+            return False
+
+        if response is None:
+            return method in self.retry_methods
+
+        if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+            return True
+
+        return (
+            response.status_code in self.retry_statuses and method in self.retry_methods
+        )
+
+    def get_delay(self, attempt: int, response: httpx.Response | None = None) -> float:
+        """Get the number of seconds to wait before the next attempt.
+
+        The `Retry-After` header is honoured when present, otherwise an
+        exponential backoff with full jitter is used.
+        """
+        if (
+            response is not None
+            and (retry_after := _parse_retry_after(response.headers.get("Retry-After")))
+            is not None
+        ):
+            return min(retry_after, self.backoff_max)
+
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, (retry_at - datetime.now(tz=UTC)).total_seconds())
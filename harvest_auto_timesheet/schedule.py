@@ -1,34 +1,48 @@
+import asyncio
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import UTC, date, datetime, time, timedelta
-from typing import Any
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING
 from zoneinfo import ZoneInfo
 
-import holidays
-import pagerduty
-from google.oauth2.service_account import Credentials
 from rich.console import Console
 
-from harvest_auto_timesheet.gcal import CalendarEvent, get_calendar_events
-from harvest_auto_timesheet.harvest import Harvest
-from harvest_auto_timesheet.pagerd import Incident, get_incidents
-from harvest_auto_timesheet.tasks import ProjectEnum, TaskEnum
-from harvest_auto_timesheet.util import (
-    get_advice,
-    get_joke,
-    get_start_of_week,
-    random_numbers_sum,
+from harvest_auto_timesheet.allocation import DEFAULT_ALLOCATION, Allocation
+from harvest_auto_timesheet.cache import ResponseCache
+from harvest_auto_timesheet.checkpoint import Checkpoint
+from harvest_auto_timesheet.classify import DEFAULT_CLASSIFIER, Classifier
+from harvest_auto_timesheet.dedup import WriteIndex
+from harvest_auto_timesheet.entries import TimeEntryIndex
+from harvest_auto_timesheet.gcal import (
+    CalendarEvent,
+    SyncTokenExpiredError,
+    get_calendar_events,
+    get_sync_token,
+    sync_calendar_events,
 )
+from harvest_auto_timesheet.harvest import AsyncHarvest, Harvest
+from harvest_auto_timesheet.holiday import HolidayIndex
+from harvest_auto_timesheet.instrumentation import Instrumentation
+from harvest_auto_timesheet.pagerd import MAX_WORKERS as PAGERDUTY_MAX_WORKERS
+from harvest_auto_timesheet.pagerd import Incident, get_incidents, get_user_incident_ids
+from harvest_auto_timesheet.planfile import Phase, PlanFile
+from harvest_auto_timesheet.planner import (
+    execute_plan,
+    execute_plan_async,
+    plan_week,
+)
+from harvest_auto_timesheet.ratelimit import TokenBucket
+from harvest_auto_timesheet.util import get_start_of_week
 
-console = Console()
+if TYPE_CHECKING:
+    import pagerduty
+    from google.oauth2.service_account import Credentials
 
-SCRUM_CEREMONY_WORDS = [
-    "standup",
-    "stand up",
-    "sprint",
-    "retro",
-    "planning",
-]
+console = Console()
 
-nz_holidays = holidays.NewZealand(prov="Auckland")  # type: ignore[attr-defined]
+TIMEZONE = ZoneInfo("Pacific/Auckland")
 
 
 def _get_weekdays(tz: ZoneInfo | None = None) -> list[date]:
@@ -41,208 +55,428 @@ def _get_weekdays(tz: ZoneInfo | None = None) -> list[date]:
     return [start_of_week + timedelta(days=i) for i in range(5)]  # Monday to Friday
 
 
-def run_schedule(
+def get_time_range(weekdays: list[date], tz: ZoneInfo) -> tuple[datetime, datetime]:
+    """Get the calendar time range covering the given weekdays."""
+    time_min = datetime.combine(weekdays[0], time(hour=0, minute=0)).replace(tzinfo=tz)
+    time_max = datetime.combine(weekdays[-1], time(hour=23, minute=59)).replace(
+        tzinfo=tz
+    )
+    return time_min, time_max
+
+
+def run_schedule(  # noqa: PLR0913
     harvest: Harvest,
-    credentials: Credentials,
+    credentials: "Credentials",
     calendar_id: str,
-    pagerduty_client: pagerduty.RestApiV2Client,
+    pagerduty_client: "pagerduty.RestApiV2Client",
     pagerduty_user_id: str,
+    *,
+    cache: ResponseCache | None = None,
+    checkpoint_path: Path | None = None,
+    pagerduty_rate_limiter: TokenBucket | None = None,
+    pagerduty_max_workers: int = PAGERDUTY_MAX_WORKERS,
+    holidays: HolidayIndex | None = None,
+    allocation: Allocation = DEFAULT_ALLOCATION,
+    classifier: Classifier = DEFAULT_CLASSIFIER,
+    prune: bool = False,
+    write_index: WriteIndex | None = None,
+    instrumentation: Instrumentation | None = None,
 ) -> None:
-    """Run the schedule for the week."""
+    """Run the schedule for the week.
+
+    When `checkpoint_path` is set the run is incremental: if nothing changed in
+    any source since the last run for the same week, nothing else is done.
+    """
     console.print("Running schedule...")
+    started_at = datetime.now(tz=UTC)
+    spans = instrumentation if instrumentation is not None else Instrumentation()
 
-    tz = ZoneInfo("Pacific/Auckland")
+    tz = TIMEZONE
     weekdays = _get_weekdays(tz)  # get the previous 5 working days
+    time_min, time_max = get_time_range(weekdays, tz)
+
+    checkpoint = Checkpoint.load(checkpoint_path) if checkpoint_path else None
+    if (
+        checkpoint is not None
+        and checkpoint.is_for_week(weekdays[0])
+        and not _has_source_changes(
+            checkpoint=checkpoint,
+            credentials=credentials,
+            calendar_id=calendar_id,
+            pagerduty_client=pagerduty_client,
+            pagerduty_user_id=pagerduty_user_id,
+            until=weekdays[-1],
+            instrumentation=spans,
+        )
+        and not _has_harvest_changes(harvest, checkpoint, weekdays)
+    ):
+        console.print("Nothing changed since the last run")
+        return
 
-    time_min = datetime.combine(weekdays[0], time(hour=0, minute=0)).replace(tzinfo=tz)
-    time_max = datetime.combine(weekdays[-1], time(hour=23, minute=59)).replace(
-        tzinfo=tz
+    # the sync token is taken first so changes made while reading aren't missed
+    sync_token = (
+        get_sync_token(credentials, calendar_id, time_min, time_max, spans)
+        if checkpoint_path
+        else None
     )
+    with spans.span("calendar"):
+        calendar_events = get_calendar_events(
+            creds=credentials,
+            calendar_id=calendar_id,
+            time_min=time_min,
+            time_max=time_max,
+            timezone=tz,
+            cache=cache,
+            instrumentation=spans,
+        )
+    with spans.span("incidents"):
+        incidents = get_incidents(
+            pd_client=pagerduty_client,
+            user_id=pagerduty_user_id,
+            since=weekdays[0],
+            until=weekdays[-1],
+            cache=cache,
+            rate_limiter=pagerduty_rate_limiter,
+            max_workers=pagerduty_max_workers,
+        )
+    with spans.span("time_entries"):
+        # an admin token reads the entries of every user
+        user_id = harvest.get_user()["id"]
+        time_entries = TimeEntryIndex(
+            harvest.get_time_entries(from_date=weekdays[0], to_date=weekdays[-1])
+        )
 
-    calendar_events = get_calendar_events(
-        creds=credentials,
-        calendar_id=calendar_id,
-        time_min=time_min,
-        time_max=time_max,
-        timezone=tz,
+    with spans.span("plan"):
+        plan = plan_week(
+            weekdays=weekdays,
+            calendar_events=calendar_events,
+            incidents=incidents,
+            existing_entries=time_entries,
+            holidays=holidays if holidays is not None else HolidayIndex(),
+            allocation=allocation,
+            classifier=classifier,
+            prune=prune,
+            user_id=user_id,
+        )
+    console.print(f"Updating the timesheet: {plan.summary()}")
+    with spans.span("write"):
+        execute_plan(
+            harvest=harvest,
+            plan=plan,
+            index=write_index,
+            entries=time_entries,
+            user_id=user_id,
+        )
+    _print_hours(time_entries, weekdays, user_id)
+
+    if checkpoint_path is not None and sync_token is not None:
+        Checkpoint.create(
+            week_start=weekdays[0],
+            calendar_sync_token=sync_token,
+            started_at=started_at,
+            finished_at=datetime.now(tz=UTC),
+        ).save(checkpoint_path)
+
+    console.print(f"Harvest requests: {harvest.stats}")
+    console.print("Timesheet completed successfully")
+
+
+async def run_schedule_async(  # noqa: PLR0913
+    harvest: AsyncHarvest,
+    credentials: "Credentials",
+    calendar_id: str,
+    pagerduty_client: "pagerduty.RestApiV2Client",
+    pagerduty_user_id: str,
+    *,
+    cache: ResponseCache | None = None,
+    checkpoint_path: Path | None = None,
+    pagerduty_rate_limiter: TokenBucket | None = None,
+    pagerduty_max_workers: int = PAGERDUTY_MAX_WORKERS,
+    holidays: HolidayIndex | None = None,
+    allocation: Allocation = DEFAULT_ALLOCATION,
+    classifier: Classifier = DEFAULT_CLASSIFIER,
+    prune: bool = False,
+    write_index: WriteIndex | None = None,
+    instrumentation: Instrumentation | None = None,
+    dry_run_path: Path | None = None,
+) -> None:
+    """Run the schedule for the week, sending all the writes concurrently.
+
+    All the reads are made up front and in parallel, then the plan for the
+    week is executed in a single concurrent batch. Incremental runs work the
+    same as in `run_schedule`.
+
+    When `dry_run_path` is set nothing is written to Harvest, the plan is saved
+    to that path instead so it can be applied later with `apply_plan`. A dry
+    run always reads everything and doesn't move the checkpoint.
+    """
+    console.print("Running schedule...")
+    started_at = datetime.now(tz=UTC)
+    spans = instrumentation if instrumentation is not None else Instrumentation()
+    if dry_run_path is not None:
+        checkpoint_path = None
+
+    tz = TIMEZONE
+    weekdays = _get_weekdays(tz)  # get the previous 5 working days
+    time_min, time_max = get_time_range(weekdays, tz)
+
+    checkpoint = Checkpoint.load(checkpoint_path) if checkpoint_path else None
+    if checkpoint is not None and checkpoint.is_for_week(weekdays[0]):
+        source_changes, harvest_changes = await asyncio.gather(
+            asyncio.to_thread(
+                _has_source_changes,
+                checkpoint=checkpoint,
+                credentials=credentials,
+                calendar_id=calendar_id,
+                pagerduty_client=pagerduty_client,
+                pagerduty_user_id=pagerduty_user_id,
+                until=weekdays[-1],
+                instrumentation=spans,
+            ),
+            _has_harvest_changes_async(harvest, checkpoint, weekdays),
+        )
+        if not source_changes and not harvest_changes:
+            console.print("Nothing changed since the last run")
+            return
+
+    # the sync token is taken first so changes made while reading aren't missed
+    sync_token = (
+        await asyncio.to_thread(
+            get_sync_token, credentials, calendar_id, time_min, time_max, spans
+        )
+        if checkpoint_path
+        else None
     )
-    console.print(f"Adding {len(calendar_events)} calendar events to the timesheet")
-    for event in calendar_events:
-        if event.is_all_day():
-            # assuming all day events are not work related
-            console.print(f"Skipping calendar event on {event.start.date_} (all day)")
-            continue
-
-        if event.status != "confirmed":
-            # if the event is not confirmed, we don't want to add it to the timesheet
-            console.print(
-                f"Skipping calendar event on {event.start.datetime} (not confirmed)"
+
+    # the requests and time of each read, saved with the plan of a dry run
+    reads: dict[str, Phase] = {}
+
+    # the Google and PagerDuty clients are blocking so run them on threads
+    async def read_calendar() -> list[CalendarEvent]:
+        with _read_phase(spans, "calendar", "calendar", reads):
+            return await asyncio.to_thread(
+                get_calendar_events,
+                creds=credentials,
+                calendar_id=calendar_id,
+                time_min=time_min,
+                time_max=time_max,
+                timezone=tz,
+                cache=cache,
+                instrumentation=spans,
             )
-            continue
 
-        if event.start.datetime.date() in nz_holidays:  # type: ignore[union-attr]
-            # if the event is on a public holiday,
-            # we don't want to add it to the timesheet
-            console.print(
-                f"Skipping calendar event on {event.start.datetime} (holiday)"
+    async def read_incidents() -> list[Incident]:
+        with _read_phase(spans, "incidents", "pagerduty", reads):
+            return await asyncio.to_thread(
+                get_incidents,
+                pd_client=pagerduty_client,
+                user_id=pagerduty_user_id,
+                since=weekdays[0],
+                until=weekdays[-1],
+                cache=cache,
+                rate_limiter=pagerduty_rate_limiter,
+                max_workers=pagerduty_max_workers,
             )
-            continue
 
-        _add_calendar_event(harvest=harvest, event=event)
+    # an admin token reads the entries of every user
+    async def read_time_entries() -> tuple[int, TimeEntryIndex]:
+        with _read_phase(spans, "time_entries", "harvest", reads):
+            user, entries = await asyncio.gather(
+                harvest.get_user(),
+                harvest.get_time_entries(from_date=weekdays[0], to_date=weekdays[-1]),
+            )
+            return user["id"], TimeEntryIndex(entries)
 
-    time_entries = harvest.get_time_entries(
-        from_date=weekdays[0],
-        to_date=weekdays[-1],
+    calendar_events, incidents, (user_id, time_entries) = await asyncio.gather(
+        read_calendar(), read_incidents(), read_time_entries()
     )
 
-    console.print("Filling timesheet with the remaining hours")
-    for weekday in weekdays:
-        if weekday in nz_holidays:
-            _add_holiday(harvest=harvest, weekday=weekday)
-            continue
+    with spans.span("plan"):
+        plan = plan_week(
+            weekdays=weekdays,
+            calendar_events=calendar_events,
+            incidents=incidents,
+            existing_entries=time_entries,
+            holidays=holidays if holidays is not None else HolidayIndex(),
+            allocation=allocation,
+            classifier=classifier,
+            prune=prune,
+            user_id=user_id,
+        )
 
-        _fill_timesheet(
+    if dry_run_path is not None:
+        plan_file = PlanFile.create(
+            week_start=weekdays[0],
+            plan=plan,
+            created_at=started_at,
+            reads=[reads["calendar"], reads["incidents"], reads["time_entries"]],
+            rate_limiter=harvest.rate_limiter,
+            max_concurrency=harvest.max_concurrency,
+        )
+        plan_file.save(dry_run_path)
+        _print_plan_file(plan_file)
+        console.print(f"Dry run, the plan was saved to {dry_run_path}")
+        return
+
+    console.print(f"Updating the timesheet: {plan.summary()}")
+    with spans.span("write"):
+        await execute_plan_async(
             harvest=harvest,
-            time_entries=time_entries,
-            weekday=weekday,
+            plan=plan,
+            index=write_index,
+            entries=time_entries,
+            user_id=user_id,
         )
+    _print_hours(time_entries, weekdays, user_id)
 
-    incidents = get_incidents(
-        pd_client=pagerduty_client,
-        user_id=pagerduty_user_id,
-        since=weekdays[0],
-        until=weekdays[-1],
-    )
-    _add_pager_duty_incidents(harvest=harvest, incidents=incidents)
+    if checkpoint_path is not None and sync_token is not None:
+        Checkpoint.create(
+            week_start=weekdays[0],
+            calendar_sync_token=sync_token,
+            started_at=started_at,
+            finished_at=datetime.now(tz=UTC),
+        ).save(checkpoint_path)
 
+    console.print(f"Harvest requests: {harvest.stats}")
     console.print("Timesheet completed successfully")
 
 
-def _add_calendar_event(
-    harvest: Harvest,
-    event: CalendarEvent,
+async def apply_plan(
+    harvest: AsyncHarvest, path: Path, write_index: WriteIndex | None = None
 ) -> None:
-    """Add a calendar event to the timesheet."""
-    assert isinstance(event.start.datetime, datetime)
-    assert isinstance(event.end.datetime, datetime)
-
-    console.print(f"Adding calendar event on {event.start.datetime}")
-
-    spent_date = event.start.datetime.date()
-    hours = (event.end.datetime - event.start.datetime).total_seconds() / 3600
-
-    task_id = TaskEnum.INTERNAL_MEETING.value
-    # TODO(CW): Remove this? The scrum ceremonies task got removed so no longer needed
-    # if any(word in event.summary.lower() for word in SCRUM_CEREMONY_WORDS):
-    #     task_id = TaskEnum.SCRUM_CEREMONIES.value
-    # else:
-    #     task_id = TaskEnum.INTERNAL_MEETING.value
-
-    harvest.add_time_entry(
-        project_id=ProjectEnum.FM_INTERNAL.value,
-        task_id=task_id,
-        spent_date=spent_date,
-        hours=hours,
-        notes=event.summary,
+    """Execute a plan saved by a dry run.
+
+    The plan is applied as is, so it should be applied soon after the dry run:
+    entries updated or deleted since then may make some operations fail. With
+    a write index, applying the same plan twice doesn't duplicate entries.
+    """
+    plan_file = PlanFile.load(path)
+    _print_plan_file(plan_file)
+    # in the timezone the plans are made in, not UTC
+    if plan_file.week_start != _get_weekdays(TIMEZONE)[0]:
+        console.print(
+            f"[yellow]The plan is for the week of {plan_file.week_start}, "
+            "not the current week"
+        )
+
+    await execute_plan_async(harvest=harvest, plan=plan_file.plan, index=write_index)
+    console.print(f"Harvest requests: {harvest.stats}")
+    console.print("Plan applied successfully")
+
+
+@contextmanager
+def _read_phase(
+    instrumentation: Instrumentation, name: str, service: str, reads: dict[str, Phase]
+) -> Iterator[None]:
+    """Time a read in a span and measure it as a phase of the plan file.
+
+    The reads run at the same time but each on its own service, so the
+    requests recorded for the service while it runs are the read's own. Only
+    the clients instrumented with `instrumentation` are counted.
+    """
+    requests = instrumentation.count_requests(service)
+    started = perf_counter()
+    with instrumentation.span(name):
+        yield
+    reads[name] = Phase(
+        name=name,
+        requests=instrumentation.count_requests(service) - requests,
+        seconds=perf_counter() - started,
+        estimated=False,
     )
 
 
-def _add_holiday(
-    harvest: Harvest,
-    weekday: date,
-) -> None:
-    """Add a holiday to the timesheet."""
-    if weekday in nz_holidays:
-        console.print(f"Adding holiday on {weekday}")
-        harvest.add_time_entry(
-            project_id=ProjectEnum.FM_INTERNAL.value,
-            task_id=TaskEnum.PUBLIC_HOLIDAY.value,
-            spent_date=weekday,
-            hours=8,
-            notes="Public holiday",
+def _print_plan_file(plan_file: PlanFile) -> None:
+    console.print(
+        f"Plan for the week of {plan_file.week_start}: {plan_file.plan.summary()}"
+    )
+    for phase in plan_file.phases:
+        kind = "estimated" if phase.estimated else "measured"
+        console.print(
+            f"  {phase.name}: {phase.requests} requests, {phase.seconds:.1f}s ({kind})"
         )
 
 
-def _fill_timesheet(
-    harvest: Harvest,
-    time_entries: list[dict[str, Any]],
-    weekday: date,
+def _print_hours(
+    time_entries: TimeEntryIndex, weekdays: list[date], user_id: int
 ) -> None:
-    """Fill the timesheet with the remaining hours for the day."""
-    time_entries_for_day = [
-        entry for entry in time_entries if entry["spent_date"] == weekday.isoformat()
-    ]
-    hours = sum(entry["hours"] for entry in time_entries_for_day)
-
-    if hours >= 8:  # noqa: PLR2004
-        console.print(f"Already worked 8 hours on {weekday}")
-        return
-
-    # Add a time entry for each project/task combination.
-    task_entries_to_add = [
-        (ProjectEnum.EYECUE_GENERAL.value, TaskEnum.ENGINEERING.value, get_joke),
-        (ProjectEnum.SOC2.value, TaskEnum.ENGINEERING.value, get_advice),
-        (
-            ProjectEnum.VIDEO_STORAGE_PLAYBACK.value,
-            TaskEnum.ENGINEERING.value,
-            get_advice,
-        ),
-        (ProjectEnum.CAMERA_CONFIG_API.value, TaskEnum.ENGINEERING.value, get_advice),
-    ]
-
-    # Randomly distribute the remaining hours across the tasks.
-    remaining_hours = 8 - hours
-    hours_per_project: list[float] = random_numbers_sum(
-        total_sum=remaining_hours,
-        num_elements=len(task_entries_to_add),
+    # the index was updated with every write, so it holds the timesheet as is
+    hours = ", ".join(
+        f"{day:%a} {time_entries.get_hours(day, user_id):g}h" for day in weekdays
     )
+    console.print(f"Hours booked: {hours}")
 
-    console.print(
-        f"Remaining hours to fill for {weekday}: {remaining_hours:.2f} "
-        f"({len(task_entries_to_add)} tasks)"
-    )
 
-    for (
-        project_id,
-        task_id,
-        notes_func,
-    ), hours in zip(task_entries_to_add, hours_per_project, strict=True):
-        console.print(
-            f"Adding {hours:.2f} hours for project {project_id} "
-            f"and task {task_id} on {weekday}"
-        )
-        _response = harvest.add_time_entry(
-            project_id=project_id,
-            task_id=task_id,
-            spent_date=weekday,
-            hours=hours,
-            notes=notes_func(),
+def _has_source_changes(  # noqa: PLR0913
+    *,
+    checkpoint: Checkpoint,
+    credentials: "Credentials",
+    calendar_id: str,
+    pagerduty_client: "pagerduty.RestApiV2Client",
+    pagerduty_user_id: str,
+    until: date,
+    instrumentation: Instrumentation | None = None,
+) -> bool:
+    """Check if the calendar or PagerDuty changed since the checkpoint."""
+    try:
+        calendar_sync = sync_calendar_events(
+            creds=credentials,
+            calendar_id=calendar_id,
+            sync_token=checkpoint.calendar_sync_token,
+            instrumentation=instrumentation,
         )
-        # console.print_json(data=response, indent=2)
+    except SyncTokenExpiredError:
+        console.print("Calendar sync token expired since the last run")
+        return True
+
+    if calendar_sync.changed_event_ids:
+        console.print("Calendar events changed since the last run")
+        return True
 
-    console.print(f"Filled {remaining_hours:.2f} hours for {weekday}")
+    if get_user_incident_ids(
+        pd_client=pagerduty_client,
+        user_id=pagerduty_user_id,
+        since=checkpoint.incidents_updated,
+        until=until,
+    ):
+        console.print("PagerDuty incidents changed since the last run")
+        return True
+
+    return False
 
 
-def _add_pager_duty_incidents(
+def _has_harvest_changes(
     harvest: Harvest,
-    incidents: list[Incident],
-) -> None:
-    """Add PagerDuty incidents to the timesheet."""
-    for incident in incidents:
-        console.print(f"Adding PagerDuty incident {incident.id} to timesheet")
-
-        if (duration := incident.duration) is None:
-            console.print(
-                f"[bold yellow]Warning:[/bold yellow] Incident {incident.id} "
-                "has no duration. Skipping entry."
-            )
-            continue
-
-        hours = duration.total_seconds() / 3600
-        harvest.add_time_entry(
-            project_id=ProjectEnum.EYECUE_GENERAL.value,
-            task_id=TaskEnum.L3_ON_CALL.value,
-            spent_date=incident.resolved_at.date(),
-            hours=hours,
-            notes=f"{incident.summary}\n{incident.html_url}",
-        )
+    checkpoint: Checkpoint,
+    weekdays: list[date],
+) -> bool:
+    """Check if any time entry of the week was changed since the checkpoint."""
+    entries = harvest.iter_time_entries(
+        from_date=weekdays[0],
+        to_date=weekdays[-1],
+        per_page=1,
+        updated_since=checkpoint.harvest_updated,
+    )
+    if next(entries, None) is None:
+        return False
+
+    console.print("Time entries changed since the last run")
+    return True
+
+
+async def _has_harvest_changes_async(
+    harvest: AsyncHarvest,
+    checkpoint: Checkpoint,
+    weekdays: list[date],
+) -> bool:
+    """Check if any time entry of the week was changed since the checkpoint."""
+    async for _ in harvest.iter_time_entries(
+        from_date=weekdays[0],
+        to_date=weekdays[-1],
+        per_page=1,
+        updated_since=checkpoint.harvest_updated,
+    ):
+        console.print("Time entries changed since the last run")
+        return True
+
+    return False
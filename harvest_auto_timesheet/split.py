@@ -0,0 +1,68 @@
+"""Vectorised random splits of many totals at once.
+
+`util.random_numbers_sum` splits a single total in a Python loop. This splits
+a whole batch of totals, for example every day of every user in a fleet, with
+a few NumPy operations. Each total is scaled to integer units and split with
+Dirichlet weights, then rounded with the largest remainder method so every
+row sums exactly to its total. The units are either decimal places or a
+fixed increment such as a quarter of an hour.
+"""
+
+import numpy as np
+import numpy.typing as npt
+
+
+def split_totals(  # noqa: PLR0913
+    totals: npt.ArrayLike,
+    num_elements: int,
+    rng: np.random.Generator,
+    decimals: int = 6,
+    *,
+    weights: npt.ArrayLike | None = None,
+    unit: float | None = None,
+) -> npt.NDArray[np.float64]:
+    """Randomly split each total into parts that sum up to it.
+
+    Args:
+        totals (ArrayLike): The totals to split, one per row.
+        num_elements (int): The number of parts each total is split into.
+        rng (np.random.Generator): The generator, seeded for reproducible splits.
+        decimals (int): Number of decimal places for each part.
+        weights (ArrayLike | None): The relative size of each part on
+            average. Defaults to equal parts.
+        unit (float | None): Split in multiples of this instead of in
+            `decimals` places, the totals are rounded to a multiple of it.
+
+    Returns:
+        NDArray: An array of shape (len(totals), num_elements) where each row
+            sums up to its total, rounded to `decimals` places.
+
+    """
+    scale = 1 / unit if unit is not None else 10**decimals
+    units = np.rint(np.asarray(totals, dtype=np.float64) * scale).astype(np.int64)
+    if units.ndim != 1:
+        msg = "totals must be one-dimensional"
+        raise ValueError(msg)
+    if num_elements <= 0:
+        return np.empty((units.size, 0), dtype=np.float64)
+
+    # a flat Dirichlet is the same as cutting at sorted uniform points, the
+    # weights only move the mean of each part as they sum to num_elements
+    alpha = np.ones(num_elements)
+    if weights is not None:
+        alpha = np.asarray(weights, dtype=np.float64)
+        alpha = alpha * num_elements / alpha.sum()
+    raw = rng.dirichlet(alpha, size=units.size) * units[:, None]
+    parts = np.floor(raw).astype(np.int64)
+
+    # hand the units lost to flooring to the largest remainders
+    missing = units - parts.sum(axis=1)
+    order = np.argsort(parts - raw, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(
+        ranks, order, np.broadcast_to(np.arange(num_elements), order.shape), axis=1
+    )
+    parts += ranks < missing[:, None]
+
+    result: npt.NDArray[np.float64] = np.round(parts / np.float64(scale), decimals)
+    return result
@@ -1,5 +1,7 @@
 import random
 from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+from typing import Any
 
 from httpx import Client
 
@@ -18,8 +20,19 @@ def get_joke() -> str:
         response = client.get(url, headers=headers)
 
     response.raise_for_status()
-    joke_data = response.json()
+    return format_joke(response.json())
 
+
+def format_joke(joke_data: dict[str, Any]) -> str:
+    """Format a joke from the JokeAPI as a single line.
+
+    Args:
+        joke_data (dict): The joke as returned by the JokeAPI.
+
+    Returns:
+        str: The joke, or its setup and delivery for two part jokes.
+
+    """
     if joke_data["type"] == "single":
         return joke_data["joke"]  # type: ignore[no-any-return]
 
@@ -122,3 +135,21 @@ def random_numbers_sum(
         floats[idx] = round(floats[idx] + diff, decimals)
 
     return floats
+
+
+def write_atomic(path: str | Path, content: str | bytes) -> None:
+    """Write a file by replacing it, so a crash never leaves it half written.
+
+    Args:
+        path (str | Path): The file to write, its directories are created.
+        content (str | bytes): The text, written as UTF-8, or the bytes.
+
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f"{path.suffix}.tmp")
+    if isinstance(content, bytes):
+        tmp_path.write_bytes(content)
+    else:
+        tmp_path.write_text(content, encoding="utf-8")
+    tmp_path.replace(path)
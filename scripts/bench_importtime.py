@@ -0,0 +1,76 @@
+"""Benchmark the startup time of the package with `python -X importtime`.
+
+Each module is imported in a fresh interpreter a few times and the fastest
+run is reported, along with the slowest imports it pulled in. With `--max-ms`
+the script exits with an error when a module is slower than the budget, so it
+can run in CI to catch startup regressions.
+
+Usage: python scripts/bench_importtime.py [--max-ms MS] [module ...]
+"""
+
+import argparse
+import subprocess
+import sys
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+DEFAULT_MODULES = [
+    "harvest_auto_timesheet.cli",
+    "harvest_auto_timesheet.context",
+    "harvest_auto_timesheet.schedule",
+]
+
+
+def get_import_times(module: str) -> dict[str, int]:
+    """Get the cumulative import time of every module imported, in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-ms", type=float)
+    args = parser.parse_args()
+
+    over_budget = []
+    for module in args.modules:
+        runs = [get_import_times(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda times: times[module])
+        total_ms = best[module] / 1000
+
+        table = Table(title=f"{module}: {total_ms:.1f}ms")
+        table.add_column("Import")
+        table.add_column("Cumulative (ms)", justify="right")
+        slowest = sorted(best.items(), key=lambda item: item[1], reverse=True)
+        for name, cumulative in slowest[1 : args.top + 1]:
+            table.add_row(name, f"{cumulative / 1000:.1f}")
+        console.print(table)
+
+        if args.max_ms is not None and total_ms > args.max_ms:
+            over_budget.append(module)
+
+    if over_budget:
+        console.print(f"[red]Over the {args.max_ms}ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Benchmark splitting many totals with `split_totals` against `random_numbers_sum`.
+
+Usage: python scripts/bench_split.py [number of totals] [number of parts]
+"""
+
+import sys
+import timeit
+
+import numpy as np
+from rich.console import Console
+
+from harvest_auto_timesheet.split import split_totals
+from harvest_auto_timesheet.util import random_numbers_sum
+
+console = Console()
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    num_elements = int(sys.argv[2]) if len(sys.argv) > 2 else 4  # noqa: PLR2004
+    rng = np.random.default_rng(0)
+    totals = rng.uniform(1, 8, size=size).round(2)
+
+    loop = min(
+        timeit.repeat(
+            lambda: [random_numbers_sum(total, num_elements) for total in totals],
+            number=1,
+            repeat=3,
+        )
+    )
+    batch = min(
+        timeit.repeat(
+            lambda: split_totals(totals, num_elements, rng=rng),
+            number=1,
+            repeat=3,
+        )
+    )
+
+    console.print(f"Splitting {size} totals into {num_elements} parts")
+    console.print(f"random_numbers_sum: {loop * 1000:.1f}ms")
+    console.print(f"split_totals:       {batch * 1000:.1f}ms ({loop / batch:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
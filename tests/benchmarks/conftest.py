@@ -0,0 +1,63 @@
+import asyncio
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Callable
+from datetime import date, timedelta
+from typing import Any
+
+import pytest
+
+from harvest_auto_timesheet.instrumentation import Instrumentation
+from tests.fakes import FakeApis
+
+Replay = Callable[[Callable[[], list[FakeApis]], date], None]
+
+
+@pytest.fixture
+def replay(benchmark: Any) -> Replay:
+    """Benchmark runs of the schedule against fresh fakes.
+
+    The requests sent and the time spent in each phase of the last round are
+    saved in the benchmark's `extra_info`, with the peak memory of an extra
+    run, since tracing the allocations slows the run down.
+    """
+
+    def run(make_apis: Callable[[], list[FakeApis]], week_start: date) -> None:
+        weekdays = [week_start + timedelta(days=i) for i in range(5)]
+        rounds: list[tuple[list[FakeApis], Instrumentation]] = []
+
+        def setup() -> tuple[tuple[list[FakeApis], Instrumentation], dict[str, Any]]:
+            rounds.append((make_apis(), Instrumentation()))
+            return rounds[-1], {}
+
+        def target(apis: list[FakeApis], instrumentation: Instrumentation) -> None:
+            for user_apis in apis:
+                asyncio.run(
+                    user_apis.run_week(weekdays, instrumentation=instrumentation)
+                )
+
+        benchmark.pedantic(target, setup=setup, rounds=3)
+
+        apis, instrumentation = rounds[-1]
+        summary = instrumentation.get_summary()
+        requests_by_service: dict[str, int] = defaultdict(int)
+        for stats in summary.requests:
+            requests_by_service[stats.service] += stats.count
+        benchmark.extra_info.update(
+            requests=sum(user_apis.requests for user_apis in apis),
+            requests_by_service=requests_by_service,
+            harvest_writes=sum(user_apis.harvest.writes for user_apis in apis),
+            span_seconds={
+                name: stats.total_seconds for name, stats in summary.spans.items()
+            },
+        )
+
+        tracemalloc.start()
+        try:
+            target(make_apis(), Instrumentation())
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_memory_bytes"] = peak
+
+    return run
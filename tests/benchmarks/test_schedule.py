@@ -0,0 +1,35 @@
+from datetime import date
+
+from tests.benchmarks.conftest import Replay
+from tests.fakes import FakeApis, Faults, RecordedWeek, synthetic_week
+
+WEEK_START = date(2025, 6, 9)
+
+
+def test_recorded_week(replay: Replay) -> None:
+    week = RecordedWeek.load("tests/data_files/recorded_week.json")
+
+    replay(lambda: [FakeApis.from_week(week)], week.week_start)
+
+
+def test_recorded_week_with_latency_and_rate_limits(replay: Replay) -> None:
+    week = RecordedWeek.load("tests/data_files/recorded_week.json")
+    faults = Faults(latency=0.005, rate_limit_every=10)
+
+    replay(lambda: [FakeApis.from_week(week, faults)], week.week_start)
+
+
+def test_large_week(replay: Replay) -> None:
+    week = synthetic_week(WEEK_START, events=1000, incidents=500)
+
+    replay(lambda: [FakeApis.from_week(week)], WEEK_START)
+
+
+def test_many_users(replay: Replay) -> None:
+    weeks = [
+        synthetic_week(WEEK_START, events=20, incidents=5, seed=seed)
+        for seed in range(100)
+    ]
+
+    # the users are run one after the other, as the fakes are patched in globally
+    replay(lambda: [FakeApis.from_week(week) for week in weeks], WEEK_START)
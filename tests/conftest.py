@@ -1,13 +1,16 @@
 import base64
 import json
+from collections.abc import Callable
 from pathlib import Path
 from typing import TypedDict
 from unittest.mock import MagicMock
 
 import pytest
 
+from harvest_auto_timesheet import planner
 from harvest_auto_timesheet.context import Context
 from harvest_auto_timesheet.harvest import Harvest
+from harvest_auto_timesheet.tasks import ProjectEnum, TaskEnum
 
 
 class MockEnvVars(TypedDict):
@@ -20,6 +23,22 @@ class MockEnvVars(TypedDict):
     PAGERDUTY_API_TOKEN: str
 
 
+@pytest.fixture
+def filler_tasks() -> list[tuple[int, int, Callable[[], str]]]:
+    """Get the filler tasks of the tests, overridden by the tests needing others."""
+    return [(ProjectEnum.SOC2.value, TaskEnum.ENGINEERING.value, lambda: "note")]
+
+
+@pytest.fixture(autouse=True)
+def mock_filler_tasks(
+    monkeypatch: pytest.MonkeyPatch,
+    filler_tasks: list[tuple[int, int, Callable[[], str]]],
+) -> None:
+    # the default note pool gives random notes and refills from the internet
+    # in the background, the filler is split evenly across fewer tasks too
+    monkeypatch.setattr(planner, "FILLER_TASKS", filler_tasks)
+
+
 @pytest.fixture
 def mock_service_account() -> dict[str, str]:
     private_key = Path("tests/data_files/id_rsa").read_text(encoding="utf-8")
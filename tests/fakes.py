@@ -0,0 +1,528 @@
+"""Local stand-ins for the Harvest, Google Calendar and PagerDuty APIs.
+
+Each fake keeps its data in memory and answers the requests the clients send
+without touching the network: Harvest through an httpx `MockTransport`,
+PagerDuty through a requests adapter mounted on the client and the Calendar
+through a fake of the discovery-based service. They paginate like the real
+APIs and can add latency and answer some requests with a 429, to replay
+recorded weeks and benchmark synthetic ones.
+"""
+
+import asyncio
+import io
+import itertools
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta, tzinfo
+from datetime import time as time_of_day
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qs, urlsplit
+from zoneinfo import ZoneInfo
+
+import httpx
+import pagerduty
+from pydantic import BaseModel
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+
+from harvest_auto_timesheet.harvest import AsyncHarvest
+from harvest_auto_timesheet.holiday import HolidayIndex
+from harvest_auto_timesheet.instrumentation import Instrumentation
+from harvest_auto_timesheet.ratelimit import TokenBucket
+from harvest_auto_timesheet.schedule import run_schedule_async
+
+
+class FakeClock:
+    """A clock for the caches and rate limiters that only moves when told to."""
+
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@dataclass(frozen=True)
+class Faults:
+    latency: float = 0.0  # seconds added to every request
+    rate_limit_every: int = 0  # answer every nth request with a 429, 0 for never
+    retry_after: int = 0  # the Retry-After of the 429 responses, in seconds
+
+
+class RecordedWeek(BaseModel):
+    """The raw API responses of a week, as saved in `tests/data_files`."""
+
+    week_start: date
+    calendar_events: list[dict[str, Any]]
+    pagerduty_user: dict[str, Any]
+    incidents: list[dict[str, Any]]
+    incident_logs: dict[str, list[dict[str, Any]]]
+    time_entries: list[dict[str, Any]] = []
+
+    @classmethod
+    def load(cls, path: str | Path) -> "RecordedWeek":
+        return cls.model_validate_json(Path(path).read_bytes())
+
+
+class _FaultInjector:
+    def __init__(self, faults: Faults) -> None:
+        self.faults = faults
+        self.requests = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+
+    def should_rate_limit(self) -> bool:
+        """Count a request and check if it should be answered with a 429."""
+        with self._lock:
+            self.requests += 1
+            every = self.faults.rate_limit_every
+            if every and self.requests % every == 0:
+                self.rate_limited += 1
+                return True
+            return False
+
+
+class FakeHarvest:
+    """The time entries and users endpoints of the Harvest API."""
+
+    def __init__(
+        self,
+        time_entries: list[dict[str, Any]] | None = None,
+        *,
+        user_id: int = 1,
+        page_size: int = 2000,
+        faults: Faults | None = None,
+    ) -> None:
+        self.user_id = user_id
+        self.page_size = page_size
+        self.time_entries = {entry["id"]: entry for entry in time_entries or []}
+        self.writes = 0
+        self._faults = _FaultInjector(faults or Faults())
+        self._ids = itertools.count(max(self.time_entries, default=0) + 1)
+        self._lock = threading.Lock()
+
+    @property
+    def requests(self) -> int:
+        return self._faults.requests
+
+    def client(self, instrumentation: Instrumentation | None = None) -> httpx.Client:
+        client = httpx.Client(transport=httpx.MockTransport(self._handle))
+        if instrumentation is not None:
+            instrumentation.instrument_httpx(client, "harvest")
+        return client
+
+    def async_client(
+        self, instrumentation: Instrumentation | None = None
+    ) -> httpx.AsyncClient:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self._handle_async))
+        if instrumentation is not None:
+            instrumentation.instrument_httpx(client, "harvest")
+        return client
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        time.sleep(self._faults.faults.latency)
+        return self._respond(request)
+
+    async def _handle_async(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self._faults.faults.latency)
+        return self._respond(request)
+
+    def _respond(self, request: httpx.Request) -> httpx.Response:
+        if self._faults.should_rate_limit():
+            return httpx.Response(
+                HTTPStatus.TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(self._faults.faults.retry_after)},
+            )
+
+        path = request.url.path.removeprefix("/v2")
+        with self._lock:
+            if path == "/users/me":
+                return httpx.Response(HTTPStatus.OK, json={"id": self.user_id})
+            if path == "/time_entries" and request.method == "GET":
+                return self._list(request)
+            return self._write(path, request)
+
+    def _write(self, path: str, request: httpx.Request) -> httpx.Response:
+        if path == "/time_entries":
+            self.writes += 1
+            entry = self._save(next(self._ids), json.loads(request.content))
+            return httpx.Response(HTTPStatus.CREATED, json=entry)
+
+        time_entry_id = int(path.removeprefix("/time_entries/"))
+        if time_entry_id not in self.time_entries:
+            return httpx.Response(HTTPStatus.NOT_FOUND)
+        self.writes += 1
+        if request.method == "DELETE":
+            del self.time_entries[time_entry_id]
+            return httpx.Response(HTTPStatus.OK)
+        entry = self._save(time_entry_id, json.loads(request.content))
+        return httpx.Response(HTTPStatus.OK, json=entry)
+
+    def _list(self, request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        entries = sorted(
+            (
+                entry
+                for entry in self.time_entries.values()
+                if params["from"] <= entry["spent_date"] <= params["to"]
+                and (
+                    "external_reference_id" not in params
+                    or (entry.get("external_reference") or {}).get("id")
+                    == params["external_reference_id"]
+                )
+            ),
+            key=lambda entry: entry["id"],
+        )
+
+        page = int(params.get("page", "1"))
+        per_page = min(int(params.get("per_page", "2000")), self.page_size)
+        start = (page - 1) * per_page
+        next_url = None
+        if start + per_page < len(entries):
+            next_url = str(request.url.copy_merge_params({"page": page + 1}))
+        return httpx.Response(
+            HTTPStatus.OK,
+            json={
+                "time_entries": entries[start : start + per_page],
+                "links": {"next": next_url},
+            },
+        )
+
+    def _save(self, time_entry_id: int, payload: dict[str, Any]) -> dict[str, Any]:
+        entry = {
+            "id": time_entry_id,
+            "spent_date": payload["spent_date"],
+            "project": {"id": payload["project_id"]},
+            "task": {"id": payload["task_id"]},
+            "user": {"id": self.user_id},
+            "hours": payload["hours"],
+            "notes": payload.get("notes"),
+            "external_reference": payload.get("external_reference"),
+            "updated_at": datetime.now(tz=UTC).isoformat(),
+        }
+        self.time_entries[time_entry_id] = entry
+        return entry
+
+
+class FakeCalendar:
+    """The events endpoint of the Google Calendar API, as a built service."""
+
+    def __init__(
+        self,
+        events: list[dict[str, Any]],
+        *,
+        page_size: int = 250,
+        faults: Faults | None = None,
+    ) -> None:
+        self.items = sorted(events, key=lambda event: _get_start(event).isoformat())
+        self.page_size = page_size
+        self.faults = faults or Faults()
+        self.requests = 0
+
+    # the service is used as `service.events().list(...).execute()`
+    def events(self) -> "FakeCalendar":
+        return self
+
+    def list(self, **kwargs: Any) -> "_CalendarRequest":
+        return _CalendarRequest(self, kwargs)
+
+    def execute(self, kwargs: dict[str, Any]) -> dict[str, Any]:
+        time.sleep(self.faults.latency)
+        self.requests += 1
+        if "syncToken" in kwargs:
+            return {"items": [], "nextSyncToken": "sync-token"}
+
+        time_min = datetime.fromisoformat(kwargs["timeMin"])
+        time_max = datetime.fromisoformat(kwargs["timeMax"])
+        events = [
+            event
+            for event in self.items
+            if time_min <= _get_start(event, time_min.tzinfo) < time_max
+        ]
+        start = int(kwargs.get("pageToken") or 0)
+        page_size = min(kwargs.get("maxResults", self.page_size), self.page_size)
+        end = start + page_size
+        if end < len(events):
+            return {"items": events[start:end], "nextPageToken": str(end)}
+        return {"items": events[start:], "nextSyncToken": "sync-token"}
+
+
+def _get_start(event: dict[str, Any], tz: tzinfo | None = UTC) -> datetime:
+    start = event["start"]
+    if "dateTime" in start:
+        return datetime.fromisoformat(start["dateTime"])
+    # all day events start at midnight in the time zone of the calendar
+    return datetime.combine(date.fromisoformat(start["date"]), time_of_day(), tz)
+
+
+class _CalendarRequest:
+    method = "GET"
+
+    def __init__(self, calendar: FakeCalendar, kwargs: dict[str, Any]) -> None:
+        self.calendar = calendar
+        self.kwargs = kwargs
+
+    def execute(self) -> dict[str, Any]:
+        return self.calendar.execute(self.kwargs)
+
+
+class FakePagerDuty(BaseAdapter):
+    """The users, incidents and log entries endpoints of the PagerDuty API."""
+
+    def __init__(
+        self,
+        user: dict[str, Any],
+        incidents: list[dict[str, Any]],
+        incident_logs: dict[str, list[dict[str, Any]]],
+        *,
+        faults: Faults | None = None,
+    ) -> None:
+        super().__init__()
+        self.user = user
+        self.incidents = incidents
+        self.incident_logs = incident_logs
+        self._faults = _FaultInjector(faults or Faults())
+
+    @property
+    def requests(self) -> int:
+        return self._faults.requests
+
+    def client(
+        self, instrumentation: Instrumentation | None = None
+    ) -> pagerduty.RestApiV2Client:
+        client = pagerduty.RestApiV2Client(api_key="token")
+        client.mount("https://", self)
+        if instrumentation is not None:
+            instrumentation.instrument_requests(client, "pagerduty")
+        return client
+
+    def send(  # noqa: PLR0913, PLR0917
+        self,
+        request: PreparedRequest,
+        stream: bool = False,  # noqa: ARG002, FBT001, FBT002
+        timeout: float | tuple[float | None, float | None] | None = None,  # noqa: ARG002
+        verify: bool | str = True,  # noqa: ARG002, FBT001, FBT002
+        cert: str | tuple[str, str] | None = None,  # noqa: ARG002
+        proxies: dict[str, str] | None = None,  # noqa: ARG002
+    ) -> Response:
+        time.sleep(self._faults.faults.latency)
+        if self._faults.should_rate_limit():
+            return self._response(
+                request,
+                HTTPStatus.TOO_MANY_REQUESTS,
+                {},
+                headers={"Retry-After": str(self._faults.faults.retry_after)},
+            )
+
+        url = urlsplit(str(request.url))
+        params = parse_qs(url.query)
+        path = url.path.strip("/").split("/")
+        match path:
+            case ["users", _]:
+                return self._response(request, HTTPStatus.OK, {"user": self.user})
+            case ["incidents"]:
+                return self._page(request, params, "incidents", self.incidents)
+            case ["users", _, "log_entries"]:
+                log_entries = [
+                    {**log, "incident": {"id": incident_id}}
+                    for incident_id, logs in self.incident_logs.items()
+                    for log in logs
+                ]
+                return self._page(request, params, "log_entries", log_entries)
+            case ["incidents", incident_id, "log_entries"]:
+                logs = self.incident_logs.get(incident_id, [])
+                return self._response(request, HTTPStatus.OK, {"log_entries": logs})
+        return self._response(request, HTTPStatus.NOT_FOUND, {})
+
+    def close(self) -> None:
+        pass
+
+    def _page(
+        self,
+        request: PreparedRequest,
+        params: dict[str, list[str]],
+        name: str,
+        items: list[dict[str, Any]],
+    ) -> Response:
+        offset = int(params.get("offset", ["0"])[0])
+        limit = int(params.get("limit", ["100"])[0])
+        return self._response(
+            request,
+            HTTPStatus.OK,
+            {
+                name: items[offset : offset + limit],
+                "offset": offset,
+                "limit": limit,
+                "more": offset + limit < len(items),
+            },
+        )
+
+    def _response(
+        self,
+        request: PreparedRequest,
+        status: HTTPStatus,
+        body: dict[str, Any],
+        headers: dict[str, str] | None = None,
+    ) -> Response:
+        response = Response()
+        response.status_code = status
+        response.headers.update({"Content-Type": "application/json", **(headers or {})})
+        response.raw = io.BytesIO(json.dumps(body).encode("utf-8"))
+        response.encoding = "utf-8"
+        response.request = request
+        response.url = request.url or ""
+        response.elapsed = timedelta(seconds=self._faults.faults.latency)
+        return response
+
+
+def synthetic_week(
+    week_start: date,
+    *,
+    events: int,
+    incidents: int,
+    user_id: str = "PUSER",
+    seed: int = 0,
+) -> RecordedWeek:
+    """Generate a week with many overlapping events and incidents.
+
+    Args:
+        week_start (date): The Monday of the week.
+        events (int): The number of calendar events, spread over the week.
+        incidents (int): The number of incidents the user worked on.
+        user_id (str): The ID of the PagerDuty user.
+        seed (int): The seed for the start times and lengths.
+
+    Returns:
+        RecordedWeek: The week, without any existing time entries.
+
+    """
+    rng = random.Random(seed)
+    tz = ZoneInfo("Pacific/Auckland")
+
+    def random_time(day: int) -> datetime:
+        start = datetime.combine(
+            week_start + timedelta(days=day), time_of_day(hour=8), tz
+        )
+        return start + timedelta(minutes=15 * rng.randrange(40))
+
+    calendar_events = []
+    for i in range(events):
+        start = random_time(i % 5)
+        end = start + timedelta(minutes=15 * rng.randint(1, 8))
+        calendar_events.append(
+            {
+                "id": f"event-{i}",
+                "status": "confirmed",
+                "summary": f"Meeting {i}",
+                "start": {"dateTime": start.isoformat()},
+                "end": {"dateTime": end.isoformat()},
+            }
+        )
+
+    raw_incidents = []
+    incident_logs = {}
+    for i in range(incidents):
+        acknowledged = random_time(i % 5)
+        resolved = acknowledged + timedelta(minutes=rng.randint(5, 120))
+        raw_incidents.append(
+            {
+                "id": f"incident-{i}",
+                "title": f"Incident {i}",
+                "summary": f"Incident {i}",
+                "html_url": f"https://pagerduty.com/incidents/{i}",
+                "resolved_at": resolved.isoformat(),
+            }
+        )
+        incident_logs[f"incident-{i}"] = [
+            {
+                "id": f"log-{i}-{type_}",
+                "type": type_,
+                "summary": type_,
+                "agent": {"id": user_id},
+                "created_at": created_at.isoformat(),
+            }
+            for type_, created_at in [
+                ("acknowledge_log_entry", acknowledged),
+                ("resolve_log_entry", resolved),
+            ]
+        ]
+
+    return RecordedWeek(
+        week_start=week_start,
+        calendar_events=calendar_events,
+        pagerduty_user={
+            "id": user_id,
+            "time_zone": "Pacific/Auckland",
+            "teams": [{"id": "team"}],
+        },
+        incidents=raw_incidents,
+        incident_logs=incident_logs,
+    )
+
+
+@dataclass
+class FakeApis:
+    """The fakes of all the APIs a run reads from and writes to."""
+
+    harvest: FakeHarvest
+    calendar: FakeCalendar
+    pagerduty: FakePagerDuty
+    pagerduty_user_id: str
+
+    @classmethod
+    def from_week(cls, week: RecordedWeek, faults: Faults | None = None) -> "FakeApis":
+        return cls(
+            harvest=FakeHarvest(week.time_entries, faults=faults),
+            calendar=FakeCalendar(week.calendar_events, faults=faults),
+            pagerduty=FakePagerDuty(
+                week.pagerduty_user, week.incidents, week.incident_logs, faults=faults
+            ),
+            pagerduty_user_id=week.pagerduty_user["id"],
+        )
+
+    @property
+    def requests(self) -> int:
+        return self.harvest.requests + self.calendar.requests + self.pagerduty.requests
+
+    async def run_week(
+        self,
+        weekdays: list[date],
+        *,
+        instrumentation: Instrumentation | None = None,
+        max_concurrency: int = 10,
+    ) -> None:
+        """Run the schedule for a week against the fakes.
+
+        The rate limiters are generous so only the latency and the 429s of
+        the fakes slow the run down.
+        """
+        harvest = AsyncHarvest(
+            harvest_account_id="1",
+            harvest_access_token="token",
+            max_concurrency=max_concurrency,
+            rate_limiter=TokenBucket(capacity=100_000, period=1),
+        )
+        harvest.client = self.harvest.async_client(instrumentation)
+        with (
+            patch("harvest_auto_timesheet.schedule._get_weekdays") as get_weekdays,
+            patch("harvest_auto_timesheet.gcal._get_service") as get_service,
+        ):
+            get_weekdays.return_value = weekdays
+            get_service.return_value = self.calendar
+            await run_schedule_async(
+                harvest=harvest,
+                credentials=MagicMock(),
+                calendar_id="calendar",
+                pagerduty_client=self.pagerduty.client(instrumentation),
+                pagerduty_user_id=self.pagerduty_user_id,
+                pagerduty_rate_limiter=TokenBucket(capacity=100_000, period=1),
+                holidays=HolidayIndex(days_off=[]),
+                instrumentation=instrumentation,
+            )
+        await harvest.client.aclose()
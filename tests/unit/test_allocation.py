@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from harvest_auto_timesheet.allocation import Allocation, FillerTask, Weekday
+
+MONDAY = date(year=2025, month=6, day=2)
+WEEK = [MONDAY + timedelta(days=i) for i in range(7)]
+
+
+def test_get_targets() -> None:
+    assert list(Allocation().get_targets(WEEK).values()) == [8] * 5 + [0, 0]
+
+    part_time = Allocation(
+        hours_per_day=7.5,
+        weekday_hours={Weekday.FRIDAY: 4, Weekday.SATURDAY: 2},
+    )
+    assert list(part_time.get_targets(WEEK).values()) == [7.5] * 4 + [4, 2, 0]
+
+
+def test_get_targets_scales_to_weekly_hours() -> None:
+    allocation = Allocation(weekday_hours={Weekday.FRIDAY: 0}, weekly_hours=30)
+
+    assert list(allocation.get_targets(WEEK[:5]).values()) == [7.5] * 4 + [0]
+
+
+def test_from_file(tmp_path: Path) -> None:
+    path = tmp_path / "allocation.json"
+    path.write_text(
+        '{"hours_per_day": 6, "filler": [{"project_id": 1, "task_id": 2, "weight": 3}]}'
+    )
+
+    allocation = Allocation.from_file(path)
+
+    assert allocation.hours_per_day == 6
+    assert allocation.filler == [FillerTask(project_id=1, task_id=2, weight=3)]
+    assert Allocation.from_file(None) == Allocation()
+
+    path.write_text('{"hours_per_day": 25}')
+    with pytest.raises(ValidationError):
+        Allocation.from_file(path)
+
+
+def test_split_in_increments() -> None:
+    allocation = Allocation(increment=0.5)
+
+    parts = allocation.split(
+        [8, 3.2, 0], weights=[1, 1, 1], rng=np.random.default_rng(3)
+    )
+
+    assert parts.sum(axis=1) == pytest.approx([8, 3.2, 0])
+    # only the largest part of a day gets the hours that don't fill an increment
+    assert np.count_nonzero(parts * 2 != np.rint(parts * 2)) == 1
+
+
+def test_split_merges_small_parts() -> None:
+    allocation = Allocation(min_hours=1)
+
+    parts = allocation.split([8] * 100, weights=[1] * 6, rng=np.random.default_rng(5))
+
+    assert parts.sum(axis=1) == pytest.approx([8] * 100)
+    assert ((parts == 0) | (parts >= 1)).all()
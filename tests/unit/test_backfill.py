@@ -0,0 +1,68 @@
+import asyncio
+from datetime import date, timedelta
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from harvest_auto_timesheet.backfill import get_weeks, run_backfill
+from harvest_auto_timesheet.holiday import HolidayIndex
+from harvest_auto_timesheet.planner import OperationType
+
+MONDAY = date(year=2025, month=6, day=9)
+
+
+def test_get_weeks() -> None:
+    weeks = get_weeks(MONDAY + timedelta(days=2), MONDAY + timedelta(days=15))
+
+    assert [(week[0], len(week)) for week in weeks] == [
+        (MONDAY + timedelta(days=2), 3),
+        (MONDAY + timedelta(weeks=1), 5),
+        (MONDAY + timedelta(weeks=2), 2),
+    ]
+    # a range over a weekend has no working days
+    assert get_weeks(MONDAY - timedelta(days=2), MONDAY - timedelta(days=1)) == []
+
+
+def test_run_backfill_reads_the_range_once() -> None:
+    harvest = AsyncMock()
+    harvest.get_time_entries.return_value = []
+    with (
+        patch("harvest_auto_timesheet.backfill.get_calendar_events") as events,
+        patch("harvest_auto_timesheet.backfill.get_incidents") as incidents,
+        patch("harvest_auto_timesheet.backfill.execute_plan_async") as execute,
+    ):
+        events.return_value = []
+        incidents.return_value = []
+
+        async def fail_second_week(**kwargs: Any) -> None:
+            if any(
+                operation.entry and operation.entry.spent_date == second_monday
+                for operation in kwargs["plan"].operations
+            ):
+                raise RuntimeError
+
+        second_monday = MONDAY + timedelta(weeks=1)
+        execute.side_effect = fail_second_week
+        results = asyncio.run(
+            run_backfill(
+                harvest=harvest,
+                credentials=MagicMock(),
+                calendar_id="calendar_id",
+                pagerduty_client=MagicMock(),
+                pagerduty_user_id="user",
+                from_date=MONDAY,
+                to_date=MONDAY + timedelta(days=18),
+                holidays=HolidayIndex(days_off=[]),
+            )
+        )
+
+    assert events.call_count == 1
+    assert incidents.call_count == 1
+    harvest.get_time_entries.assert_awaited_once_with(
+        from_date=MONDAY, to_date=MONDAY + timedelta(days=18)
+    )
+    assert [result.week_start for result in results] == [
+        MONDAY + timedelta(weeks=i) for i in range(3)
+    ]
+    assert [result.ok for result in results] == [True, False, True]
+    assert results[0].plan is not None
+    assert results[0].plan.count(OperationType.CREATE) > 0
@@ -0,0 +1,72 @@
+from pathlib import Path
+
+from harvest_auto_timesheet.cache import ResponseCache, make_key
+from tests.fakes import FakeClock
+
+
+def test_make_key() -> None:
+    assert make_key("url", {"a": 1, "b": 2}) == make_key("url", {"b": 2, "a": 1})
+    assert make_key("url", {"a": 1}) != make_key("url", {"a": 2})
+
+
+def test_response_cache_expiry(tmp_path: Path) -> None:
+    clock = FakeClock()
+    cache = ResponseCache(tmp_path / "cache.sqlite3", clock=clock)
+
+    assert cache.get("ns", "key") is None
+    cache.set("ns", "key", {"hey": [1, 2]}, ttl=10, etag='"abc"')
+
+    entry = cache.get("ns", "key")
+    assert entry is not None
+    assert entry.value == {"hey": [1, 2]}
+    assert entry.etag == '"abc"'
+    assert not entry.is_expired(clock())
+
+    clock.now += 10
+    assert entry.is_expired(clock())
+    cache.touch("ns", "key", ttl=10)
+    entry = cache.get("ns", "key")
+    assert entry is not None
+    assert not entry.is_expired(clock())
+
+    cache.invalidate("ns")
+    assert cache.get("ns", "key") is None
+
+
+def test_response_cache_persists(tmp_path: Path) -> None:
+    ResponseCache(tmp_path / "cache.sqlite3").set("ns", "key", [1], ttl=10)
+    entry = ResponseCache(tmp_path / "cache.sqlite3").get("ns", "key")
+    assert entry is not None
+    assert entry.value == [1]
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    clock = FakeClock()
+    cache = ResponseCache(tmp_path / "cache.sqlite3", max_bytes=25, clock=clock)
+
+    for key in ["a", "b"]:
+        cache.set("ns", key, "x" * 8, ttl=10)  # 10 bytes of JSON each
+        clock.now += 1
+
+    cache.get("ns", "a")  # "b" is now the least recently used
+    clock.now += 1
+    cache.set("ns", "c", "x" * 8, ttl=10)
+
+    assert cache.get("ns", "a") is not None
+    assert cache.get("ns", "b") is None
+    assert cache.get("ns", "c") is not None
+
+
+def test_response_cache_get_or_set(tmp_path: Path) -> None:
+    clock = FakeClock()
+    cache = ResponseCache(tmp_path / "cache.sqlite3", clock=clock)
+    calls = []
+
+    def fetch() -> int:
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_set("ns", "key", 10, fetch) == 1
+    assert cache.get_or_set("ns", "key", 10, fetch) == 1
+    clock.now += 10
+    assert cache.get_or_set("ns", "key", 10, fetch) == 2
@@ -0,0 +1,33 @@
+from datetime import UTC, date, datetime
+from pathlib import Path
+
+from harvest_auto_timesheet.checkpoint import Checkpoint
+
+
+def test_checkpoint_save_and_load(tmp_path: Path) -> None:
+    path = tmp_path / "state" / "checkpoint.json"
+    assert Checkpoint.load(path) is None
+
+    started_at = datetime(year=2025, month=1, day=6, hour=9, tzinfo=UTC)
+    finished_at = datetime(year=2025, month=1, day=6, hour=10, tzinfo=UTC)
+    checkpoint = Checkpoint.create(
+        week_start=date(year=2025, month=1, day=6),
+        calendar_sync_token="token",
+        started_at=started_at,
+        finished_at=finished_at,
+    )
+    checkpoint.save(path)
+
+    loaded = Checkpoint.load(path)
+    assert loaded == checkpoint
+    assert loaded.calendar_sync_token == "token"
+    assert loaded.incidents_updated == started_at
+    assert loaded.harvest_updated == finished_at
+    assert loaded.is_for_week(date(year=2025, month=1, day=6))
+    assert not loaded.is_for_week(date(year=2025, month=1, day=13))
+
+
+def test_checkpoint_load_invalid(tmp_path: Path) -> None:
+    path = tmp_path / "checkpoint.json"
+    path.write_text('{"week_start": "2025-01-06"}', encoding="utf-8")
+    assert Checkpoint.load(path) is None
@@ -0,0 +1,113 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+from pydantic import TypeAdapter, ValidationError
+
+from harvest_auto_timesheet.classify import Classifier, Rule, Source
+from harvest_auto_timesheet.gcal import CalendarEvent
+from harvest_auto_timesheet.pagerd import Incident
+
+EVENT_ADAPTER = TypeAdapter(CalendarEvent)
+
+
+def _event(summary: str, **fields: Any) -> CalendarEvent:
+    return EVENT_ADAPTER.validate_python(
+        {
+            "status": "confirmed",
+            "summary": summary,
+            "start": {"dateTime": "2025-06-03T09:00:00+12:00"},
+            "end": {"dateTime": "2025-06-03T10:00:00+12:00"},
+            **fields,
+        }
+    )
+
+
+def _incident(summary: str) -> Incident:
+    return Incident(
+        id="incident",
+        title=summary,
+        summary=summary,
+        html_url="https://pagerduty.com/incident",
+        resolved_at="2025-06-03T11:00:00+12:00",  # type: ignore[arg-type]
+    )
+
+
+def test_classify_event_first_rule_wins() -> None:
+    classifier = Classifier(
+        [
+            Rule(project_id=1, task_id=1, keywords=["retro", "Stand Up"]),
+            Rule(project_id=2, task_id=2, pattern=r"\bsprint\b"),
+            Rule(project_id=3, task_id=3, keywords=["sprint planning"]),
+        ]
+    )
+
+    assert classifier.classify_event(_event("Daily stand up")) == (1, 1)
+    assert classifier.classify_event(_event("Sprint planning")) == (2, 2)
+    assert classifier.classify_event(_event("sprint retro")) == (1, 1)
+    assert classifier.classify_event(_event("Sprints")) is None
+
+
+def test_classify_event_attendees_organizer_and_colour() -> None:
+    classifier = Classifier(
+        [
+            # shadows the keyword of the next rule, but the colour doesn't match
+            Rule(project_id=1, task_id=1, keywords=["sync"], color_id="11"),
+            Rule(project_id=2, task_id=2, keywords=["sy"], organizer="Boss@x.com"),
+            Rule(project_id=3, task_id=3, attendees=["client@y.com"]),
+        ]
+    )
+    attendees = [{"email": "me@x.com"}, {"email": "Client@y.com"}, {}]
+
+    assert classifier.classify_event(_event("sync", colorId="11")) == (1, 1)
+    assert classifier.classify_event(
+        _event("sync", organizer={"email": "boss@x.com"})
+    ) == (2, 2)
+    assert classifier.classify_event(_event("sync", attendees=attendees)) == (3, 3)
+    assert classifier.classify_event(_event("sync")) is None
+
+
+def test_classify_incident() -> None:
+    classifier = Classifier(
+        [
+            Rule(project_id=1, task_id=1, keywords=["database"]),
+            Rule(
+                project_id=2, task_id=2, keywords=["database"], source=Source.INCIDENT
+            ),
+        ]
+    )
+
+    assert classifier.classify_incident(_incident("[#1] Database down")) == (2, 2)
+    assert classifier.classify_incident(_incident("[#2] API down")) is None
+    assert classifier.classify_event(_event("database review")) == (1, 1)
+
+
+def test_classifier_from_file(tmp_path: Path) -> None:
+    path = tmp_path / "rules.json"
+    path.write_text('[{"project_id": 1, "task_id": 2, "keywords": ["1:1"]}]')
+
+    classifier = Classifier.from_file(path)
+
+    assert classifier.classify_event(_event("1:1 with Sam")) == (1, 2)
+    assert Classifier.from_file(None).rules == []
+
+    path.write_text('[{"project_id": 1, "task_id": 2, "pattern": "(unclosed"}]')
+    with pytest.raises(ValidationError, match="invalid pattern"):
+        Classifier.from_file(path)
+
+
+@pytest.mark.parametrize("pattern", ["(a)\\1", "(?P<name>a)", "x(?i)y", "(?P=a)"])
+def test_rule_rejects_patterns_that_cannot_be_combined(pattern: str) -> None:
+    with pytest.raises(ValidationError, match="invalid pattern"):
+        Rule(project_id=1, task_id=2, pattern=pattern)
+
+
+def test_classifier_caches_summaries() -> None:
+    classifier = Classifier(
+        [Rule(project_id=i, task_id=i, keywords=[f"#{i};"]) for i in range(300)]
+    )
+
+    for _ in range(3):
+        assert classifier.classify_event(_event("about #42; and #7;")) == (7, 7)
+
+    assert classifier._find_text_rules.cache_info().hits == 2  # noqa: SLF001
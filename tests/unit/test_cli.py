@@ -0,0 +1,139 @@
+import argparse
+from collections.abc import Iterator
+from datetime import date
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from harvest_auto_timesheet.cli import _parse_enum, _parse_positive_int, main
+from harvest_auto_timesheet.delete import DeleteFilter, DeleteResult
+from harvest_auto_timesheet.fleet import FleetReport, UserResult
+from harvest_auto_timesheet.harvest import AsyncHarvest
+from harvest_auto_timesheet.tasks import ProjectEnum
+
+
+@pytest.fixture(autouse=True)
+def _no_dotenv() -> Iterator[None]:
+    # a local .env would override the environment of the tests
+    with patch("harvest_auto_timesheet.cli.load_dotenv"):
+        yield
+
+
+def test_parse_enum() -> None:
+    parse = _parse_enum(ProjectEnum)
+
+    assert parse("soc2") == ProjectEnum.SOC2.value
+    assert parse("SOC2") == ProjectEnum.SOC2.value
+    assert parse("123") == 123
+    with pytest.raises(argparse.ArgumentTypeError, match="unknown ProjectEnum"):
+        parse("nope")
+
+
+def test_parse_positive_int() -> None:
+    assert _parse_positive_int("4") == 4
+    for value in ("0", "-1", "four"):
+        with pytest.raises(argparse.ArgumentTypeError, match="positive integer"):
+            _parse_positive_int(value)
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--dry-run", "plan.json", "fleet", "roster.json"],
+        ["--apply", "plan.json", "backfill", "--from", "2025-01-06"],
+        ["--dry-run", "plan.json", "delete"],
+        ["--prune", "delete"],
+        ["--pagerduty-workers", "4", "delete"],
+        ["--pagerduty-workers", "0"],
+        ["fleet", "roster.json", "--workers", "0"],
+    ],
+)
+def test_main_rejects_flags_ignored_by_the_command(argv: list[str]) -> None:
+    with pytest.raises(SystemExit) as exc_info:
+        main(argv)
+
+    assert exc_info.value.code == 2
+
+
+def test_main_deletes_with_only_the_harvest_env_vars(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("HARVEST_ACCOUNT_ID", "1")
+    monkeypatch.setenv("HARVEST_ACCESS_TOKEN", "token")
+    for name in ("CALENDAR_ID", "PAGERDUTY_USER_ID", "PAGERDUTY_API_TOKEN"):
+        monkeypatch.delenv(name, raising=False)
+
+    with patch(
+        "harvest_auto_timesheet.delete.delete_time_entries",
+        AsyncMock(return_value=DeleteResult(matched=2, deleted=2)),
+    ) as delete_time_entries:
+        code = main(
+            [
+                "delete",
+                "--from",
+                "2025-01-06",
+                "--to",
+                "2025-01-10",
+                "--project",
+                "soc2",
+                "--generated",
+            ]
+        )
+
+    assert code == 0
+    assert delete_time_entries.call_args.args[1] == DeleteFilter(
+        from_date=date(year=2025, month=1, day=6),
+        to_date=date(year=2025, month=1, day=10),
+        project_ids=frozenset({ProjectEnum.SOC2.value}),
+        only_generated=True,
+    )
+    assert delete_time_entries.call_args.kwargs == {"dry_run": False}
+
+
+def test_main_runs_the_fleet(tmp_path: Path) -> None:
+    roster_path = tmp_path / "roster.json"
+    roster_path.write_text('{"users": [{"name": "someone"}]}', encoding="utf-8")
+    report = FleetReport(
+        results=[UserResult(name="someone", duration=1, error="failed")],
+        duration=1,
+        harvest_requests=0,
+        harvest_rate_limited=0,
+    )
+
+    with patch(
+        "harvest_auto_timesheet.fleet.run_fleet", return_value=report
+    ) as run_fleet:
+        code = main(
+            [
+                "--prune",
+                "--pagerduty-workers",
+                "4",
+                "fleet",
+                str(roster_path),
+                "--workers",
+                "2",
+            ]
+        )
+
+    assert code == 1
+    assert run_fleet.call_args.kwargs == {"max_workers": 2, "prune": True}
+    assert run_fleet.call_args.args[0].defaults.pagerduty_max_workers == 4
+
+
+def test_main_saves_a_dry_run(tmp_path: Path) -> None:
+    with (
+        patch("harvest_auto_timesheet.cli.Context") as context,
+        patch(
+            "harvest_auto_timesheet.schedule.run_schedule_async", new=AsyncMock()
+        ) as run_schedule_async,
+    ):
+        harvest = AsyncHarvest(harvest_account_id="1", harvest_access_token="token")
+        context.return_value.async_harvest = harvest
+        code = main(["--dry-run", str(tmp_path / "plan.json")])
+
+    assert code == 0
+    assert harvest.client.is_closed
+    kwargs = run_schedule_async.call_args.kwargs
+    assert kwargs["dry_run_path"] == tmp_path / "plan.json"
+    assert kwargs["prune"] is False
@@ -1,7 +1,12 @@
 import json
+import subprocess
+import sys
 import tempfile
 from pathlib import Path
 
+import pytest
+
+from harvest_auto_timesheet import pagerd
 from harvest_auto_timesheet.context import Context
 from tests.conftest import MockEnvVars
 
@@ -45,3 +50,58 @@ def test_context_from_service_account_file(
     assert ctx.service_account_json_b64 is None
     assert ctx.pagerduty_user_id == mock_env_vars["PAGERDUTY_USER_ID"]
     assert ctx.pagerduty_api_key == mock_env_vars["PAGERDUTY_API_TOKEN"]
+
+
+def test_context_imports_clients_lazily() -> None:
+    code = (
+        "import sys\n"
+        "import harvest_auto_timesheet.cli\n"
+        "from harvest_auto_timesheet.context import Context\n"
+        # pydantic is not in the list: the Harvest models the context
+        # builds its clients with are pydantic models
+        "modules = ['googleapiclient', 'google.oauth2', 'pagerduty', 'holidays',"
+        " 'numpy', 'rich']\n"
+        "print(','.join(module for module in modules if module in sys.modules))\n"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == ""
+
+
+def test_context_builds_clients_on_first_access(
+    mock_env_vars: MockEnvVars,
+) -> None:
+    ctx = Context(
+        harvest_account_id=mock_env_vars["HARVEST_ACCOUNT_ID"],
+        harvest_access_token=mock_env_vars["HARVEST_ACCESS_TOKEN"],
+        calendar_id=mock_env_vars["CALENDAR_ID"],
+        service_account_file="missing.json",
+        pagerduty_user_id=mock_env_vars["PAGERDUTY_USER_ID"],
+        pagerduty_api_key=mock_env_vars["PAGERDUTY_API_TOKEN"],
+    )
+
+    assert "harvest" not in vars(ctx)
+    assert ctx.harvest is ctx.harvest
+    assert ctx.harvest.rate_limiter is ctx.harvest_rate_limiter
+    assert ctx.async_harvest.rate_limiter is ctx.harvest_rate_limiter
+
+
+def test_context_reads_the_pagerduty_workers(
+    mock_context: Context,
+    mock_env_vars: MockEnvVars,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    assert mock_context.pagerduty_max_workers == pagerd.MAX_WORKERS
+
+    monkeypatch.setenv("PAGERDUTY_MAX_WORKERS", "3")
+    context = Context(
+        harvest_account_id=mock_env_vars["HARVEST_ACCOUNT_ID"],
+        harvest_access_token=mock_env_vars["HARVEST_ACCESS_TOKEN"],
+        calendar_id=mock_env_vars["CALENDAR_ID"],
+        pagerduty_user_id=mock_env_vars["PAGERDUTY_USER_ID"],
+        pagerduty_api_key=mock_env_vars["PAGERDUTY_API_TOKEN"],
+    )
+    assert context.pagerduty_max_workers == 3
@@ -0,0 +1,48 @@
+from datetime import date
+from pathlib import Path
+
+from harvest_auto_timesheet.dedup import WriteIndex, get_digest
+from harvest_auto_timesheet.harvest import ExternalReference, NewTimeEntry
+from harvest_auto_timesheet.tasks import ProjectEnum, TaskEnum
+
+ENTRY = NewTimeEntry(
+    project_id=ProjectEnum.SOC2,
+    task_id=TaskEnum.ENGINEERING,
+    spent_date=date(year=2025, month=6, day=3),
+    hours=1,
+    external_reference=ExternalReference(id="gcal:event"),
+)
+
+
+def test_get_digest_changes_with_the_entry() -> None:
+    assert get_digest(ENTRY) == get_digest(ENTRY.model_copy())
+    assert get_digest(ENTRY) != get_digest(ENTRY.model_copy(update={"hours": 2}))
+
+
+def test_write_index_round_trip(tmp_path: Path) -> None:
+    path = tmp_path / "index.json"
+    index = WriteIndex(path)
+    index.record(1, "gcal:event", 1, ENTRY)
+    index.record(1, "filler:2025-06-03:0", 2, ENTRY)
+    index.record(2, "filler:2025-06-03:0", 3, ENTRY)
+    index.forget(2)
+    index.save()
+
+    loaded = WriteIndex(path)
+    indexed = loaded.get(1, "gcal:event")
+    assert indexed is not None
+    assert indexed.time_entry_id == 1
+    assert indexed.digest == get_digest(ENTRY)
+    assert loaded.get(1, "filler:2025-06-03:0") is None
+    # the same key of another user is kept apart
+    other = loaded.get(2, "filler:2025-06-03:0")
+    assert other is not None
+    assert other.time_entry_id == 3
+    assert loaded.get(2, "gcal:event") is None
+
+
+def test_write_index_ignores_a_corrupt_file(tmp_path: Path) -> None:
+    path = tmp_path / "index.json"
+    path.write_text("{not json")
+
+    assert WriteIndex(path).get(1, "gcal:event") is None
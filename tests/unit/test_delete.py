@@ -0,0 +1,144 @@
+import asyncio
+from datetime import date
+from http import HTTPStatus
+from typing import Any
+
+import httpx
+from pydantic import TypeAdapter
+
+from harvest_auto_timesheet.delete import (
+    DeleteFilter,
+    DeleteResult,
+    delete_time_entries,
+)
+from harvest_auto_timesheet.harvest import (
+    EXTERNAL_REFERENCE_GROUP_ID,
+    AsyncHarvest,
+    TimeEntry,
+)
+from harvest_auto_timesheet.ratelimit import RetryPolicy
+from tests.conftest import MockEnvVars
+
+MONDAY = date(year=2025, month=1, day=6)
+FILTER = DeleteFilter(from_date=MONDAY, to_date=MONDAY)
+TIME_ENTRY_ADAPTER = TypeAdapter(TimeEntry)
+
+
+def _entry(id_: int, project_id: int = 1, *, generated: bool = False) -> dict[str, Any]:
+    return {
+        "id": id_,
+        "spent_date": MONDAY.isoformat(),
+        "hours": 1,
+        "project": {"id": project_id},
+        "task": {"id": 2},
+        "user": {"id": 3},
+        "notes": f"entry {id_}",
+        "external_reference": {"id": str(id_), "group_id": EXTERNAL_REFERENCE_GROUP_ID}
+        if generated
+        else None,
+    }
+
+
+def test_delete_filter_matches() -> None:
+    entry = TIME_ENTRY_ADAPTER.validate_python(_entry(1))
+    generated = TIME_ENTRY_ADAPTER.validate_python(_entry(1, generated=True))
+
+    assert FILTER.matches(entry)
+    assert DeleteFilter(MONDAY, MONDAY, project_ids=frozenset({1})).matches(entry)
+    assert not DeleteFilter(MONDAY, MONDAY, project_ids=frozenset({2})).matches(entry)
+    assert not DeleteFilter(MONDAY, MONDAY, task_ids=frozenset({1})).matches(entry)
+    assert not DeleteFilter(MONDAY, MONDAY, user_ids=frozenset({1})).matches(entry)
+    assert not DeleteFilter(MONDAY, MONDAY, only_generated=True).matches(entry)
+    assert DeleteFilter(MONDAY, MONDAY, only_generated=True).matches(generated)
+    assert DeleteFilter(MONDAY, MONDAY, notes_contains="entry 1").matches(entry)
+    assert not DeleteFilter(MONDAY, MONDAY, notes_contains="other").matches(entry)
+
+
+def _delete(
+    mock_env_vars: MockEnvVars, entry_filter: DeleteFilter, *, dry_run: bool = False
+) -> tuple[DeleteResult, list[int]]:
+    pages = {
+        None: {
+            "time_entries": [_entry(1), _entry(2, generated=True)],
+            "links": {"next": "https://api.harvestapp.com/v2/time_entries?page=2"},
+        },
+        "2": {"time_entries": [_entry(3, generated=True)], "links": {"next": None}},
+    }
+    deleted = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            return httpx.Response(
+                HTTPStatus.OK, json=pages[request.url.params.get("page")]
+            )
+        time_entry_id = int(request.url.path.rsplit("/", 1)[-1])
+        if time_entry_id == 3:
+            return httpx.Response(HTTPStatus.NOT_FOUND)
+        deleted.append(time_entry_id)
+        return httpx.Response(HTTPStatus.OK)
+
+    async def run() -> DeleteResult:
+        async with AsyncHarvest(
+            harvest_account_id=mock_env_vars["HARVEST_ACCOUNT_ID"],
+            harvest_access_token=mock_env_vars["HARVEST_ACCESS_TOKEN"],
+            retry_policy=RetryPolicy(max_retries=0),
+        ) as harvest:
+            harvest.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            return await delete_time_entries(harvest, entry_filter, dry_run=dry_run)
+
+    return asyncio.run(run()), deleted
+
+
+def test_delete_time_entries(mock_env_vars: MockEnvVars) -> None:
+    result, deleted = _delete(mock_env_vars, FILTER)
+
+    assert sorted(deleted) == [1, 2]
+    assert result == DeleteResult(matched=3, deleted=2, failed=[3])
+
+
+def test_delete_time_entries_generated_only(mock_env_vars: MockEnvVars) -> None:
+    result, deleted = _delete(
+        mock_env_vars, DeleteFilter(MONDAY, MONDAY, only_generated=True)
+    )
+
+    assert deleted == [2]
+    assert result.matched == 2
+
+
+def test_delete_time_entries_dry_run(mock_env_vars: MockEnvVars) -> None:
+    result, deleted = _delete(mock_env_vars, FILTER, dry_run=True)
+
+    assert deleted == []
+    assert result == DeleteResult(matched=3)
+
+
+def test_delete_time_entries_filters_in_the_api(mock_env_vars: MockEnvVars) -> None:
+    params = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        params.append(dict(request.url.params))
+        return httpx.Response(
+            HTTPStatus.OK, json={"time_entries": [_entry(1)], "links": {"next": None}}
+        )
+
+    async def run() -> DeleteResult:
+        async with AsyncHarvest(
+            harvest_account_id=mock_env_vars["HARVEST_ACCOUNT_ID"],
+            harvest_access_token=mock_env_vars["HARVEST_ACCESS_TOKEN"],
+        ) as harvest:
+            harvest.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            entry_filter = DeleteFilter(
+                MONDAY, MONDAY, project_ids=frozenset({1}), task_ids=frozenset({2, 3})
+            )
+            return await delete_time_entries(harvest, entry_filter, dry_run=True)
+
+    assert asyncio.run(run()) == DeleteResult(matched=1)
+    # only a single project, task or user can be filtered by the API
+    assert params == [
+        {
+            "from": MONDAY.isoformat(),
+            "to": MONDAY.isoformat(),
+            "per_page": "2000",
+            "project_id": "1",
+        }
+    ]
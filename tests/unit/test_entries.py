@@ -0,0 +1,73 @@
+from dataclasses import replace
+from datetime import date
+
+import pytest
+
+from harvest_auto_timesheet.entries import TimeEntryIndex
+from harvest_auto_timesheet.harvest import ExternalReference, TimeEntry
+
+MONDAY = date(year=2025, month=6, day=2)
+TUESDAY = date(year=2025, month=6, day=3)
+
+
+def _entry(
+    id_: int, spent_date: date = MONDAY, hours: float = 1, user_id: int = 1
+) -> TimeEntry:
+    return TimeEntry(
+        id=id_,
+        spent_date=spent_date,
+        hours=hours,
+        project_id=10,
+        task_id=20 + id_ % 2,
+        user_id=user_id,
+        external_reference=ExternalReference(id=f"gcal:{id_}"),
+    )
+
+
+def test_time_entry_index_totals() -> None:
+    entries = TimeEntryIndex(
+        [_entry(1), _entry(2, hours=2), _entry(3, TUESDAY), _entry(4, user_id=2)]
+    )
+
+    assert len(entries) == 4
+    assert [entry.id for entry in entries.get_day(MONDAY)] == [1, 2, 4]
+    assert [entry.id for entry in entries.get_day(MONDAY, user_id=1)] == [1, 2]
+    assert entries.get_hours(MONDAY) == pytest.approx(4)
+    assert entries.get_hours(MONDAY, user_id=1) == pytest.approx(3)
+    assert entries.get_hours(date(year=2025, month=6, day=4)) == 0
+    assert [entry.id for entry in entries.get_task(10, 21, MONDAY)] == [1]
+    assert [entry.id for entry in entries.get_task(10, 20, MONDAY, 2)] == [4]
+    assert entries.find("gcal:3") == _entry(3, TUESDAY)
+
+
+def test_time_entry_index_finds_the_reference_of_each_user() -> None:
+    # the attendees of a meeting have entries with the same reference
+    shared = ExternalReference(id="gcal:meeting")
+    mine = replace(_entry(1), external_reference=shared)
+    theirs = replace(_entry(2, user_id=2), external_reference=shared)
+    entries = TimeEntryIndex([mine, theirs])
+
+    assert entries.find("gcal:meeting", user_id=1) == mine
+    assert entries.find("gcal:meeting", user_id=2) == theirs
+
+    entries.remove(2)
+    assert entries.find("gcal:meeting", user_id=2) is None
+    assert entries.find("gcal:meeting") == mine
+
+
+def test_time_entry_index_updates_in_place() -> None:
+    entries = TimeEntryIndex([_entry(1), _entry(2, hours=2)])
+
+    # an updated entry replaces the previous version, even on another day
+    entries.add(replace(_entry(2), spent_date=TUESDAY, hours=3))
+    assert entries.get_hours(MONDAY) == pytest.approx(1)
+    assert entries.get_hours(TUESDAY) == pytest.approx(3)
+    assert entries.get_task(10, 20, MONDAY) == []
+
+    entries.remove(1)
+    entries.remove(1)
+    assert entries.get(1) is None
+    assert entries.find("gcal:1") is None
+    assert entries.get_day(MONDAY) == []
+    assert entries.get_hours(MONDAY) == 0
+    assert list(entries) == [replace(_entry(2), spent_date=TUESDAY, hours=3)]
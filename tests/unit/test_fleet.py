@@ -0,0 +1,89 @@
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+from harvest_auto_timesheet.fleet import Roster, run_fleet
+
+
+def _roster(tmp_path: Path) -> Roster:
+    path = tmp_path / "roster.json"
+    path.write_text(
+        """
+        {
+            "defaults": {"harvest_account_id": "account", "calendar_id": "shared"},
+            "users": [
+                {"name": "a", "harvest_access_token": "token", "calendar_id": "a"},
+                {"name": "b", "harvest_access_token": "token"},
+                {"name": "c", "harvest_access_token": "other", "calendar_id": "c"}
+            ]
+        }
+        """,
+        encoding="utf-8",
+    )
+    return Roster.load(path)
+
+
+def test_roster_merges_defaults(tmp_path: Path) -> None:
+    roster = _roster(tmp_path)
+
+    assert roster.get_context_kwargs(roster.users[0]) == {
+        "harvest_account_id": "account",
+        "harvest_access_token": "token",
+        "calendar_id": "a",
+    }
+    assert roster.get_context_kwargs(roster.users[1])["calendar_id"] == "shared"
+
+
+def test_run_fleet_isolates_failures_and_shares_limiters(tmp_path: Path) -> None:
+    contexts: list[Any] = []
+
+    def make_context(**kwargs: Any) -> MagicMock:
+        context = MagicMock(**kwargs, checkpoint_path=None)
+        contexts.append(context)
+        return context
+
+    def schedule(**kwargs: Any) -> None:
+        if kwargs["calendar_id"] == "shared":
+            msg = "boom"
+            raise RuntimeError(msg)
+
+    with (
+        patch("harvest_auto_timesheet.fleet.Context", side_effect=make_context),
+        patch("harvest_auto_timesheet.fleet.run_schedule", side_effect=schedule),
+        patch("harvest_auto_timesheet.fleet.NotePool"),
+    ):
+        report = run_fleet(_roster(tmp_path), max_workers=3)
+
+    assert [result.name for result in report.results] == ["a", "b", "c"]
+    assert [result.ok for result in report.results] == [True, False, True]
+    assert report.results[1].error == "RuntimeError: boom"
+
+    limiters = {
+        context.harvest_access_token: context.harvest_rate_limiter
+        for context in contexts
+    }
+    shared = [
+        context.harvest_rate_limiter
+        for context in contexts
+        if context.harvest_access_token == "token"
+    ]
+    assert shared[0] is shared[1]
+    assert limiters["token"] is not limiters["other"]
+
+
+def test_run_fleet_shares_a_note_pool(tmp_path: Path) -> None:
+    roster = _roster(tmp_path)
+    roster.notes_path = str(tmp_path / "notes.json")
+
+    with (
+        patch("harvest_auto_timesheet.fleet.Context"),
+        patch("harvest_auto_timesheet.fleet.run_schedule"),
+        patch("harvest_auto_timesheet.fleet.NotePool") as note_pool,
+        patch("harvest_auto_timesheet.fleet.set_default_pool") as set_default_pool,
+    ):
+        run_fleet(roster)
+
+    note_pool.assert_called_once_with(roster.notes_path)
+    set_default_pool.assert_called_once_with(note_pool.return_value)
+    note_pool.return_value.refill_in_background.assert_called_once()
+    note_pool.return_value.wait.assert_called_once()
@@ -1,8 +1,31 @@
+from dataclasses import replace
 from datetime import UTC, date, datetime
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any
 from unittest.mock import MagicMock, patch
 from zoneinfo import ZoneInfo
 
-from harvest_auto_timesheet.gcal import CalendarEvent, DateTime, get_calendar_events
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+from pydantic import TypeAdapter
+
+from harvest_auto_timesheet import gcal
+from harvest_auto_timesheet.cache import ResponseCache
+from harvest_auto_timesheet.gcal import (
+    CalendarEvent,
+    CalendarSync,
+    DateTime,
+    SyncTokenExpiredError,
+    get_calendar_events,
+    get_sync_token,
+    sync_calendar_events,
+)
+from harvest_auto_timesheet.instrumentation import Instrumentation
+from tests.fakes import FakeClock
+
+EVENT_ADAPTER = TypeAdapter(CalendarEvent)
 
 
 def test_get_calendar_events() -> None:
@@ -12,7 +35,7 @@ def test_get_calendar_events() -> None:
         start=DateTime(datetime=datetime(year=2025, month=1, day=1, tzinfo=UTC)),  # type: ignore[call-arg]
         end=DateTime(datetime=datetime(year=2025, month=1, day=2, tzinfo=UTC)),  # type: ignore[call-arg]
     )
-    items = [event.model_dump(mode="json")]
+    items = [EVENT_ADAPTER.dump_python(event, mode="json")]
 
     with patch("harvest_auto_timesheet.gcal.build") as mock_build:
         mock_build.return_value.events.return_value.list.return_value.execute.return_value = {  # noqa: E501
@@ -39,5 +62,108 @@ def test_calendar_event() -> None:
     )
     assert event.is_all_day()
 
-    event.start.datetime = datetime(year=2025, month=1, day=2, tzinfo=UTC)
-    assert not event.is_all_day()
+    start = DateTime(datetime=datetime(year=2025, month=1, day=2, tzinfo=UTC))  # type: ignore[call-arg]
+    assert not replace(event, start=start).is_all_day()
+
+
+def test_get_calendar_events_cached(tmp_path: Path) -> None:
+    clock = FakeClock()
+    cache = ResponseCache(tmp_path / "cache.sqlite3", clock=clock)
+    kwargs: dict[str, Any] = {
+        "creds": MagicMock(),
+        "calendar_id": "calendar_id",
+        "time_min": datetime(year=2025, month=1, day=1, tzinfo=UTC),
+        "time_max": datetime(year=2025, month=1, day=2, tzinfo=UTC),
+        "cache": cache,
+    }
+
+    with patch("harvest_auto_timesheet.gcal.build") as mock_build:
+        request = mock_build.return_value.events.return_value.list.return_value
+        request.headers = {}
+        request.execute.return_value = {"items": [], "etag": '"v1"'}
+
+        assert get_calendar_events(**kwargs) == []
+        assert get_calendar_events(**kwargs) == []
+        assert request.execute.call_count == 1
+        assert mock_build.call_count == 1
+
+        clock.now += gcal.CACHE_TTL
+        request.execute.side_effect = HttpError(
+            resp=httplib2.Response({"status": HTTPStatus.NOT_MODIFIED}),
+            content=b"",
+        )
+        assert get_calendar_events(**kwargs) == []
+        assert request.headers["If-None-Match"] == '"v1"'
+        assert request.execute.call_count == 2
+
+
+def test_get_calendar_events_pages() -> None:
+    event = CalendarEvent(
+        status="confirmed",
+        summary="some summary",
+        start=DateTime(datetime=datetime(year=2025, month=1, day=1, tzinfo=UTC)),  # type: ignore[call-arg]
+        end=DateTime(datetime=datetime(year=2025, month=1, day=2, tzinfo=UTC)),  # type: ignore[call-arg]
+    )
+    item = EVENT_ADAPTER.dump_python(event, mode="json", by_alias=True)
+    pages = {
+        None: {"items": [item], "nextPageToken": "page 2"},
+        "page 2": {"items": [item, item]},
+    }
+
+    with patch("harvest_auto_timesheet.gcal.build") as mock_build:
+        events_list = mock_build.return_value.events.return_value.list
+        events_list.side_effect = lambda **kwargs: MagicMock(
+            method="GET", execute=MagicMock(return_value=pages[kwargs["pageToken"]])
+        )
+        instrumentation = Instrumentation()
+
+        events = get_calendar_events(
+            creds=MagicMock(),
+            calendar_id="calendar_id",
+            time_min=datetime.now(tz=UTC),
+            time_max=datetime.now(tz=UTC),
+            max_results=1,
+            instrumentation=instrumentation,
+        )
+
+    assert events == [event] * 3
+    assert instrumentation.count_requests(gcal.SERVICE) == 2
+    assert events_list.call_args.kwargs["maxResults"] == 1
+    assert events_list.call_args.kwargs["fields"] == gcal.EVENT_FIELDS
+
+
+def test_sync_calendar_events() -> None:
+    pages = {
+        None: {"items": [{"id": "a"}], "nextPageToken": "page 2"},
+        "page 2": {"items": [{"id": "b"}], "nextSyncToken": "next"},
+    }
+
+    with patch("harvest_auto_timesheet.gcal.build") as mock_build:
+        events_list = mock_build.return_value.events.return_value.list
+        events_list.side_effect = lambda **kwargs: MagicMock(
+            execute=MagicMock(return_value=pages[kwargs["pageToken"]])
+        )
+        creds = MagicMock()
+
+        calendar_sync = sync_calendar_events(creds, "calendar_id", "token")
+        assert calendar_sync == CalendarSync(
+            changed_event_ids=["a", "b"], next_sync_token="next"
+        )
+        assert events_list.call_args.kwargs["syncToken"] == "token"
+
+        assert (
+            get_sync_token(
+                creds, "calendar_id", datetime.now(tz=UTC), datetime.now(tz=UTC)
+            )
+            == "next"
+        )
+
+        events_list.side_effect = lambda **_: MagicMock(
+            execute=MagicMock(
+                side_effect=HttpError(
+                    resp=httplib2.Response({"status": HTTPStatus.GONE}), content=b""
+                )
+            )
+        )
+        with pytest.raises(SyncTokenExpiredError):
+            sync_calendar_events(creds, "calendar_id", "token")
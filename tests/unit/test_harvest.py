@@ -1,10 +1,38 @@
+import asyncio
+import json
 from datetime import date
 from http import HTTPStatus
+from pathlib import Path
+from typing import Any
 
 import httpx
+import pytest
 
-from harvest_auto_timesheet.harvest import Harvest
+from harvest_auto_timesheet.cache import ResponseCache
+from harvest_auto_timesheet.harvest import (
+    AsyncHarvest,
+    ExternalReference,
+    Harvest,
+    NewTimeEntry,
+    TimeEntry,
+)
 from harvest_auto_timesheet.tasks import ProjectEnum, TaskEnum
+from tests.conftest import MockEnvVars
+from tests.fakes import FakeClock
+
+
+def _time_entry(id_: int, hours: float = 8) -> dict[str, Any]:
+    """Get a time entry as returned by the Harvest API."""
+    return {
+        "id": id_,
+        "spent_date": "2025-01-01",
+        "hours": hours,
+        "project": {"id": ProjectEnum.EYECUE_GENERAL, "name": "General"},
+        "task": {"id": TaskEnum.ENGINEERING, "name": "Engineering"},
+        "user": {"id": 7, "name": "Someone"},
+        "notes": None,
+        "external_reference": None,
+    }
 
 
 def test_harvest_get_user(mock_harvest: Harvest) -> None:
@@ -35,24 +63,69 @@ def test_harvest_get_time_entries(mock_harvest: Harvest) -> None:
     )
 
 
+def test_harvest_iter_time_entries_follows_next_links(mock_harvest: Harvest) -> None:
+    next_url = "https://api.harvestapp.com/v2/time_entries?page=2&per_page=2"
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.params.get("page") == "2":
+            return httpx.Response(
+                HTTPStatus.OK,
+                json={"time_entries": [_time_entry(3)], "links": {"next": None}},
+            )
+        return httpx.Response(
+            HTTPStatus.OK,
+            json={
+                "time_entries": [_time_entry(1), _time_entry(2)],
+                "links": {"next": next_url},
+            },
+        )
+
+    mock_harvest.client = httpx.Client(transport=httpx.MockTransport(handler))
+    entries = mock_harvest.iter_time_entries(
+        from_date=date(year=2025, month=1, day=1),
+        to_date=date(year=2025, month=1, day=31),
+        per_page=2,
+    )
+
+    assert [entry.id for entry in entries] == [1, 2, 3]
+    assert requests[0].url.params["per_page"] == "2"
+    assert requests[0].url.params["from"] == "2025-01-01"
+    assert str(requests[1].url) == next_url
+
+
+def test_harvest_iter_time_entries_per_page_bounds(mock_harvest: Harvest) -> None:
+    with pytest.raises(ValueError, match="per_page"):
+        next(
+            mock_harvest.iter_time_entries(
+                from_date=date(year=2025, month=1, day=1),
+                to_date=date(year=2025, month=1, day=2),
+                per_page=2001,
+            )
+        )
+
+
 def test_harvest_add_time_entry(mock_harvest: Harvest) -> None:
     test_client = httpx.Client(
         transport=httpx.MockTransport(
-            lambda _: httpx.Response(
-                HTTPStatus.CREATED, json={"statusCode": HTTPStatus.CREATED}
-            )
+            lambda _: httpx.Response(HTTPStatus.CREATED, json=_time_entry(1))
         )
     )
 
     mock_harvest.client = test_client
     response = mock_harvest.add_time_entry(
-        project_id=ProjectEnum.EYECUE_GENERAL,
-        task_id=TaskEnum.ENGINEERING,
-        spent_date=date(year=2025, month=1, day=1),
-        hours=8,
-        notes="tada",
+        NewTimeEntry(
+            project_id=ProjectEnum.EYECUE_GENERAL,
+            task_id=TaskEnum.ENGINEERING,
+            spent_date=date(year=2025, month=1, day=1),
+            hours=8,
+            notes="tada",
+        )
     )
-    assert response == {"statusCode": HTTPStatus.CREATED}
+    assert response.id == 1
+    assert response.project_id == ProjectEnum.EYECUE_GENERAL
+    assert response.spent_date == date(year=2025, month=1, day=1)
 
 
 def test_harvest_delete_time_entry(mock_harvest: Harvest) -> None:
@@ -62,3 +135,236 @@ def test_harvest_delete_time_entry(mock_harvest: Harvest) -> None:
 
     mock_harvest.client = test_client
     mock_harvest.delete_time_entry(time_entry_id=123456)
+
+
+def test_async_harvest_add_time_entries_bounded(
+    mock_env_vars: MockEnvVars,
+) -> None:
+    in_flight = 0
+    max_in_flight = 0
+    payloads: list[dict[str, Any]] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        payloads.append(payload := json.loads(request.content))
+        return httpx.Response(
+            HTTPStatus.CREATED, json=_time_entry(len(payloads), payload["hours"])
+        )
+
+    entries = [
+        NewTimeEntry(
+            project_id=ProjectEnum.EYECUE_GENERAL,
+            task_id=TaskEnum.ENGINEERING,
+            spent_date=date(year=2025, month=1, day=1),
+            hours=i,
+        )
+        for i in range(10)
+    ]
+
+    async def run() -> list[TimeEntry]:
+        async with AsyncHarvest(
+            harvest_account_id=mock_env_vars["HARVEST_ACCOUNT_ID"],
+            harvest_access_token=mock_env_vars["HARVEST_ACCESS_TOKEN"],
+            max_concurrency=3,
+        ) as harvest:
+            harvest.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            return await harvest.add_time_entries(entries)
+
+    responses = asyncio.run(run())
+
+    assert [response.hours for response in responses] == list(range(10))
+    assert "notes" not in payloads[0]
+    assert max_in_flight == 3
+
+
+def test_async_harvest_get_time_entries(mock_env_vars: MockEnvVars) -> None:
+    next_url = "https://api.harvestapp.com/v2/time_entries?page=2"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.params.get("page") == "2":
+            return httpx.Response(
+                HTTPStatus.OK, json={"time_entries": [_time_entry(2)], "links": {}}
+            )
+        return httpx.Response(
+            HTTPStatus.OK,
+            json={"time_entries": [_time_entry(1)], "links": {"next": next_url}},
+        )
+
+    async def run() -> list[TimeEntry]:
+        harvest = AsyncHarvest(
+            harvest_account_id=mock_env_vars["HARVEST_ACCOUNT_ID"],
+            harvest_access_token=mock_env_vars["HARVEST_ACCESS_TOKEN"],
+        )
+        harvest.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return await harvest.get_time_entries(
+            from_date=date(year=2025, month=1, day=1),
+            to_date=date(year=2025, month=1, day=2),
+        )
+
+    assert [entry.id for entry in asyncio.run(run())] == [1, 2]
+
+
+def test_harvest_retries_rate_limited_requests(mock_harvest: Harvest) -> None:
+    responses = iter(
+        [
+            httpx.Response(HTTPStatus.TOO_MANY_REQUESTS, headers={"Retry-After": "0"}),
+            httpx.Response(HTTPStatus.BAD_GATEWAY, headers={"Retry-After": "0"}),
+            httpx.Response(HTTPStatus.OK, json={"hey": "it's me"}),
+        ]
+    )
+    mock_harvest.client = httpx.Client(
+        transport=httpx.MockTransport(lambda _: next(responses))
+    )
+
+    assert mock_harvest.get_user() == {"hey": "it's me"}
+    assert mock_harvest.stats.requests == 3
+    assert mock_harvest.stats.rate_limited == 1
+    assert mock_harvest.stats.retried == 2
+
+
+def test_harvest_does_not_retry_failed_writes(mock_harvest: Harvest) -> None:
+    mock_harvest.client = httpx.Client(
+        transport=httpx.MockTransport(lambda _: httpx.Response(HTTPStatus.BAD_GATEWAY))
+    )
+
+    with pytest.raises(httpx.HTTPStatusError):
+        mock_harvest.add_time_entry(
+            NewTimeEntry(
+                project_id=ProjectEnum.EYECUE_GENERAL,
+                task_id=TaskEnum.ENGINEERING,
+                spent_date=date(year=2025, month=1, day=1),
+                hours=8,
+            )
+        )
+    assert mock_harvest.stats.retried == 0
+
+
+def test_harvest_recovers_failed_creates_by_reference(mock_harvest: Harvest) -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.method == "POST":
+            return httpx.Response(HTTPStatus.BAD_GATEWAY)
+        if request.url.path == "/v2/users/me":
+            return httpx.Response(HTTPStatus.OK, json={"id": 7})
+        return httpx.Response(HTTPStatus.OK, json={"time_entries": [_time_entry(123)]})
+
+    mock_harvest.client = httpx.Client(transport=httpx.MockTransport(handler))
+    response = mock_harvest.add_time_entry(
+        NewTimeEntry(
+            project_id=ProjectEnum.EYECUE_GENERAL,
+            task_id=TaskEnum.ENGINEERING,
+            spent_date=date(year=2025, month=1, day=1),
+            hours=8,
+            external_reference=ExternalReference(id="gcal:event"),
+        )
+    )
+
+    assert response.id == 123
+    assert [request.method for request in requests] == ["POST", "GET", "GET"]
+    assert requests[-1].url.params["external_reference_id"] == "gcal:event"
+    assert requests[-1].url.params["user_id"] == "7"
+
+
+def test_harvest_revalidates_cached_responses(
+    mock_harvest: Harvest, tmp_path: Path
+) -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(HTTPStatus.NOT_MODIFIED)
+        return httpx.Response(
+            HTTPStatus.OK, json={"hey": "it's me"}, headers={"ETag": '"v1"'}
+        )
+
+    clock = FakeClock()
+    mock_harvest.cache = ResponseCache(tmp_path / "cache.sqlite3", clock=clock)
+    mock_harvest.client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    assert mock_harvest.get_user() == {"hey": "it's me"}
+    assert mock_harvest.get_user() == {"hey": "it's me"}
+    assert len(requests) == 1
+
+    clock.now += 60
+    assert mock_harvest.get_user() == {"hey": "it's me"}
+    assert len(requests) == 2
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+
+    # writes invalidate the cache
+    mock_harvest.delete_time_entry(time_entry_id=1)
+    assert mock_harvest.get_user() == {"hey": "it's me"}
+    assert "If-None-Match" not in requests[-1].headers
+
+
+def test_harvest_writes_only_invalidate_the_cache_of_their_token(
+    mock_harvest: Harvest, mock_env_vars: MockEnvVars, tmp_path: Path
+) -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(HTTPStatus.OK, json={"id": 7})
+
+    cache = ResponseCache(tmp_path / "cache.sqlite3")
+    other = Harvest(
+        harvest_account_id=mock_env_vars["HARVEST_ACCOUNT_ID"],
+        harvest_access_token="another token",
+        cache=cache,
+    )
+    mock_harvest.cache = cache
+    for harvest in (mock_harvest, other):
+        harvest.client = httpx.Client(transport=httpx.MockTransport(handler))
+        harvest.get_user()
+    assert len(requests) == 2
+
+    mock_harvest.delete_time_entry(time_entry_id=1)
+    other.get_user()
+    assert len(requests) == 3
+    mock_harvest.get_user()
+    assert len(requests) == 4
+
+
+def test_async_harvest_invalidates_the_cache_once_per_batch(
+    mock_env_vars: MockEnvVars, tmp_path: Path
+) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "DELETE":
+            return httpx.Response(HTTPStatus.OK)
+        return httpx.Response(HTTPStatus.OK, json={"id": 7})
+
+    cache = ResponseCache(tmp_path / "cache.sqlite3")
+    invalidated: list[str] = []
+    invalidate = cache.invalidate
+
+    def record_invalidate(namespace: str) -> None:
+        invalidated.append(namespace)
+        invalidate(namespace)
+
+    cache.invalidate = record_invalidate  # type: ignore[method-assign]
+
+    async def run() -> None:
+        async with AsyncHarvest(
+            harvest_account_id=mock_env_vars["HARVEST_ACCOUNT_ID"],
+            harvest_access_token=mock_env_vars["HARVEST_ACCESS_TOKEN"],
+            cache=cache,
+        ) as harvest:
+            harvest.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            await harvest.get_user()
+            await asyncio.gather(
+                *(harvest.delete_time_entry(time_entry_id=id_) for id_ in range(5))
+            )
+            assert invalidated == [harvest.cache_namespace]
+
+            # a response cached after the batch is dropped by the next write
+            await harvest.get_user()
+            await harvest.delete_time_entry(time_entry_id=5)
+            assert len(invalidated) == 2
+
+    asyncio.run(run())
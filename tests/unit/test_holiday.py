@@ -0,0 +1,51 @@
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+import holidays
+
+from harvest_auto_timesheet.holiday import DayOffKind, HolidayIndex
+
+
+def test_holiday_index_public_holidays_are_loaded_per_year() -> None:
+    index = HolidayIndex(country="NZ", subdiv="AUK")
+
+    with patch(
+        "holidays.country_holidays",
+        wraps=holidays.country_holidays,
+    ) as country_holidays:
+        assert date(2025, 1, 27) in index  # Auckland Anniversary Day
+        assert date(2025, 1, 28) not in index
+        assert date(2025, 12, 25) in index
+        assert country_holidays.call_count == 1
+
+        assert date(2026, 12, 25) in index
+        assert country_holidays.call_count == 2
+
+    day_off = index.get(date(2025, 12, 25))
+    assert day_off is not None
+    assert day_off.kind == DayOffKind.PUBLIC
+
+
+def test_holiday_index_from_file(tmp_path: Path) -> None:
+    path = tmp_path / "days-off.json"
+    path.write_text(
+        """
+        [
+            {"date": "2025-12-24", "name": "Company day off", "kind": "company"},
+            {"date": "2025-07-07", "end": "2025-07-09"}
+        ]
+        """,
+        encoding="utf-8",
+    )
+
+    index = HolidayIndex.from_file(path)
+
+    company = index.get(date(2025, 12, 24))
+    assert company is not None
+    assert company.kind == DayOffKind.COMPANY
+    assert [
+        day_off.kind if (day_off := index.get(date(2025, 7, day))) else None
+        for day in range(6, 11)
+    ] == [None, DayOffKind.LEAVE, DayOffKind.LEAVE, DayOffKind.LEAVE, None]
+    assert HolidayIndex.from_file(None).get(date(2025, 7, 7)) is None
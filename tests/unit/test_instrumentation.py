@@ -0,0 +1,58 @@
+import json
+from http import HTTPStatus
+from pathlib import Path
+
+import httpx
+import pytest
+
+from harvest_auto_timesheet.instrumentation import Instrumentation, format_prometheus
+
+
+def test_span_records_failed_phases() -> None:
+    instrumentation = Instrumentation(clock=iter([0.0, 1.0, 10.0, 13.0]).__next__)
+
+    with instrumentation.span("calendar"):
+        pass
+    with pytest.raises(RuntimeError), instrumentation.span("calendar"):
+        raise RuntimeError
+
+    stats = instrumentation.get_summary().spans["calendar"]
+    assert stats.count == 2
+    assert stats.total_seconds == 4
+    assert stats.max_seconds == 3
+
+
+def test_instrument_httpx_records_requests() -> None:
+    instrumentation = Instrumentation()
+    client = httpx.Client(
+        transport=httpx.MockTransport(lambda _: httpx.Response(HTTPStatus.OK))
+    )
+    instrumentation.instrument_httpx(client, "harvest")
+
+    client.get("https://api.harvestapp.com/v2/users/me")
+    client.get("https://api.harvestapp.com/v2/users/me")
+
+    (stats,) = instrumentation.get_summary().requests
+    assert (stats.service, stats.method, stats.status) == ("harvest", "GET", 200)
+    assert stats.count == 2
+    assert sum(stats.buckets) == 2
+
+
+def test_save_json_and_textfile(tmp_path: Path) -> None:
+    instrumentation = Instrumentation()
+    instrumentation.observe_request("pagerduty", "GET", 200, 0.07)
+    instrumentation.observe_request("pagerduty", "GET", 200, 30)
+
+    instrumentation.save_json(tmp_path / "metrics.json")
+    instrumentation.save_textfile(tmp_path / "metrics.prom")
+
+    summary = json.loads((tmp_path / "metrics.json").read_text())
+    assert summary["requests"][0]["count"] == 2
+    textfile = (tmp_path / "metrics.prom").read_text()
+    assert textfile == format_prometheus(instrumentation.get_summary())
+    labels = 'service="pagerduty",method="GET",status="200"'
+    metric = "harvest_auto_timesheet_http_request_duration_seconds"
+    assert f'{metric}_bucket{{{labels},le="0.05"}} 0' in textfile
+    assert f'{metric}_bucket{{{labels},le="0.1"}} 1' in textfile
+    assert f'{metric}_bucket{{{labels},le="+Inf"}} 2' in textfile
+    assert f"{metric}_count{{{labels}}} 2" in textfile
@@ -0,0 +1,63 @@
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from harvest_auto_timesheet.intervals import (
+    Interval,
+    Segment,
+    WorkingHours,
+    clip,
+    get_hours,
+    resolve_overlaps,
+)
+
+TZ = ZoneInfo("Pacific/Auckland")
+DAY = date(year=2025, month=6, day=3)
+
+
+def _at(hour: float) -> datetime:
+    return datetime.combine(DAY, time(int(hour), int(hour % 1 * 60)), tzinfo=TZ)
+
+
+def _interval(start: float, end: float, priority: int = 0) -> Interval:
+    return Interval(start=_at(start), end=_at(end), priority=priority)
+
+
+def _spans(segments: list[Segment]) -> list[tuple[float, float, int]]:
+    return [
+        (
+            segment.start.hour + segment.start.minute / 60,
+            segment.end.hour + segment.end.minute / 60,
+            segment.index,
+        )
+        for segment in segments
+    ]
+
+
+def test_resolve_overlaps_books_double_booked_time_once() -> None:
+    segments = resolve_overlaps(
+        [_interval(10, 11), _interval(9, 10.5), _interval(13, 14)]
+    )
+
+    # the meeting that started first keeps the time
+    assert _spans(segments) == [(9, 10.5, 1), (10.5, 11, 0), (13, 14, 2)]
+    assert get_hours(segments) == pytest.approx(3)
+
+
+def test_resolve_overlaps_by_priority() -> None:
+    segments = resolve_overlaps([_interval(9, 12), _interval(10, 11, priority=1)])
+
+    assert _spans(segments) == [(9, 10, 0), (10, 11, 1), (11, 12, 0)]
+
+
+def test_resolve_overlaps_ignores_empty_intervals() -> None:
+    assert resolve_overlaps([_interval(9, 9), _interval(10, 9)]) == []
+
+
+def test_clip_to_working_hours() -> None:
+    segments = resolve_overlaps([_interval(8, 10), _interval(16, 19)])
+
+    clipped = clip(segments, *WorkingHours().get_window(DAY, TZ))
+
+    assert _spans(clipped) == [(9, 10, 0), (16, 17, 1)]
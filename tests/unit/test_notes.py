@@ -0,0 +1,126 @@
+import asyncio
+from http import HTTPStatus
+from pathlib import Path
+
+import httpx
+
+from harvest_auto_timesheet.notes import (
+    OFFLINE_NOTES,
+    NoteKind,
+    NotePool,
+    fetch_advice,
+    fetch_jokes,
+)
+
+
+async def _fetch_numbers(_: httpx.AsyncClient, amount: int) -> list[str]:
+    return [str(i) for i in range(amount)]
+
+
+async def _fetch_error(_: httpx.AsyncClient, __: int) -> list[str]:
+    msg = "offline"
+    raise httpx.ConnectError(msg)
+
+
+def test_fetch_jokes_in_batches() -> None:
+    amounts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        amount = int(request.url.params["amount"])
+        amounts.append(amount)
+        if amount == 1:
+            return httpx.Response(HTTPStatus.OK, json={"type": "single", "joke": "one"})
+        jokes = [
+            {"type": "twopart", "setup": "a", "delivery": str(i)} for i in range(amount)
+        ]
+        return httpx.Response(HTTPStatus.OK, json={"amount": amount, "jokes": jokes})
+
+    async def fetch() -> list[str]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await fetch_jokes(client, 21)
+
+    jokes = asyncio.run(fetch())
+
+    assert sorted(amounts) == [1, 10, 10]
+    assert len(jokes) == 21
+    assert "one" in jokes
+    assert "a 9" in jokes
+
+
+def test_fetch_advice_by_slip_id() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        slip_id = int(request.url.path.rsplit("/", 1)[-1])
+        if slip_id % 2:
+            message = {"type": "error", "text": "Advice slip not found."}
+            return httpx.Response(HTTPStatus.OK, json={"message": message})
+        return httpx.Response(
+            HTTPStatus.OK, json={"slip": {"id": slip_id, "advice": str(slip_id)}}
+        )
+
+    async def fetch() -> list[str]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await fetch_advice(client, 30)
+
+    advice = asyncio.run(fetch())
+
+    # distinct slips, without the missing ones
+    assert len(advice) == len(set(advice))
+    assert all(int(slip) % 2 == 0 for slip in advice)
+
+
+def test_pool_stops_refilling_when_nothing_new() -> None:
+    calls = []
+
+    async def fetch_same(_: httpx.AsyncClient, amount: int) -> list[str]:
+        calls.append(amount)
+        return ["same"] * amount
+
+    pool = NotePool(low_water=5, fetchers=dict.fromkeys(NoteKind, fetch_same))
+    pool.refill()
+    assert len(calls) == len(NoteKind)
+
+    for _ in range(3):
+        pool.get(NoteKind.JOKE)
+        pool.wait()
+    pool.refill()
+
+    # the second refill adds nothing new, so there isn't a third
+    assert len(calls) == 2 * len(NoteKind)
+
+
+def test_pool_falls_back_to_offline_notes() -> None:
+    pool = NotePool(fetchers=dict.fromkeys(NoteKind, _fetch_error))
+
+    assert pool.get(NoteKind.JOKE) in OFFLINE_NOTES[NoteKind.JOKE]
+    pool.wait()
+    assert pool.get(NoteKind.ADVICE) in OFFLINE_NOTES[NoteKind.ADVICE]
+
+
+def test_pool_dedups_and_does_not_repeat_used_notes() -> None:
+    pool = NotePool(low_water=0)
+
+    assert pool.add(NoteKind.JOKE, ["a", "b", "a", ""]) == 2
+    assert pool.get(NoteKind.JOKE) == "a"
+    assert pool.add(NoteKind.JOKE, ["a", "b", "c"]) == 1
+    assert [pool.get(NoteKind.JOKE) for _ in range(2)] == ["b", "c"]
+
+
+def test_pool_refills_and_persists(tmp_path: Path) -> None:
+    path = tmp_path / "notes.json"
+    pool = NotePool(
+        path,
+        low_water=5,
+        refill_amount=10,
+        fetchers=dict.fromkeys(NoteKind, _fetch_numbers),
+    )
+
+    pool.refill()
+    assert pool.size(NoteKind.JOKE) == 10
+    assert pool.get(NoteKind.JOKE) == "0"
+
+    pool.save(path)
+    loaded = NotePool(path, low_water=0)
+    assert loaded.size(NoteKind.ADVICE) == 10
+    assert loaded.get(NoteKind.JOKE) == "1"
+    # the used note is remembered so it isn't added again
+    assert loaded.add(NoteKind.JOKE, ["0"]) == 0
@@ -0,0 +1,88 @@
+import time
+from datetime import UTC, date, datetime, timedelta
+from typing import Any
+from unittest.mock import MagicMock
+
+from harvest_auto_timesheet.pagerd import get_incidents
+from harvest_auto_timesheet.ratelimit import TokenBucket
+
+USER_ID = "user"
+RESOLVED_AT = datetime(year=2025, month=1, day=1, hour=12, tzinfo=UTC)
+
+
+def _incident(incident_id: str) -> dict[str, Any]:
+    return {
+        "id": incident_id,
+        "title": f"title {incident_id}",
+        "summary": f"summary {incident_id}",
+        "html_url": f"https://pagerduty.com/{incident_id}",
+        "resolved_at": RESOLVED_AT.isoformat(),
+    }
+
+
+def _logs(incident_id: str, agent_id: str) -> list[dict[str, Any]]:
+    return [
+        {
+            "id": f"{incident_id}-{type_}",
+            "type": type_,
+            "summary": type_,
+            "agent": {"id": agent_id},
+            "created_at": (RESOLVED_AT - timedelta(hours=hours)).isoformat(),
+        }
+        for type_, hours in [("acknowledge_log_entry", 1), ("resolve_log_entry", 0)]
+    ]
+
+
+def _mock_pd_client(agents: dict[str, str]) -> MagicMock:
+    def rget(path: str, **_: Any) -> Any:
+        if path == f"users/{USER_ID}":
+            return {"time_zone": "UTC", "teams": [{"id": "team"}]}
+
+        incident_id = path.split("/")[1]
+        # make the first incidents the slowest to check the order is kept
+        time.sleep(0.01 * (len(agents) - int(incident_id)))
+        return _logs(incident_id, agents[incident_id])
+
+    def get(path: str, **_: Any) -> Any:
+        assert path == f"users/{USER_ID}/log_entries"
+        response = MagicMock()
+        response.json.return_value = {
+            "log_entries": [
+                {"id": "log", "incident": {"id": incident_id}}
+                for incident_id, agent_id in agents.items()
+                if agent_id == USER_ID
+            ]
+            + [{"id": "not an incident log"}],
+            "more": False,
+        }
+        return response
+
+    def list_all(path: str, **_: Any) -> Any:
+        assert path == "incidents"
+        return [_incident(i) for i in agents]
+
+    pd_client = MagicMock()
+    pd_client.rget.side_effect = rget
+    pd_client.get.side_effect = get
+    pd_client.list_all.side_effect = list_all
+    return pd_client
+
+
+def test_get_incidents() -> None:
+    agents = {str(i): USER_ID if i % 2 == 0 else "someone else" for i in range(10)}
+    pd_client = _mock_pd_client(agents)
+    rate_limiter = TokenBucket(capacity=100, period=1)
+
+    incidents = get_incidents(
+        pd_client=pd_client,
+        user_id=USER_ID,
+        since=date(year=2025, month=1, day=1),
+        until=date(year=2025, month=1, day=5),
+        rate_limiter=rate_limiter,
+        max_workers=4,
+    )
+
+    assert [incident.id for incident in incidents] == ["0", "2", "4", "6", "8"]
+    assert all(incident.duration == timedelta(hours=1) for incident in incidents)
+    # logs are only fetched for the incidents the user acted on
+    assert rate_limiter.stats.requests == 5
@@ -0,0 +1,74 @@
+from datetime import UTC, date, datetime
+from pathlib import Path
+
+import pytest
+
+from harvest_auto_timesheet.harvest import NewTimeEntry
+from harvest_auto_timesheet.planfile import (
+    WRITE_LATENCY,
+    Phase,
+    PlanFile,
+    estimate_seconds,
+)
+from harvest_auto_timesheet.planner import Operation, OperationType, Plan
+from harvest_auto_timesheet.ratelimit import TokenBucket
+from tests.fakes import FakeClock
+
+MONDAY = date(year=2025, month=1, day=6)
+
+
+def _plan_file() -> PlanFile:
+    plan = Plan(
+        operations=[
+            Operation(
+                type=OperationType.CREATE,
+                entry=NewTimeEntry(
+                    project_id=1, task_id=2, spent_date=MONDAY, hours=8, notes="a"
+                ),
+            ),
+            Operation(type=OperationType.DELETE, time_entry_id=3),
+        ]
+    )
+    return PlanFile.create(
+        week_start=MONDAY,
+        plan=plan,
+        created_at=datetime(2025, 1, 6, tzinfo=UTC),
+        reads=[Phase(name="calendar", requests=4, seconds=1.5, estimated=False)],
+        rate_limiter=TokenBucket(),
+        max_concurrency=10,
+    )
+
+
+@pytest.mark.parametrize("name", ["plan.json", "plan.ndjson"])
+def test_plan_file_roundtrip(tmp_path: Path, name: str) -> None:
+    plan_file = _plan_file()
+
+    plan_file.save(tmp_path / name)
+
+    assert PlanFile.load(tmp_path / name) == plan_file
+
+
+def test_plan_file_ndjson_has_one_operation_per_line(tmp_path: Path) -> None:
+    _plan_file().save(tmp_path / "plan.ndjson")
+
+    lines = (tmp_path / "plan.ndjson").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 3
+    assert '"phases"' in lines[0]
+    assert '"operations"' not in lines[0]
+
+
+def test_estimate_seconds() -> None:
+    clock = FakeClock()
+    rate_limiter = TokenBucket(capacity=100, period=15, clock=clock)
+
+    assert estimate_seconds(0, rate_limiter, max_concurrency=10) == 0
+    # within the burst only the concurrency limits the writes
+    assert estimate_seconds(50, rate_limiter, max_concurrency=10) == pytest.approx(
+        5 * WRITE_LATENCY
+    )
+    # past the burst the rest wait for the bucket to refill
+    assert estimate_seconds(300, rate_limiter, max_concurrency=100) == pytest.approx(
+        200 / (100 / 15)
+    )
+    # the estimate doesn't reserve tokens
+    assert rate_limiter.reserve() == 0
@@ -0,0 +1,514 @@
+import asyncio
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from harvest_auto_timesheet.allocation import Allocation, Weekday
+from harvest_auto_timesheet.classify import Classifier, Rule, Source
+from harvest_auto_timesheet.dedup import WriteIndex
+from harvest_auto_timesheet.entries import TimeEntryIndex
+from harvest_auto_timesheet.gcal import CalendarEvent, DateTime
+from harvest_auto_timesheet.harvest import ExternalReference, NewTimeEntry, TimeEntry
+from harvest_auto_timesheet.holiday import DayOffRange, HolidayIndex
+from harvest_auto_timesheet.pagerd import Incident, IncidentLog
+from harvest_auto_timesheet.planner import (
+    Operation,
+    OperationType,
+    Plan,
+    execute_plan,
+    execute_plan_async,
+    plan_week,
+)
+from harvest_auto_timesheet.tasks import ProjectEnum, TaskEnum
+
+TZ = ZoneInfo("Pacific/Auckland")
+MONDAY = date(year=2025, month=6, day=2)  # 2 June 2025 is King's Birthday
+WEEKDAYS = [MONDAY + timedelta(days=i) for i in range(5)]
+HOLIDAYS = {MONDAY}
+
+
+@pytest.fixture
+def filler_tasks() -> list[tuple[int, int, Callable[[], str]]]:
+    return [
+        (ProjectEnum.SOC2.value, TaskEnum.ENGINEERING.value, lambda: "note"),
+        (ProjectEnum.CAMERA_CONFIG_API.value, TaskEnum.ENGINEERING.value, str),
+    ]
+
+
+def _event(summary: str, day: date, start: int, end: int) -> CalendarEvent:
+    return CalendarEvent(
+        id=f"{summary}-{day}",
+        status="confirmed",
+        summary=summary,
+        start=DateTime(
+            dateTime=datetime(day.year, day.month, day.day, start, tzinfo=TZ)
+        ),  # type: ignore[call-arg]
+        end=DateTime(dateTime=datetime(day.year, day.month, day.day, end, tzinfo=TZ)),  # type: ignore[call-arg]
+    )
+
+
+def _incident(day: date) -> Incident:
+    logs = [
+        IncidentLog(
+            id=f"log-{type_}",
+            type=type_,
+            summary=type_,
+            agent_id="user",
+            created_at=datetime(day.year, day.month, day.day, hour, tzinfo=TZ),
+        )
+        for type_, hour in [("acknowledge_log_entry", 10), ("resolve_log_entry", 11)]
+    ]
+    return Incident(
+        id="incident",
+        title="title",
+        summary="summary",
+        html_url="https://pagerduty.com/incident",
+        resolved_at=datetime(day.year, day.month, day.day, 11, tzinfo=TZ),
+        logs=logs,
+    )
+
+
+def _apply(plan: Plan, existing: list[TimeEntry]) -> list[TimeEntry]:
+    """Apply a plan to a fake list of Harvest time entries."""
+    entries = {entry.id: entry for entry in existing}
+    for operation in plan.operations:
+        if operation.type == OperationType.DELETE:
+            assert operation.time_entry_id is not None
+            del entries[operation.time_entry_id]
+            continue
+
+        assert operation.entry is not None
+        entry_id = operation.time_entry_id or len(entries) + 1000
+        entries[entry_id] = TimeEntry(
+            id=entry_id,
+            spent_date=operation.entry.spent_date,
+            hours=operation.entry.hours,
+            project_id=operation.entry.project_id,
+            task_id=operation.entry.task_id,
+            user_id=1,
+            notes=operation.entry.notes,
+            external_reference=operation.entry.external_reference,
+        )
+    return list(entries.values())
+
+
+def _hours_per_day(entries: list[TimeEntry]) -> dict[date, float]:
+    hours: dict[date, float] = {}
+    for entry in entries:
+        hours[entry.spent_date] = hours.get(entry.spent_date, 0) + entry.hours
+    return hours
+
+
+def test_plan_week_from_empty_timesheet() -> None:
+    plan = plan_week(
+        weekdays=WEEKDAYS,
+        calendar_events=[_event("standup", WEEKDAYS[1], 9, 10)],
+        incidents=[_incident(WEEKDAYS[2])],
+        existing_entries=[],
+        holidays=HOLIDAYS,
+    )
+
+    assert plan.count(OperationType.CREATE) == len(plan.operations)
+    entries = _apply(plan, [])
+    assert list(_hours_per_day(entries).values()) == pytest.approx([8] * 5)
+    # one holiday, one meeting, one incident and two filler entries for 4 days
+    assert len(entries) == 3 + 2 * 4
+
+
+def test_plan_week_books_leave() -> None:
+    holidays = HolidayIndex(days_off=[DayOffRange(date=WEEKDAYS[3])])
+
+    entries = _apply(
+        plan_week(
+            weekdays=WEEKDAYS,
+            calendar_events=[],
+            incidents=[],
+            existing_entries=[],
+            holidays=holidays,
+        ),
+        [],
+    )
+
+    leave = [entry for entry in entries if entry.task_id == TaskEnum.LEAVE]
+    assert [entry.spent_date for entry in leave] == [WEEKDAYS[3]]
+    assert leave[0].notes == "Leave"
+    assert list(_hours_per_day(entries).values()) == pytest.approx([8] * 5)
+
+
+def test_plan_week_books_allocation_targets() -> None:
+    allocation = Allocation(
+        weekday_hours={Weekday.MONDAY: 4, Weekday.FRIDAY: 0}, increment=0.25
+    )
+
+    entries = _apply(
+        plan_week(
+            weekdays=WEEKDAYS,
+            calendar_events=[_event("standup", WEEKDAYS[1], 9, 10)],
+            incidents=[],
+            existing_entries=[],
+            holidays=HOLIDAYS,
+            allocation=allocation,
+        ),
+        [],
+    )
+
+    # the holiday is booked for the day's target and nothing on the day off
+    assert _hours_per_day(entries) == pytest.approx(
+        {WEEKDAYS[0]: 4, WEEKDAYS[1]: 8, WEEKDAYS[2]: 8, WEEKDAYS[3]: 8}
+    )
+    assert all(entry.hours * 4 == round(entry.hours * 4) for entry in entries)
+
+
+def test_plan_week_classifies_events_and_incidents() -> None:
+    classifier = Classifier(
+        [
+            Rule(project_id=1, task_id=2, keywords=["retro"]),
+            Rule(project_id=3, task_id=4, keywords=["summary"], source=Source.INCIDENT),
+        ]
+    )
+    kwargs: dict[str, Any] = {
+        "weekdays": WEEKDAYS,
+        "calendar_events": [
+            _event("standup", WEEKDAYS[1], 9, 10),
+            _event("Retro", WEEKDAYS[1], 14, 15),
+        ],
+        "incidents": [_incident(WEEKDAYS[2])],
+        "holidays": HOLIDAYS,
+        "classifier": classifier,
+    }
+
+    entries = _apply(plan_week(existing_entries=[], **kwargs), [])
+
+    tasks = {entry.notes: (entry.project_id, entry.task_id) for entry in entries}
+    assert tasks["standup"] == (ProjectEnum.FM_INTERNAL, TaskEnum.INTERNAL_MEETING)
+    assert tasks["Retro"] == (1, 2)
+    assert tasks["summary\nhttps://pagerduty.com/incident"] == (3, 4)
+
+    # the classified entries are pruned like the default ones
+    kwargs["calendar_events"] = []
+    plan = plan_week(existing_entries=entries, prune=True, **kwargs)
+    deleted = {operation.time_entry_id for operation in plan.operations}
+    assert {entry.id for entry in entries if entry.notes == "Retro"} <= deleted
+
+
+def test_plan_week_rerun_is_a_noop() -> None:
+    kwargs: dict[str, Any] = {
+        "weekdays": WEEKDAYS,
+        "calendar_events": [_event("standup", WEEKDAYS[1], 9, 10)],
+        "incidents": [_incident(WEEKDAYS[2])],
+        "holidays": HOLIDAYS,
+    }
+    entries = _apply(plan_week(existing_entries=[], **kwargs), [])
+
+    assert plan_week(existing_entries=entries, **kwargs).operations == []
+
+
+def test_plan_week_resizes_filler_for_new_events() -> None:
+    kwargs: dict[str, Any] = {
+        "weekdays": WEEKDAYS,
+        "incidents": [],
+        "holidays": HOLIDAYS,
+    }
+    entries = _apply(plan_week(calendar_events=[], existing_entries=[], **kwargs), [])
+
+    events = [
+        _event("planning", WEEKDAYS[1], 9, 11),
+        _event("all hands", WEEKDAYS[2], 9, 18),
+    ]
+    plan = plan_week(calendar_events=events, existing_entries=entries, **kwargs)
+
+    assert plan.count(OperationType.CREATE) == 2
+    assert plan.count(OperationType.UPDATE) == 2  # tuesday's filler shrinks
+    assert plan.count(OperationType.DELETE) == 2  # wednesday is full
+    hours = _hours_per_day(_apply(plan, entries))
+    assert hours[WEEKDAYS[1]] == pytest.approx(8)
+    assert hours[WEEKDAYS[2]] == pytest.approx(9)
+
+
+def test_plan_week_keeps_entries_added_by_hand_to_filler_tasks() -> None:
+    kwargs: dict[str, Any] = {
+        "weekdays": WEEKDAYS,
+        "calendar_events": [],
+        "incidents": [],
+        "holidays": HOLIDAYS,
+    }
+    by_hand = TimeEntry(
+        id=1,
+        spent_date=WEEKDAYS[1],
+        hours=2,
+        project_id=ProjectEnum.SOC2.value,
+        task_id=TaskEnum.ENGINEERING.value,
+        user_id=1,
+        notes="real work I logged",
+    )
+
+    plan = plan_week(existing_entries=[by_hand], **kwargs)
+
+    assert all(operation.time_entry_id != 1 for operation in plan.operations)
+    entries = _apply(plan, [by_hand])
+    assert _hours_per_day(entries)[WEEKDAYS[1]] == pytest.approx(8)
+    assert plan_week(existing_entries=entries, **kwargs).operations == []
+
+
+def test_plan_week_ignores_the_entries_of_other_users() -> None:
+    kwargs: dict[str, Any] = {
+        "weekdays": WEEKDAYS,
+        "calendar_events": [],
+        "incidents": [],
+        "holidays": HOLIDAYS,
+        "user_id": 1,
+    }
+    # an admin token also reads the entries of the rest of the team
+    someone_else = TimeEntry(
+        id=1,
+        spent_date=WEEKDAYS[1],
+        hours=8,
+        project_id=ProjectEnum.SOC2.value,
+        task_id=TaskEnum.ENGINEERING.value,
+        user_id=2,
+        notes="their own work",
+    )
+
+    plan = plan_week(existing_entries=[someone_else], **kwargs)
+
+    assert _hours_per_day(_apply(plan, [])) == dict.fromkeys(WEEKDAYS, 8)
+
+
+def test_plan_week_prune() -> None:
+    kwargs: dict[str, Any] = {
+        "weekdays": WEEKDAYS,
+        "incidents": [],
+        "holidays": HOLIDAYS,
+    }
+    events = [_event("cancelled later", WEEKDAYS[1], 9, 10)]
+    entries = _apply(
+        plan_week(calendar_events=events, existing_entries=[], **kwargs), []
+    )
+    # entries added by hand are never pruned, even on the generated tasks
+    entries.extend(
+        TimeEntry(
+            id=id_,
+            spent_date=WEEKDAYS[3],
+            hours=4,
+            project_id=ProjectEnum.FM_INTERNAL.value,
+            task_id=task_id,
+            user_id=1,
+        )
+        for id_, task_id in [(1, TaskEnum.LEAVE), (2, TaskEnum.INTERNAL_MEETING)]
+    )
+
+    plan = plan_week(calendar_events=[], existing_entries=entries, prune=True, **kwargs)
+
+    deleted = {
+        operation.time_entry_id
+        for operation in plan.operations
+        if operation.type == OperationType.DELETE
+    }
+    assert len(deleted) == 1 + 2  # meeting and thursday filler
+    assert not deleted & {1, 2}
+    assert plan.count(OperationType.UPDATE) == 2  # tuesday's filler grows
+    hours = _hours_per_day(_apply(plan, entries))
+    assert list(hours.values()) == pytest.approx([8] * 5)
+
+
+def test_execute_plan() -> None:
+    entry = NewTimeEntry(
+        project_id=ProjectEnum.SOC2,
+        task_id=TaskEnum.ENGINEERING,
+        spent_date=MONDAY,
+        hours=1,
+    )
+    plan = Plan(
+        operations=[
+            Operation(type=OperationType.CREATE, entry=entry),
+            Operation(type=OperationType.UPDATE, entry=entry, time_entry_id=1),
+            Operation(type=OperationType.DELETE, time_entry_id=2),
+        ]
+    )
+
+    harvest = MagicMock()
+    execute_plan(harvest=harvest, plan=plan)
+    harvest.add_time_entry.assert_called_once_with(entry)
+    harvest.update_time_entry.assert_called_once_with(1, entry)
+    harvest.delete_time_entry.assert_called_once_with(time_entry_id=2)
+
+    async_harvest = AsyncMock()
+    asyncio.run(execute_plan_async(harvest=async_harvest, plan=plan))
+    async_harvest.add_time_entry.assert_awaited_once_with(entry)
+    async_harvest.update_time_entry.assert_awaited_once_with(1, entry)
+    async_harvest.delete_time_entry.assert_awaited_once_with(time_entry_id=2)
+
+
+def test_execute_plan_skips_entries_already_written() -> None:
+    entry = NewTimeEntry(
+        project_id=ProjectEnum.SOC2,
+        task_id=TaskEnum.ENGINEERING,
+        spent_date=MONDAY,
+        hours=1,
+        external_reference=ExternalReference(id="gcal:event"),
+    )
+    index = WriteIndex()
+    harvest = MagicMock()
+    harvest.add_time_entry.return_value = harvest.update_time_entry.return_value = (
+        TimeEntry(
+            id=1,
+            spent_date=MONDAY,
+            hours=1,
+            project_id=entry.project_id,
+            task_id=entry.task_id,
+            user_id=1,
+        )
+    )
+
+    plan = Plan(operations=[Operation(type=OperationType.CREATE, entry=entry)])
+    execute_plan(harvest=harvest, plan=plan, index=index)
+    execute_plan(harvest=harvest, plan=plan, index=index)
+    harvest.add_time_entry.assert_called_once()
+
+    changed = entry.model_copy(update={"hours": 2})
+    plan = Plan(operations=[Operation(type=OperationType.CREATE, entry=changed)])
+    execute_plan(harvest=harvest, plan=plan, index=index)
+    harvest.add_time_entry.assert_called_once()
+    harvest.update_time_entry.assert_called_once_with(1, changed)
+
+
+def test_execute_plan_recreates_entries_deleted_from_harvest() -> None:
+    entry = NewTimeEntry(
+        project_id=ProjectEnum.SOC2,
+        task_id=TaskEnum.ENGINEERING,
+        spent_date=MONDAY,
+        hours=1,
+        external_reference=ExternalReference(id="gcal:event"),
+    )
+    written = TimeEntry(
+        id=1,
+        spent_date=MONDAY,
+        hours=1,
+        project_id=entry.project_id,
+        task_id=entry.task_id,
+        user_id=1,
+    )
+    index = WriteIndex()
+    harvest = MagicMock()
+    harvest.add_time_entry.return_value = written
+    plan = Plan(operations=[Operation(type=OperationType.CREATE, entry=entry)])
+
+    execute_plan(harvest=harvest, plan=plan, index=index, user_id=1)
+    # another user with the same keys isn't skipped
+    execute_plan(harvest=harvest, plan=plan, index=index, user_id=2)
+    assert harvest.add_time_entry.call_count == 2
+
+    # the entry fetched from Harvest is there, the create is skipped
+    entries = TimeEntryIndex([written])
+    execute_plan(harvest=harvest, plan=plan, index=index, entries=entries, user_id=1)
+    assert harvest.add_time_entry.call_count == 2
+
+    # it was deleted from Harvest, the record is dropped and it is created again
+    entries = TimeEntryIndex()
+    execute_plan(harvest=harvest, plan=plan, index=index, entries=entries, user_id=1)
+    assert harvest.add_time_entry.call_count == 3
+    harvest.update_time_entry.assert_not_called()
+
+
+def test_plan_week_books_overlaps_once() -> None:
+    events = [
+        _event("planning", WEEKDAYS[2], 9, 11),
+        _event("double booked", WEEKDAYS[2], 10, 12),
+        _event("during the incident", WEEKDAYS[2], 10, 11),
+        _event("after hours", WEEKDAYS[3], 18, 19),
+    ]
+    entries = _apply(
+        plan_week(
+            weekdays=WEEKDAYS,
+            calendar_events=events,
+            incidents=[_incident(WEEKDAYS[2])],
+            existing_entries=[],
+            holidays=HOLIDAYS,
+        ),
+        [],
+    )
+
+    hours = {entry.notes: entry.hours for entry in entries}
+    assert "during the incident" not in hours
+    assert hours["planning"] == pytest.approx(1)
+    assert hours["double booked"] == pytest.approx(1)
+    assert hours["summary\nhttps://pagerduty.com/incident"] == pytest.approx(1)
+    hours_per_day = _hours_per_day(entries)
+    assert hours_per_day[WEEKDAYS[2]] == pytest.approx(8)
+    assert hours_per_day[WEEKDAYS[3]] == pytest.approx(9)
+
+
+def test_execute_plan_async_updates_entries() -> None:
+    entry = NewTimeEntry(
+        project_id=ProjectEnum.SOC2,
+        task_id=TaskEnum.ENGINEERING,
+        spent_date=MONDAY,
+        hours=2,
+    )
+    entries = TimeEntryIndex()
+    harvest = AsyncMock()
+    harvest.add_time_entry.return_value = TimeEntry(
+        id=1,
+        spent_date=MONDAY,
+        hours=2,
+        project_id=entry.project_id,
+        task_id=entry.task_id,
+        user_id=1,
+    )
+    plan = Plan(operations=[Operation(type=OperationType.CREATE, entry=entry)])
+
+    asyncio.run(execute_plan_async(harvest=harvest, plan=plan, entries=entries))
+    assert entries.get_hours(MONDAY) == pytest.approx(2)
+
+    plan = Plan(operations=[Operation(type=OperationType.DELETE, time_entry_id=1)])
+    asyncio.run(execute_plan_async(harvest=harvest, plan=plan, entries=entries))
+    assert entries.get_hours(MONDAY) == 0
+
+
+def test_execute_plan_async_records_writes_despite_a_failure() -> None:
+    entries = [
+        NewTimeEntry(
+            project_id=ProjectEnum.SOC2,
+            task_id=TaskEnum.ENGINEERING,
+            spent_date=MONDAY,
+            hours=1,
+            external_reference=ExternalReference(id=f"gcal:{key}"),
+        )
+        for key in ("first", "failed", "last")
+    ]
+
+    async def add_time_entry(entry: NewTimeEntry) -> TimeEntry:
+        assert entry.external_reference is not None
+        if entry.external_reference.id == "gcal:failed":
+            raise RuntimeError("failed")
+        # still in flight when the other write fails
+        await asyncio.sleep(0.01)
+        return TimeEntry(
+            id=entries.index(entry),
+            spent_date=MONDAY,
+            hours=1,
+            project_id=entry.project_id,
+            task_id=entry.task_id,
+            user_id=1,
+        )
+
+    index = WriteIndex()
+    harvest = AsyncMock()
+    harvest.add_time_entry.side_effect = add_time_entry
+    harvest.get_user.return_value = {"id": 1}
+    plan = Plan(
+        operations=[
+            Operation(type=OperationType.CREATE, entry=entry) for entry in entries
+        ]
+    )
+
+    with pytest.raises(RuntimeError, match="failed"):
+        asyncio.run(execute_plan_async(harvest=harvest, plan=plan, index=index))
+
+    assert index.get(1, "gcal:first") is not None
+    assert index.get(1, "gcal:failed") is None
+    assert index.get(1, "gcal:last") is not None
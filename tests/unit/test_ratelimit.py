@@ -0,0 +1,56 @@
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+from http import HTTPStatus
+
+import httpx
+import pytest
+
+from harvest_auto_timesheet.ratelimit import RetryPolicy, TokenBucket
+from tests.fakes import FakeClock
+
+
+def test_token_bucket_reserve() -> None:
+    clock = FakeClock(now=0.0)
+    bucket = TokenBucket(capacity=2, period=2, clock=clock)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    # the bucket is empty so the next callers queue up behind each other
+    assert bucket.reserve() == pytest.approx(1)
+    assert bucket.reserve() == pytest.approx(2)
+    assert bucket.stats.throttled == 2
+
+    # after the debt is paid back the bucket refills up to its capacity
+    clock.now = 100
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(1)
+
+
+def test_retry_policy_should_retry() -> None:
+    policy = RetryPolicy(max_retries=2)
+    rate_limited = httpx.Response(HTTPStatus.TOO_MANY_REQUESTS)
+    server_error = httpx.Response(HTTPStatus.SERVICE_UNAVAILABLE)
+    not_found = httpx.Response(HTTPStatus.NOT_FOUND)
+
+    assert policy.should_retry("POST", 0, rate_limited)
+    assert not policy.should_retry("POST", 2, rate_limited)
+    assert policy.should_retry("GET", 0, server_error)
+    assert not policy.should_retry("POST", 0, server_error)
+    assert not policy.should_retry("GET", 0, not_found)
+    assert policy.should_retry("DELETE", 0, None)
+    assert not policy.should_retry("POST", 0, None)
+
+
+def test_retry_policy_get_delay() -> None:
+    policy = RetryPolicy(backoff_base=1, backoff_max=10)
+
+    assert policy.get_delay(0, httpx.Response(429, headers={"Retry-After": "3"})) == 3
+    assert policy.get_delay(0, httpx.Response(429, headers={"Retry-After": "60"})) == 10
+
+    retry_at = format_datetime(datetime.now(tz=UTC) + timedelta(seconds=5))
+    delay = policy.get_delay(0, httpx.Response(429, headers={"Retry-After": retry_at}))
+    assert 0 < delay <= 5
+
+    for attempt in range(10):
+        assert 0 <= policy.get_delay(attempt) <= min(10, 2**attempt)
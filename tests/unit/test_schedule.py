@@ -0,0 +1,224 @@
+import asyncio
+from collections.abc import Iterator
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from harvest_auto_timesheet.checkpoint import Checkpoint
+from harvest_auto_timesheet.gcal import (
+    CalendarEvent,
+    CalendarSync,
+    SyncTokenExpiredError,
+)
+from harvest_auto_timesheet.harvest import Harvest, NewTimeEntry
+from harvest_auto_timesheet.instrumentation import Instrumentation
+from harvest_auto_timesheet.planfile import PlanFile
+from harvest_auto_timesheet.planner import Operation, OperationType, Plan
+from harvest_auto_timesheet.ratelimit import TokenBucket
+from harvest_auto_timesheet.schedule import apply_plan, run_schedule, run_schedule_async
+from tests.fakes import FakeApis, Faults, RecordedWeek
+
+MONDAY = date(year=2025, month=1, day=6)
+
+
+@pytest.fixture
+def mock_sources() -> Iterator[dict[str, MagicMock]]:
+    with (
+        patch("harvest_auto_timesheet.schedule._get_weekdays") as weekdays,
+        patch("harvest_auto_timesheet.schedule.get_calendar_events") as events,
+        patch("harvest_auto_timesheet.schedule.get_incidents") as incidents,
+        patch("harvest_auto_timesheet.schedule.get_sync_token") as sync_token,
+        patch("harvest_auto_timesheet.schedule.sync_calendar_events") as sync,
+        patch("harvest_auto_timesheet.schedule.get_user_incident_ids") as user_ids,
+        patch("harvest_auto_timesheet.schedule.plan_week") as plan_week,
+    ):
+        weekdays.return_value = [MONDAY]
+        events.return_value = []
+        incidents.return_value = []
+        sync_token.return_value = "token"
+        sync.return_value = CalendarSync(changed_event_ids=[], next_sync_token="next")
+        user_ids.return_value = set()
+        plan_week.return_value = Plan()
+        yield {
+            "get_calendar_events": events,
+            "sync_calendar_events": sync,
+            "plan_week": plan_week,
+        }
+
+
+def _run(harvest: Harvest, checkpoint_path: Path) -> None:
+    run_schedule(
+        harvest=harvest,
+        credentials=MagicMock(),
+        calendar_id="calendar_id",
+        pagerduty_client=MagicMock(),
+        pagerduty_user_id="user",
+        checkpoint_path=checkpoint_path,
+    )
+
+
+def test_run_schedule_incremental(
+    mock_harvest: Harvest,
+    mock_sources: dict[str, MagicMock],
+    tmp_path: Path,
+) -> None:
+    checkpoint_path = tmp_path / "checkpoint.json"
+    mock_harvest.iter_time_entries = MagicMock(return_value=iter([]))  # type: ignore[method-assign]
+    mock_harvest.get_time_entries = MagicMock(return_value=[])  # type: ignore[method-assign]
+
+    # the first run has no checkpoint so it always runs
+    _run(mock_harvest, checkpoint_path)
+    assert mock_sources["plan_week"].call_count == 1
+    checkpoint = Checkpoint.load(checkpoint_path)
+    assert checkpoint is not None
+    assert checkpoint.is_for_week(MONDAY)
+
+    # nothing changed so nothing is fetched or planned
+    _run(mock_harvest, checkpoint_path)
+    assert mock_sources["plan_week"].call_count == 1
+    assert mock_sources["get_calendar_events"].call_count == 1
+    assert mock_sources["sync_calendar_events"].call_args.kwargs["sync_token"] == (
+        "token"
+    )
+
+    # an event was changed
+    mock_sources["sync_calendar_events"].return_value = CalendarSync(
+        changed_event_ids=["event"], next_sync_token="next"
+    )
+    _run(mock_harvest, checkpoint_path)
+    assert mock_sources["plan_week"].call_count == 2
+
+    # the sync token expired
+    mock_sources["sync_calendar_events"].side_effect = SyncTokenExpiredError
+    _run(mock_harvest, checkpoint_path)
+    assert mock_sources["plan_week"].call_count == 3
+    mock_sources["sync_calendar_events"].side_effect = None
+    mock_sources["sync_calendar_events"].return_value = CalendarSync(
+        changed_event_ids=[], next_sync_token="next"
+    )
+
+    # a time entry was edited by hand
+    mock_harvest.iter_time_entries.return_value = iter([{"id": 1}])
+    _run(mock_harvest, checkpoint_path)
+    assert mock_sources["plan_week"].call_count == 4
+
+    # the checkpoint is for an older week
+    Checkpoint.create(
+        week_start=date(year=2024, month=12, day=30),
+        calendar_sync_token="token",
+        started_at=datetime.now(tz=UTC),
+        finished_at=datetime.now(tz=UTC),
+    ).save(checkpoint_path)
+    _run(mock_harvest, checkpoint_path)
+    assert mock_sources["plan_week"].call_count == 5
+
+
+def test_run_schedule_async_dry_run_and_apply(
+    mock_sources: dict[str, MagicMock],
+    tmp_path: Path,
+) -> None:
+    plan_path = tmp_path / "plan.ndjson"
+    checkpoint_path = tmp_path / "checkpoint.json"
+    operation = Operation(
+        type=OperationType.CREATE,
+        entry=NewTimeEntry(project_id=1, task_id=2, spent_date=MONDAY, hours=8),
+    )
+    mock_sources["plan_week"].return_value = Plan(operations=[operation])
+
+    harvest = MagicMock(rate_limiter=TokenBucket(), max_concurrency=10)
+    harvest.stats = harvest.rate_limiter.stats
+    harvest.get_user = AsyncMock(return_value={"id": 1})
+    harvest.get_time_entries = AsyncMock(return_value=[])
+    harvest.add_time_entry = AsyncMock()
+    instrumentation = Instrumentation()
+
+    # the calendar sends two pages, counted apart from the other services
+    def get_calendar_events(**kwargs: Any) -> list[CalendarEvent]:
+        for _ in range(2):
+            kwargs["instrumentation"].observe_request("calendar", "GET", 200, 0.1)
+        return []
+
+    mock_sources["get_calendar_events"].side_effect = get_calendar_events
+    instrumentation.observe_request("harvest", "GET", 200, 0.1)
+
+    asyncio.run(
+        run_schedule_async(
+            harvest=harvest,
+            credentials=MagicMock(),
+            calendar_id="calendar_id",
+            pagerduty_client=MagicMock(),
+            pagerduty_user_id="user",
+            checkpoint_path=checkpoint_path,
+            instrumentation=instrumentation,
+            dry_run_path=plan_path,
+        )
+    )
+
+    harvest.add_time_entry.assert_not_called()
+    assert not checkpoint_path.exists()
+    plan_file = PlanFile.load(plan_path)
+    assert plan_file.plan.operations == [operation]
+    assert [(phase.name, phase.requests) for phase in plan_file.phases] == [
+        ("calendar", 2),
+        ("incidents", 0),
+        ("time_entries", 0),
+        ("write", 1),
+    ]
+
+    asyncio.run(apply_plan(harvest=harvest, path=plan_path))
+
+    harvest.add_time_entry.assert_awaited_once_with(operation.entry)
+
+
+@pytest.mark.parametrize("weeks_ago", [0, 1])
+def test_apply_plan_checks_the_week_in_new_zealand(
+    tmp_path: Path, weeks_ago: int
+) -> None:
+    plan_path = tmp_path / "plan.json"
+    PlanFile.create(
+        week_start=MONDAY - timedelta(weeks=weeks_ago),
+        plan=Plan(),
+        created_at=datetime(year=2025, month=1, day=5, hour=19, tzinfo=UTC),
+        reads=[],
+        rate_limiter=TokenBucket(),
+        max_concurrency=10,
+    ).save(plan_path)
+
+    class MondayMorning(datetime):
+        # 8am on Monday in New Zealand, still Sunday in UTC
+        @classmethod
+        def now(cls, tz: Any = None) -> "MondayMorning":
+            return cls(year=2025, month=1, day=5, hour=19, tzinfo=UTC).astimezone(tz)
+
+    harvest = MagicMock(rate_limiter=TokenBucket())
+    harvest.stats = harvest.rate_limiter.stats
+    with (
+        patch("harvest_auto_timesheet.schedule.datetime", MondayMorning),
+        patch("harvest_auto_timesheet.schedule.console") as console,
+    ):
+        asyncio.run(apply_plan(harvest=harvest, path=plan_path))
+
+    printed = " ".join(str(call.args[0]) for call in console.print.call_args_list)
+    assert ("not the current week" in printed) is (weeks_ago > 0)
+
+
+def test_run_schedule_async_replays_a_recorded_week() -> None:
+    week = RecordedWeek.load("tests/data_files/recorded_week.json")
+    weekdays = [week.week_start + timedelta(days=i) for i in range(5)]
+    # every fifth request is rate limited and retried
+    apis = FakeApis.from_week(week, Faults(rate_limit_every=5))
+
+    asyncio.run(apis.run_week(weekdays))
+
+    hours: dict[str, float] = {}
+    for entry in apis.harvest.time_entries.values():
+        hours[entry["spent_date"]] = hours.get(entry["spent_date"], 0) + entry["hours"]
+    assert list(hours.values()) == pytest.approx([8] * 5)
+
+    # the second run has nothing left to write
+    writes = apis.harvest.writes
+    asyncio.run(apis.run_week(weekdays))
+    assert apis.harvest.writes == writes
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from harvest_auto_timesheet.split import split_totals
+
+
+def test_split_totals_sums_exactly() -> None:
+    rng = np.random.default_rng(42)
+    totals = rng.uniform(0, 8, size=1_000).round(6)
+
+    parts = split_totals(totals, 4, rng=rng)
+
+    assert parts.shape == (1_000, 4)
+    assert (parts >= 0).all()
+    # exact in integer units, so only float formatting error remains
+    assert np.array_equal(np.rint(parts * 10**6).sum(axis=1), np.rint(totals * 10**6))
+
+
+def test_split_totals_is_reproducible() -> None:
+    first = split_totals([8, 4.5], 3, rng=np.random.default_rng(1), decimals=2)
+    second = split_totals([8, 4.5], 3, rng=np.random.default_rng(1), decimals=2)
+
+    assert np.array_equal(first, second)
+    assert first.sum(axis=1) == pytest.approx([8, 4.5])
+
+
+def test_split_totals_edge_cases() -> None:
+    rng = np.random.default_rng()
+
+    assert split_totals([8], 0, rng=rng).shape == (1, 0)
+    assert split_totals([8], 1, rng=rng).tolist() == [[8]]
+    assert split_totals([0, 0], 3, rng=rng).tolist() == [[0, 0, 0], [0, 0, 0]]
+
+    with pytest.raises(ValueError, match="one-dimensional"):
+        split_totals([[8]], 2, rng=rng)
+
+
+def test_split_totals_weights_and_unit() -> None:
+    rng = np.random.default_rng(7)
+
+    parts = split_totals([8] * 2_000, 2, rng=rng, weights=[3, 1], unit=0.25)
+
+    # every part is a multiple of the unit and the totals are kept
+    assert np.array_equal(parts * 4, np.rint(parts * 4))
+    assert parts.sum(axis=1) == pytest.approx([8] * 2_000)
+    assert parts.mean(axis=0) == pytest.approx([6, 2], abs=0.1)
@@ -1,5 +1,6 @@
 from datetime import UTC, date, datetime
 from http import HTTPStatus
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import httpx
@@ -10,6 +11,7 @@ from harvest_auto_timesheet.util import (
     get_joke,
     get_start_of_week,
     random_numbers_sum,
+    write_atomic,
 )
 
 
@@ -79,3 +81,14 @@ def test_random_numbers_sum() -> None:
         numbers = random_numbers_sum(10, 5)
         assert len(numbers) == 5
         assert sum(numbers) == pytest.approx(10, rel=1e-6)
+
+
+def test_write_atomic(tmp_path: Path) -> None:
+    path = tmp_path / "nested" / "file.json"
+
+    write_atomic(path, "text")
+    assert path.read_text(encoding="utf-8") == "text"
+
+    write_atomic(path, b"bytes")
+    assert path.read_bytes() == b"bytes"
+    assert [child.name for child in path.parent.iterdir()] == ["file.json"]